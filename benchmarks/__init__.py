@@ -0,0 +1 @@
+"""Бенчмарки на синтетических платах (python -m benchmarks.run)"""
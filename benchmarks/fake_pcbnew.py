@@ -0,0 +1,373 @@
+"""Заменитель модуля pcbnew для бенчмарков
+
+Содержит только то, что вызывают plugin/core: графику, дорожки, отверстия,
+площадки и зоны платы, наборы слоев и контуры SHAPE_POLY_SET. Геометрия не
+проверяется, ZONE_FILLER ничего не заливает. Нумерация слоев как в KiCad 8.
+"""
+import sys
+
+# Слои
+F_Cu = 0
+B_Cu = 31
+B_Mask = 38
+F_Mask = 39
+Edge_Cuts = 44
+
+# Типы элементов (Type())
+PCB_SHAPE_T = 5
+PCB_TRACE_T = 11
+PCB_VIA_T = 12
+
+# Виды графики (GetShape())
+SHAPE_T_SEGMENT = 0
+SHAPE_T_RECTANGLE = 1
+SHAPE_T_ARC = 2
+SHAPE_T_CIRCLE = 3
+SHAPE_T_POLY = 4
+
+ZONE_FILL_MODE_POLYGONS = 0
+ZONE_FILL_MODE_HATCH_PATTERN = 1
+
+_LAYER_NAMES = {F_Cu: 'F.Cu', B_Cu: 'B.Cu', B_Mask: 'B.Mask', F_Mask: 'F.Mask', Edge_Cuts: 'Edge.Cuts'}
+_LAYER_NAMES.update({i: f'In{i}.Cu' for i in range(1, 31)})
+
+def LayerName(layer: int) -> str:
+    return _LAYER_NAMES[layer]
+
+def IsCopperLayer(layer: int) -> bool:
+    return layer <= B_Cu
+
+def CopperLayers(count: int):
+    """ID медных слоев платы из count слоев (F.Cu, In1.Cu, ..., B.Cu)"""
+    return [F_Cu] + list(range(1, count - 1)) + [B_Cu]
+
+class VECTOR2I:
+    def __init__(self, x, y):
+        self.x = int(x)
+        self.y = int(y)
+
+class LSET:
+    def __init__(self, layers):
+        self.layers = sorted(layers)
+
+    def Seq(self):
+        return self.layers
+
+class SHAPE_LINE_CHAIN:
+    def __init__(self, points=None):
+        self.points = []
+        if points is not None:
+            self.points = [VECTOR2I(x, y) for x, y in zip(points[0::2], points[1::2])]
+        self.closed = False
+
+    def Append(self, x, y=None):
+        self.points.append(x if y is None else VECTOR2I(x, y))
+
+    def SetClosed(self, closed):
+        self.closed = closed
+
+    def PointCount(self):
+        return len(self.points)
+
+    def CPoint(self, i):
+        return self.points[i]
+
+    def Area(self):
+        p = self.points
+        return abs(sum(p[i - 1].x * p[i].y - p[i].x * p[i - 1].y for i in range(len(p)))) / 2.0
+
+class SHAPE_POLY_SET:
+    PM_FAST = 0
+
+    def __init__(self, points=None):
+        self.outlines = []
+        self.holes = []
+        self.fractured = False
+        if points is not None:
+            chain = SHAPE_LINE_CHAIN()
+            for x, y in points:
+                chain.Append(x, y)
+            chain.SetClosed(True)
+            self.outlines.append(chain)
+
+    def AddOutline(self, chain):
+        self.outlines.append(chain)
+        return len(self.outlines) - 1
+
+    def AddHole(self, chain, outline=-1):
+        self.holes.append((chain, outline))
+
+    def HasHoles(self):
+        return bool(self.holes)
+
+    def HoleCount(self, outline):
+        return sum(1 for _chain, index in self.holes if index == outline)
+
+    def Fracture(self):
+        # Отверстия не сливаются с контурами: отмечается только факт дробления
+        self.fractured = True
+
+    def Append(self, other):
+        self.outlines.extend(other.outlines)
+        self.holes.extend(other.holes)
+
+    def OutlineCount(self):
+        return len(self.outlines)
+
+    def VertexCount(self):
+        return sum(chain.PointCount() for chain in self.outlines)
+
+    def CVertex(self, i):
+        for chain in self.outlines:
+            if i < chain.PointCount():
+                return chain.CPoint(i)
+            i -= chain.PointCount()
+        raise IndexError(i)
+
+    def Area(self):
+        return sum(chain.Area() for chain in self.outlines) - sum(chain.Area() for chain, _ in self.holes)
+
+class PCB_SHAPE:
+    def __init__(self, shape, layer, start, end, center=None, points=None):
+        self.shape = shape
+        self.layer = layer
+        self.start = VECTOR2I(*start)
+        self.end = VECTOR2I(*end)
+        self.center = VECTOR2I(*center) if center else None
+        self.poly = SHAPE_POLY_SET(points) if points else None
+
+    def Type(self):
+        return PCB_SHAPE_T
+
+    def GetShape(self):
+        return self.shape
+
+    def GetLayer(self):
+        return self.layer
+
+    def GetStart(self):
+        return self.start
+
+    def GetEnd(self):
+        return self.end
+
+    def GetCenter(self):
+        return self.center
+
+    def GetPolyShape(self):
+        return self.poly
+
+class PCB_TRACK:
+    def __init__(self, layer, start, end, width):
+        self.layer = layer
+        self.start = VECTOR2I(*start)
+        self.end = VECTOR2I(*end)
+        self.width = int(width)
+
+    def Type(self):
+        return PCB_TRACE_T
+
+    def GetLayer(self):
+        return self.layer
+
+    def GetStart(self):
+        return self.start
+
+    def GetEnd(self):
+        return self.end
+
+    def GetWidth(self):
+        return self.width
+
+class PCB_VIA:
+    def __init__(self, position, drill, width, layers):
+        self.position = VECTOR2I(*position)
+        self.drill = int(drill)
+        self.width = int(width)
+        self.layers = LSET(layers)
+
+    def Type(self):
+        return PCB_VIA_T
+
+    def Cast(self):
+        return self
+
+    def GetPosition(self):
+        return self.position
+
+    def GetDrillValue(self):
+        return self.drill
+
+    def GetWidth(self):
+        return self.width
+
+    def GetLayerSet(self):
+        return self.layers
+
+class PADSTACK:
+    MODE_NORMAL = 0
+    MODE_FRONT_INNER_BACK = 1
+    MODE_CUSTOM = 2
+
+    def __init__(self, mode=MODE_NORMAL):
+        self.mode = mode
+
+    def Mode(self):
+        return self.mode
+
+class PAD:
+    def __init__(self, points, layers, shape='custom', size=None, position=None, layer_points=None):
+        self.polygon = SHAPE_POLY_SET(points)
+        self.layers = LSET(layers)
+        # Формы отдельных слоев (стек CUSTOM), остальные слои — points
+        self.layer_polygons = {l: SHAPE_POLY_SET(p) for l, p in (layer_points or {}).items()}
+        self.padstack = PADSTACK(PADSTACK.MODE_CUSTOM if layer_points else PADSTACK.MODE_NORMAL)
+        # Форма, размер и центр площадки нужны только для записи в файл (synthetic.WriteBoardFile)
+        self.shape = shape
+        self.size = size
+        self.position = position
+
+    def GetLayerSet(self):
+        return self.layers
+
+    def Padstack(self):
+        return self.padstack
+
+    def GetEffectivePolygon(self, layer, error=0):
+        return self.layer_polygons.get(layer, self.polygon)
+
+class ZONE:
+    def __init__(self, board=None):
+        self.layer = F_Cu
+        self.name = ''
+        self.outline = SHAPE_POLY_SET()
+        self.filled = SHAPE_POLY_SET()
+        self.min_thickness = 250000
+
+    def SetLayer(self, layer):
+        self.layer = layer
+
+    def GetLayer(self):
+        return self.layer
+
+    def GetLayerSet(self):
+        return LSET([self.layer])
+
+    def SetNetCode(self, net):
+        pass
+
+    def SetZoneName(self, name):
+        self.name = name
+
+    def GetZoneName(self):
+        return self.name
+
+    def Outline(self):
+        return self.outline
+
+    def SetFilledPolysList(self, layer, poly_set):
+        self.filled = poly_set
+
+    def GetFilledPolysList(self, layer):
+        return self.filled
+
+    def SetIsFilled(self, filled):
+        pass
+
+    def SetNeedRefill(self, refill):
+        pass
+
+    def SetFillMode(self, mode):
+        pass
+
+    def SetHatchThickness(self, thickness):
+        pass
+
+    def SetHatchGap(self, gap):
+        pass
+
+    def GetMinThickness(self):
+        return self.min_thickness
+
+    def SetMinThickness(self, thickness):
+        self.min_thickness = thickness
+
+class ZONE_FILLER:
+    def __init__(self, board):
+        self.board = board
+
+    def Fill(self, zones, check=False):
+        return True
+
+class BOX2I:
+    def __init__(self, x, y, width, height):
+        self.position = VECTOR2I(x, y)
+        self.width = int(width)
+        self.height = int(height)
+
+    def GetPosition(self):
+        return self.position
+
+    def GetWidth(self):
+        return self.width
+
+    def GetHeight(self):
+        return self.height
+
+class BOARD_DESIGN_SETTINGS:
+    def __init__(self, min_clearance=200000, max_error=5000):
+        self.m_MinClearance = min_clearance
+        self.m_MaxError = max_error
+
+class BOARD:
+    def __init__(self, copper_layers=2, file_name=''):
+        self.copper = CopperLayers(copper_layers)
+        self.layers = LSET(self.copper + [B_Mask, F_Mask, Edge_Cuts])
+        self.drawings = []
+        self.tracks = []
+        self.pads = []
+        self.zones = []
+        self.file_name = file_name
+        self.design_settings = BOARD_DESIGN_SETTINGS()
+
+    def GetLayerSet(self):
+        return self.layers
+
+    def GetLayerID(self, name):
+        return next(l for l, n in _LAYER_NAMES.items() if n == name)
+
+    def GetFileName(self):
+        return self.file_name
+
+    def GetDesignSettings(self):
+        return self.design_settings
+
+    def Drawings(self):
+        return self.drawings
+
+    def GetTracks(self):
+        return self.tracks
+
+    def GetPads(self):
+        return self.pads
+
+    def Zones(self):
+        return self.zones
+
+    def Add(self, item):
+        self.zones.append(item)
+
+    def Remove(self, item):
+        self.zones.remove(item)
+
+    def GetBoardEdgesBoundingBox(self):
+        xs, ys = [], []
+        for d in self.drawings:
+            if d.GetLayer() == Edge_Cuts:
+                xs += [d.start.x, d.end.x]
+                ys += [d.start.y, d.end.y]
+        return BOX2I(min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+
+def Install():
+    """Подменяет pcbnew этим модулем (до импорта plugin.core)"""
+    sys.modules['pcbnew'] = sys.modules[__name__]
@@ -0,0 +1,186 @@
+"""Бенчмарки предобработки и заполнения на синтетических платах
+
+    python -m benchmarks.run --scales small,medium --repeat 3
+    python -m benchmarks.run --json current.json --baseline previous.json
+
+Каждый замер повторяется --repeat раз, в таблицу идут минимум и медиана.
+С --baseline замеры сравниваются с прошлым JSON; замедление больше
+--fail-ratio считается регрессией (код возврата 1).
+"""
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+
+from typing import Callable, Dict
+
+from . import fake_pcbnew
+fake_pcbnew.Install()
+
+import shapely
+
+from plugin.locale import init_locale
+from plugin.core.board_index import THROUGH
+from plugin.core.preprocessing import (IndexBoard, GetEdgeContours, GetZones, GetMasks, GetTracks, GetPads, GetVias)
+from plugin.core.edge_cuts_utils import BuildPolys
+from plugin.core.clipping import ObstacleIndex, ShapeClipper
+from plugin.core.grid import SplitIntoTiles, GridAxes, ElementTemplate, MakeCells
+from plugin.core.engines import GRID_ENGINES
+from plugin.core.pipeline import BuildSharedObstacles, BuildLayerObstacles, ProcessSectionGrid, RunFill, StepFromDensity
+from plugin.core.snapshot import SnapshotCache
+from plugin.core.kicad_pcb import ReadBoardIndex
+from plugin.core.utils import NmToMkr
+
+from .synthetic import SCALES, MakeBoard, BoardCounts, WriteBoardFile
+
+# Настройки заполнения бенчмарков (мкм)
+FILL_PARAMS = {
+    'kind': 'Square',
+    'size_mm': 600,
+    'density': 50,
+    'shift_x': 0,
+    'shift_y': 0,
+    'clearance': 300,
+    'engine': 'batch',
+    'backend': 'threads',
+    'output': 'outline',
+    'incremental': False,
+    'snapshot_cache': False
+}
+# Сколько элементов сетки обрезается в замере ShapeClipper.clip
+CLIP_ELEMENTS = 5000
+
+def Measure(fn: Callable, repeat: int) -> Dict[str, float]:
+    """Минимум и медиана времени вызова fn, сек"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    return {'min': min(times), 'median': statistics.median(times)}
+
+def _Obstacles(index, board_margin, clearance, layer_name):
+    cache = SnapshotCache('')
+    shared = BuildSharedObstacles(index, board_margin, clearance, cache)
+    layer = BuildLayerObstacles(index, layer_name, board_margin, clearance, cache)
+    obstacles = ObstacleIndex([shared['inner'], shared['pads'], shared['vias'],
+                               layer['zones'], layer['masks'], layer['tracks'], layer['pads'], layer['vias']])
+
+    return shared['outer'], obstacles
+
+def RunScale(scale: str, repeat: int) -> Dict[str, Dict]:
+    """Все замеры на плате одного масштаба"""
+    board = MakeBoard(**SCALES[scale])
+    board_margin = FILL_PARAMS['clearance']
+    clearance = NmToMkr(board.GetDesignSettings().m_MinClearance)
+    layer_name = 'F.Cu'
+    results = {}
+
+    # Обход fake_pcbnew не платит за вызовы SWIG, поэтому 'index' здесь — нижняя оценка;
+    # 'index-file' в FillBoard идет в отдельном процессе одновременно с pcbnew.LoadBoard
+    results['index'] = Measure(lambda: IndexBoard(board), repeat)
+    index = IndexBoard(board)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        board_file = WriteBoardFile(board, f"{tmp}/{scale}.kicad_pcb")
+        results['index-file'] = Measure(lambda: ReadBoardIndex(board_file), repeat)
+
+    edges = GetEdgeContours(index, 'Edge.Cuts')
+    results['edges'] = Measure(lambda: BuildPolys(edges['lines'], edges['arcs'], edges['circles'], edges['squares'], edges['polys']), repeat)
+    results['zones'] = Measure(lambda: GetZones(index, layer_name, board_margin), repeat)
+    results['masks'] = Measure(lambda: GetMasks(index, layer_name, board_margin), repeat)
+    results['tracks'] = Measure(lambda: GetTracks(index, layer_name, clearance), repeat)
+    results['pads'] = Measure(lambda: GetPads(index, layer_name, clearance), repeat)
+    results['pads-through'] = Measure(lambda: GetPads(index, THROUGH, clearance), repeat)
+    results['vias-through'] = Measure(lambda: GetVias(index, THROUGH, clearance), repeat)
+
+    outer, obstacles = _Obstacles(index, board_margin, clearance, layer_name)
+    bbox = board.GetBoardEdgesBoundingBox()
+    main_zone_edges = {
+        'start_x': NmToMkr(bbox.GetPosition().x),
+        'start_y': NmToMkr(bbox.GetPosition().y),
+        'end_x': NmToMkr(bbox.GetPosition().x + bbox.GetWidth()),
+        'end_y': NmToMkr(bbox.GetPosition().y + bbox.GetHeight())
+    }
+    step = max(StepFromDensity(FILL_PARAMS['density'], FILL_PARAMS['size_mm']), board_margin)
+    tiles = SplitIntoTiles(main_zone_edges, FILL_PARAMS, step)
+    # Плитка из середины платы: в ней есть и препятствия, и свободные места
+    tile = tiles[len(tiles) // 2]
+
+    xs, ys = GridAxes(tile, FILL_PARAMS, step)
+    cells = MakeCells(ElementTemplate(FILL_PARAMS['kind'], FILL_PARAMS['size_mm']), xs, ys)[:CLIP_ELEMENTS]
+    # Как в FillTile: контур и препятствия обрезаны по плитке
+    section = shapely.box(*tile['clip'])
+    clipper = ShapeClipper(section, shapely.intersection(outer, section), obstacles.clip(section))
+    results['clip'] = Measure(lambda: [clipper.clip(cell) for cell in cells], repeat)
+    results['clip']['elements'] = len(cells)
+
+    for engine in GRID_ENGINES:
+        params = dict(FILL_PARAMS, engine=engine)
+        results[f'tile-{engine}'] = Measure(lambda: ProcessSectionGrid(tile, params, step, 0, outer, obstacles), repeat)
+
+    def fill():
+        # Зоны EmptySpace прошлого повтора заменяются, как при повторном запуске
+        RunFill(board, dict(FILL_PARAMS, layers=[fake_pcbnew.LayerName(l) for l in board.copper]))
+    results['fill'] = Measure(fill, repeat)
+
+    return results
+
+def Compare(current: Dict, baseline: Dict, fail_ratio: float) -> int:
+    """Печать отношений к прошлому прогону; число регрессий"""
+    regressions = 0
+    for scale, benches in current.items():
+        for name, result in benches.items():
+            base = baseline.get(scale, {}).get(name)
+            if not base:
+                continue
+            ratio = result['min'] / max(base['min'], 1e-9)
+            flag = ''
+            if ratio > fail_ratio:
+                regressions += 1
+                flag = '  REGRESSION'
+            print(f"{scale:>8} {name:<16} {base['min']:10.4f} -> {result['min']:10.4f} s  x{ratio:5.2f}{flag}")
+
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='benchmarks', description='Copper Filler benchmarks on synthetic boards')
+    parser.add_argument('--scales', default='small,medium', help=f"Comma separated: {', '.join(SCALES)}")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='Write results here')
+    parser.add_argument('--baseline', help='Compare with results of a previous run')
+    parser.add_argument('--fail-ratio', type=float, default=1.25, help='Slowdown counted as a regression')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Show the plugin log')
+    args = parser.parse_args(argv)
+
+    init_locale('English')
+    logger = logging.getLogger('log')
+    logger.addHandler(logging.StreamHandler(sys.stderr))
+    logger.setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    results = {}
+    for scale in args.scales.split(','):
+        board_counts = BoardCounts(MakeBoard(**SCALES[scale]))
+        print(f"{scale}: {board_counts}")
+        results[scale] = RunScale(scale, args.repeat)
+        for name, result in results[scale].items():
+            print(f"{scale:>8} {name:<16} min {result['min']:10.4f} s   median {result['median']:10.4f} s")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if Compare(results, baseline, args.fail_ratio):
+            return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""Генератор синтетических плат для бенчмарков
+
+Плата собирается из объектов fake_pcbnew: контур со скругленными углами
+(дуги), вырезы, дорожки, площадки, поля BGA, переходные отверстия и
+зоны. Одинаковый seed дает одинаковую плату.
+"""
+import math
+import random
+
+from typing import Dict
+
+from . import fake_pcbnew as pcbnew
+
+NM = 1000000 # нм в мм
+
+# Масштабы бенчмарков: параметры MakeBoard
+SCALES = {
+    'small': dict(width=50, height=40, copper_layers=2, tracks=500, pads=100, bga_fields=1, bga_rows=10,
+                  vias=100, cutouts=2, zones=2, masks=2),
+    'medium': dict(width=120, height=90, copper_layers=4, tracks=4000, pads=800, bga_fields=2, bga_rows=20,
+                   vias=1000, cutouts=6, zones=6, masks=6),
+    'large': dict(width=250, height=200, copper_layers=6, tracks=20000, pads=4000, bga_fields=4, bga_rows=30,
+                  vias=5000, cutouts=12, zones=12, masks=12)
+}
+
+def _Rect(cx, cy, w, h):
+    return [(cx - w/2, cy - h/2), (cx + w/2, cy - h/2), (cx + w/2, cy + h/2), (cx - w/2, cy + h/2)]
+
+def _Round(cx, cy, r, count=16):
+    return [(cx + r*math.cos(2*math.pi*i/count), cy + r*math.sin(2*math.pi*i/count)) for i in range(count)]
+
+def _Outline(board, width, height, corner_radius):
+    """Контур платы: отрезки и дуги скругленных углов (Edge.Cuts)"""
+    w, h, r = width*NM, height*NM, corner_radius*NM
+    lines = [((r, 0), (w - r, 0)), ((w, r), (w, h - r)), ((w - r, h), (r, h)), ((0, h - r), (0, r))]
+    for start, end in lines:
+        board.drawings.append(pcbnew.PCB_SHAPE(pcbnew.SHAPE_T_SEGMENT, pcbnew.Edge_Cuts, start, end))
+    if r <= 0:
+        return
+
+    # Дуга от конца одной стороны к началу следующей, центр внутри угла
+    corners = [((w - r, 0), (w, r), (w - r, r)), ((w, h - r), (w - r, h), (w - r, h - r)),
+               ((r, h), (0, h - r), (r, h - r)), ((0, r), (r, 0), (r, r))]
+    for start, end, center in corners:
+        board.drawings.append(pcbnew.PCB_SHAPE(pcbnew.SHAPE_T_ARC, pcbnew.Edge_Cuts, start, end, center))
+
+def MakeBoard(width: float = 100, height: float = 80, corner_radius: float = 3, copper_layers: int = 2,
+              tracks: int = 1000, pads: int = 200, bga_fields: int = 1, bga_rows: int = 16, bga_pitch: float = 0.8,
+              vias: int = 200, cutouts: int = 4, zones: int = 2, masks: int = 2, seed: int = 0) -> pcbnew.BOARD:
+    """Синтетическая плата
+
+    Args:
+        width (float, optional): Ширина платы, мм. Defaults to 100.
+        height (float, optional): Высота платы, мм. Defaults to 80.
+        corner_radius (float, optional): Радиус скругления углов контура (дуги), мм; 0 — прямые углы. Defaults to 3.
+        copper_layers (int, optional): Число медных слоев. Defaults to 2.
+        tracks (int, optional): Число отрезков дорожек на все медные слои. Defaults to 1000.
+        pads (int, optional): Число SMD площадок на внешних слоях. Defaults to 200.
+        bga_fields (int, optional): Число полей BGA на F.Cu. Defaults to 1.
+        bga_rows (int, optional): Шариков в ряду поля BGA. Defaults to 16.
+        bga_pitch (float, optional): Шаг шариков BGA, мм. Defaults to 0.8.
+        vias (int, optional): Число сквозных отверстий вне полей BGA. Defaults to 200.
+        cutouts (int, optional): Число вырезов (прямоугольники и окружности Edge.Cuts). Defaults to 4.
+        zones (int, optional): Число прямоугольных зон на медных слоях. Defaults to 2.
+        masks (int, optional): Число полигонов маски F.Mask. Defaults to 2.
+        seed (int, optional): Зерно генератора. Defaults to 0.
+
+    Returns:
+        pcbnew.BOARD: Плата fake_pcbnew
+    """
+    rnd = random.Random(seed)
+    board = pcbnew.BOARD(copper_layers)
+    copper = board.copper
+    outer = [pcbnew.F_Cu, pcbnew.B_Cu]
+    margin = 3
+
+    def point(pad=margin):
+        return rnd.uniform(pad, width - pad)*NM, rnd.uniform(pad, height - pad)*NM
+
+    _Outline(board, width, height, corner_radius)
+
+    for i in range(cutouts):
+        cx, cy = point(margin + 3)
+        size = rnd.uniform(1, 4)*NM
+        if i % 2:
+            board.drawings.append(pcbnew.PCB_SHAPE(pcbnew.SHAPE_T_CIRCLE, pcbnew.Edge_Cuts, (cx, cy), (cx + size/2, cy)))
+        else:
+            board.drawings.append(pcbnew.PCB_SHAPE(pcbnew.SHAPE_T_RECTANGLE, pcbnew.Edge_Cuts,
+                                                   (cx - size/2, cy - size/2), (cx + size/2, cy + size/2)))
+
+    # Дорожки: ортогональные и диагональные отрезки длиной до 20 мм
+    for _ in range(tracks):
+        x1, y1 = point()
+        angle = rnd.choice((0, 45, 90, 135))
+        length = rnd.uniform(0.5, 20)*NM
+        x2 = min(max(x1 + length*math.cos(math.radians(angle)), margin*NM), (width - margin)*NM)
+        y2 = min(max(y1 + length*math.sin(math.radians(angle)), margin*NM), (height - margin)*NM)
+        board.tracks.append(pcbnew.PCB_TRACK(rnd.choice(copper), (x1, y1), (x2, y2), rnd.choice((0.15, 0.2, 0.25, 0.5))*NM))
+
+    for _ in range(pads):
+        cx, cy = point()
+        layer = rnd.choice(outer)
+        mask = pcbnew.F_Mask if layer == pcbnew.F_Cu else pcbnew.B_Mask
+        w, h = rnd.uniform(0.4, 2)*NM, rnd.uniform(0.4, 2)*NM
+        board.pads.append(pcbnew.PAD(_Rect(cx, cy, w, h), [layer, mask], 'rect', (w, h), (cx, cy)))
+
+    # Поля BGA: круглые площадки с отверстием в каждой второй ячейке (dog-bone)
+    pitch = bga_pitch*NM
+    for _ in range(bga_fields):
+        x0, y0 = point(margin + bga_rows*bga_pitch)
+        x0, y0 = x0 - bga_rows*pitch/2, y0 - bga_rows*pitch/2
+        for row in range(bga_rows):
+            for col in range(bga_rows):
+                cx, cy = x0 + col*pitch, y0 + row*pitch
+                board.pads.append(pcbnew.PAD(_Round(cx, cy, 0.2*NM), [pcbnew.F_Cu, pcbnew.F_Mask], 'circle', (0.4*NM, 0.4*NM), (cx, cy)))
+                if (row + col) % 2 == 0:
+                    board.tracks.append(pcbnew.PCB_VIA((cx + pitch/2, cy + pitch/2), 0.2*NM, 0.2*NM, copper))
+
+    for _ in range(vias):
+        board.tracks.append(pcbnew.PCB_VIA(point(), 0.3*NM, 0.3*NM, copper))
+
+    for _ in range(zones):
+        cx, cy = point(margin + 10)
+        zone = pcbnew.ZONE(board)
+        zone.SetLayer(rnd.choice(copper))
+        zone.SetZoneName('GND')
+        zone.Outline().Append(pcbnew.SHAPE_POLY_SET(_Rect(cx, cy, rnd.uniform(5, 20)*NM, rnd.uniform(5, 20)*NM)))
+        board.zones.append(zone)
+
+    for _ in range(masks):
+        cx, cy = point(margin + 5)
+        points = _Rect(cx, cy, rnd.uniform(2, 10)*NM, rnd.uniform(2, 10)*NM)
+        board.drawings.append(pcbnew.PCB_SHAPE(pcbnew.SHAPE_T_POLY, pcbnew.F_Mask, points[0], points[2], points=points))
+
+    return board
+
+def BoardCounts(board: pcbnew.BOARD) -> Dict[str, int]:
+    """Количество элементов синтетической платы по видам"""
+    vias = sum(1 for t in board.tracks if t.Type() == pcbnew.PCB_VIA_T)
+    return {
+        'drawings': len(board.drawings),
+        'tracks': len(board.tracks) - vias,
+        'vias': vias,
+        'pads': len(board.pads),
+        'zones': len(board.zones)
+    }
+
+def _Mm(value) -> str:
+    return f"{value / NM:.6f}".rstrip('0').rstrip('.')
+
+def _Xy(name, point) -> str:
+    return f"({name} {_Mm(point.x if hasattr(point, 'x') else point[0])} {_Mm(point.y if hasattr(point, 'y') else point[1])})"
+
+def _ArcMid(d) -> tuple:
+    """Средняя точка дуги, идущей от start к end по возрастанию угла (как в InterpolateArc)"""
+    c = d.GetCenter()
+    r = math.hypot(d.start.x - c.x, d.start.y - c.y)
+    a1 = math.atan2(d.start.y - c.y, d.start.x - c.x)
+    a2 = math.atan2(d.end.y - c.y, d.end.x - c.x)
+    if a2 < a1:
+        a2 += 2*math.pi
+    am = (a1 + a2) / 2
+    return (c.x + r*math.cos(am), c.y + r*math.sin(am))
+
+def WriteBoardFile(board: pcbnew.BOARD, path: str) -> str:
+    """Запись синтетической платы в файл .kicad_pcb (формат KiCad 8)
+
+    Площадки пишутся в посадочные места: каждая вторая — с поворотом на
+    90° и смещением от начала посадочного места, чтобы чтение файла
+    проверяло повороты. У каждой зоны есть заливка (filled_polygon).
+    """
+    layer_types = {l: 'signal' if pcbnew.IsCopperLayer(l) else 'user' for l in board.layers.Seq()}
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('(kicad_pcb\n\t(version 20240108)\n\t(generator "copper_filler_benchmarks")\n\t(layers\n')
+        for l, kind in layer_types.items():
+            f.write(f'\t\t({l} "{pcbnew.LayerName(l)}" {kind})\n')
+        f.write('\t)\n\t(setup\n\t\t(pad_to_mask_clearance 0)\n\t)\n\t(net 0 "")\n')
+
+        for i, pad in enumerate(board.pads):
+            layers = ' '.join(f'"{pcbnew.LayerName(l)}"' for l in pad.layers.Seq())
+            (cx, cy), (w, h) = pad.position, pad.size
+            if i % 2:
+                # Поворот на 90°: смещение (1 мм, 0) от начала переходит в (0, -1 мм)
+                at, pad_at, size = (cx, cy + NM), '(at 1 0 90)', (h, w)
+                fp_at = f'(at {_Mm(at[0])} {_Mm(at[1])} 90)'
+            else:
+                fp_at, pad_at, size = f'(at {_Mm(cx)} {_Mm(cy)})', '(at 0 0)', (w, h)
+            f.write(f'\t(footprint "Synthetic:Pad{i}"\n\t\t(layer "{pcbnew.LayerName(pad.layers.Seq()[0])}")\n\t\t{fp_at}\n'
+                    f'\t\t(property "Reference" "P{i}" (at 0 0 0) (layer "F.SilkS"))\n'
+                    f'\t\t(pad "1" smd {pad.shape} {pad_at} (size {_Mm(size[0])} {_Mm(size[1])}) (layers {layers}))\n\t)\n')
+
+        for d in board.drawings:
+            layer = f'(layer "{pcbnew.LayerName(d.GetLayer())}")'
+            stroke = '(stroke (width 0.05) (type default))'
+            shape = d.GetShape()
+            if shape == pcbnew.SHAPE_T_SEGMENT:
+                f.write(f'\t(gr_line {_Xy("start", d.start)} {_Xy("end", d.end)} {stroke} {layer})\n')
+            elif shape == pcbnew.SHAPE_T_RECTANGLE:
+                f.write(f'\t(gr_rect {_Xy("start", d.start)} {_Xy("end", d.end)} {stroke} (fill none) {layer})\n')
+            elif shape == pcbnew.SHAPE_T_CIRCLE:
+                f.write(f'\t(gr_circle {_Xy("center", d.start)} {_Xy("end", d.end)} {stroke} (fill none) {layer})\n')
+            elif shape == pcbnew.SHAPE_T_ARC:
+                # Концы дуги пишутся в обратном порядке: направление определяется по средней точке
+                f.write(f'\t(gr_arc {_Xy("start", d.end)} {_Xy("mid", _ArcMid(d))} {_Xy("end", d.start)} {stroke} {layer})\n')
+            elif shape == pcbnew.SHAPE_T_POLY:
+                pts = ' '.join(_Xy('xy', p) for p in d.poly.outlines[0].points)
+                f.write(f'\t(gr_poly (pts {pts}) {stroke} (fill solid) {layer})\n')
+
+        for t in board.tracks:
+            if t.Type() == pcbnew.PCB_VIA_T:
+                ends = t.layers.Seq()
+                f.write(f'\t(via {_Xy("at", t.position)} (size {_Mm(t.width)}) (drill {_Mm(t.drill)}) '
+                        f'(layers "{pcbnew.LayerName(ends[0])}" "{pcbnew.LayerName(ends[-1])}") (net 0))\n')
+            else:
+                f.write(f'\t(segment {_Xy("start", t.start)} {_Xy("end", t.end)} (width {_Mm(t.width)}) '
+                        f'(layer "{pcbnew.LayerName(t.layer)}") (net 0))\n')
+
+        for zone in board.zones:
+            pts = ' '.join(_Xy('xy', p) for p in zone.outline.outlines[0].points)
+            f.write(f'\t(zone (net 0) (net_name "") (layer "{pcbnew.LayerName(zone.layer)}") (name "{zone.name}")\n'
+                    f'\t\t(polygon (pts {pts}))\n\t\t(filled_polygon (layer "{pcbnew.LayerName(zone.layer)}") (pts {pts}))\n\t)\n')
+        f.write(')\n')
+
+    return path
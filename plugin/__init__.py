@@ -1,7 +1,5 @@
 from .core.check_libs import _is_in_call_stack, ensure_dependencies
 
-from .ui.missing_lib_dialog import MissingLibsDialog
-
 if _is_in_call_stack("LoadPluginModule", "pcbnew"):
     libs = ["shapely", "psutil"]
     if ensure_dependencies(libs):
@@ -9,6 +7,8 @@ if _is_in_call_stack("LoadPluginModule", "pcbnew"):
 
         CopperFillerPlugin().register()
     else:
+        from .ui.missing_lib_dialog import MissingLibsDialog
+
         dialog = MissingLibsDialog()
         dialog.ShowModal()
         dialog.Destroy()
@@ -0,0 +1,159 @@
+"""Заполнение платы без интерфейса KiCad
+
+    plugin-cli board.kicad_pcb --layer F.Cu --layer B.Cu --density 60
+    python -m plugin board.kicad_pcb -o filled.kicad_pcb
+    python -m plugin --manifest family.toml --jobs 4 --summary summary.json
+
+Настройки берутся из settings.json рядом с платой (или --settings),
+параметры командной строки имеют приоритет. Размеры задаются в мм,
+как в settings.json.
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+from pathlib import Path
+
+from typing import Dict, List, Optional
+
+from .locale import init_locale
+from .logger import Logger
+from .core.settings import ENGINES, BACKENDS, OUTPUTS, LoadSettings
+from .core.manifest import LoadManifest, RunManifest
+
+logger = logging.getLogger('log')
+
+def _ParseArgs(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='plugin-cli', description='Fill empty board areas with copper elements (headless)')
+    parser.add_argument('board', nargs='?', help='.kicad_pcb file')
+    parser.add_argument('-o', '--output', help='Save the filled board here (default: overwrite the input)')
+    parser.add_argument('--settings', help='settings.json (default: next to the board)')
+    parser.add_argument('--no-settings', action='store_true', help='Ignore settings.json')
+    parser.add_argument('--layer', dest='layers', action='append', help='Copper layer to fill (repeatable)')
+    parser.add_argument('--kind', choices=['Square', 'Circle'], help='Element shape')
+    parser.add_argument('--size', dest='size_mm', type=float, help='Element size, mm')
+    parser.add_argument('--density', type=int, help='Fill density, %%')
+    parser.add_argument('--shift-x', type=float, help='Pattern offset X, mm')
+    parser.add_argument('--shift-y', type=float, help='Pattern offset Y, mm')
+    parser.add_argument('--clearance', type=float, help='Clearance to board objects, mm')
+    parser.add_argument('--class', dest='class', type=int, help='Board class (board_class.json)')
+    parser.add_argument('--engine', choices=ENGINES)
+    parser.add_argument('--backend', choices=BACKENDS)
+    parser.add_argument('--fill-output', dest='output', choices=OUTPUTS, help='How the result is written to the zone')
+    parser.add_argument('--max-chord-error', type=float, help='Arc approximation error, µm')
+    parser.add_argument('--validate', dest='validate_fill', action='store_true', default=None, help='Let KiCad refill and compare')
+    parser.add_argument('--read-file', dest='geometry_source', action='store_const', const='file',
+                        help='Read board geometry straight from the .kicad_pcb file instead of the pcbnew objects')
+    parser.add_argument('--trace', help='Write a Chrome trace (chrome://tracing, Perfetto) of the fill stages here')
+    parser.add_argument('--trace-sample', type=int, help='Trace: also time every Nth element clip')
+    parser.add_argument('--telemetry', type=float, nargs='?', const=True, metavar='INTERVAL',
+                        help='Sample RSS, CPU, threads and I/O during the fill (every INTERVAL sec, default 0.1)')
+    parser.add_argument('--incremental', action='store_true', default=None,
+                        help='Reuse unchanged tiles of the previous run (cache in .copper_filler next to the board)')
+    parser.add_argument('--snapshot-cache', action='store_true', default=None,
+                        help='Store the built obstacles in .copper_filler next to the board and reuse them')
+    parser.add_argument('--manifest', help='Fill the boards listed in a JSON/TOML manifest instead of BOARD')
+    parser.add_argument('--jobs', type=int, help='Manifest: number of worker processes')
+    parser.add_argument('--summary', help='Manifest: write the JSON summary of all jobs here')
+    parser.add_argument('--log-dir', help='Also write the log file to LOG_DIR/logs')
+    parser.add_argument('--lang', choices=['en', 'ru'], default='en')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Only warnings and errors on stderr')
+    parser.add_argument('--json', action='store_true', help='Print the run summary as JSON')
+
+    args = parser.parse_args(argv)
+    if bool(args.board) == bool(args.manifest):
+        parser.error('give either BOARD or --manifest')
+
+    return args
+
+def _SetupLogging(args: argparse.Namespace):
+    if args.log_dir:
+        Logger(dir=Path(args.log_dir)).setup_logger()
+    else:
+        logger.handlers.clear()
+    logger.setLevel(logging.DEBUG)
+
+    console = logging.StreamHandler(sys.stderr)
+    console.setLevel(logging.WARNING if args.quiet else logging.INFO)
+    console.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s : %(message)s', datefmt='%H:%M:%S'))
+    logger.addHandler(console)
+
+def CliSettings(args: argparse.Namespace) -> Dict:
+    """Настройки в мм: settings.json, поверх них параметры командной строки"""
+    settings = {}
+    if not args.no_settings:
+        settings_file = args.settings or os.path.join(os.path.dirname(os.path.abspath(args.board)), 'settings.json')
+        settings = LoadSettings(settings_file)
+        if settings:
+            logger.info(_("Settings: {settings_file}").format(settings_file=settings_file))
+        elif args.settings:
+            raise FileNotFoundError(args.settings)
+
+    overrides = {key: value for key, value in vars(args).items()
+                 if key in ('layers', 'kind', 'size_mm', 'density', 'shift_x', 'shift_y', 'clearance', 'class',
+                            'engine', 'backend', 'output', 'max_chord_error', 'validate_fill', 'incremental', 'snapshot_cache',
+                            'geometry_source', 'trace', 'trace_sample', 'telemetry')
+                 and value is not None}
+    if 'layers' in overrides:
+        settings.pop('layer_name', None)
+    settings.update(overrides)
+
+    return settings
+
+def RunCli(args: argparse.Namespace) -> Dict:
+    """Заполнение одной платы: загрузка, RunFill и сохранение
+
+    Returns:
+        Dict: Сводка RunFill
+    """
+    from .core.pipeline import FillBoard
+
+    return FillBoard(os.path.abspath(args.board), CliSettings(args), args.output and os.path.abspath(args.output))
+
+def RunBatch(args: argparse.Namespace) -> Dict:
+    """Заполнение плат манифеста в пуле процессов
+
+    Returns:
+        Dict: Сводки заданий (RunManifest)
+    """
+    jobs = LoadManifest(args.manifest)
+    summary = RunManifest(jobs, args.jobs, _LocaleName(args), logging.WARNING if args.quiet else logging.INFO)
+
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=4, ensure_ascii=False)
+        logger.info(_("Summary: {summary}").format(summary=args.summary))
+
+    return summary
+
+def _LocaleName(args: argparse.Namespace) -> str:
+    return 'Русский' if args.lang == 'ru' else 'English'
+
+def app(argv: Optional[List[str]] = None) -> int:
+    args = _ParseArgs(argv)
+    init_locale(_LocaleName(args))
+    _SetupLogging(args)
+
+    try:
+        summary = RunBatch(args) if args.manifest else RunCli(args)
+    except Exception as e:
+        logger.error(_("Critical error: {e}").format(e=str(e)))
+        return 1
+
+    if args.json:
+        print(json.dumps(summary, indent=4, ensure_ascii=False))
+    elif args.manifest:
+        for job in summary['jobs']:
+            if job['status'] == 'ok':
+                print(_("{save_as}: {total_shapes} elements, {clipped_shapes} added, {total_time:.3f} sec").format(**job))
+            else:
+                print(_("{board}: error: {error}").format(**job))
+        print(_("{boards} boards, {failed} failed, {total_time:.3f} sec").format(**summary))
+    else:
+        print(_("{board}: {total_shapes} elements, {clipped_shapes} added, {total_time:.3f} sec").format(**summary))
+
+    return 1 if args.manifest and summary['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(app())
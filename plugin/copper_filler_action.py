@@ -4,22 +4,13 @@ import json
 from pathlib import Path
 import platform
 import time
-import psutil
-import math
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Tuple
-
-from shapely.geometry import Polygon, MultiPolygon
-from shapely.ops import unary_union, transform
 
 from .ui.action_dialog import CopperFillerDialog
 from .ui.info_dialog import InfoDialog
 from .locale import init_locale
-from .core.utils import MmToMkr, NmToMkr, MkrToNm, RoundCoordsTransform
+from .core.settings import BoardClasses, SettingsToMkr
 from .logger import Logger
-from .core.preprocessing import GetZones, GetEdgeContours, GetMasks, GetTracks, GetPads, GetVias
-from .core.edge_cuts_utils import BuildPolys, GetType
-from .core.clipping import ShapeClipper
+from .core.pipeline import RunFill, FillLayers
 
 class CopperFillerPlugin(pcbnew.ActionPlugin):
     def defaults(self):
@@ -42,9 +33,7 @@ class CopperFillerPlugin(pcbnew.ActionPlugin):
             self.logger._info(_("START PLUGIN COPPER FILLER"))
 
             self.logger._info(_("Get board classes"))
-            board_classes = {}
-            with open(os.path.join(os.path.dirname(__file__), 'data', 'json', 'board_class.json')) as json_file:
-                board_classes = json.load(json_file)
+            board_classes = BoardClasses()
                 
             board = pcbnew.GetBoard()
             self.logger._info(_("Board: {board}").format(board=board.GetFileName()))
@@ -86,10 +75,13 @@ class CopperFillerPlugin(pcbnew.ActionPlugin):
                     except Exception as e:
                         wx.MessageBox(_("Error while saving settings: {e}").format(e=e), "Copper Filler", wx.OK | wx.ICON_ERROR)
 
-                params["size_mm"] = MmToMkr(params["size_mm"])
-                params["shift_x"] = MmToMkr(params["shift_x"])
-                params["shift_y"] = MmToMkr(params["shift_y"])
-                params["clearance"] = MmToMkr(params["clearance"])
+                params = SettingsToMkr(params)
+                # Плата в окне может отличаться от сохраненного файла: элементы берутся из pcbnew
+                params.pop('geometry_source', None)
+                # Трассировка (trace) и ресурсы по этапам (telemetry) включаются ключами settings.json;
+                # трассировка пишется рядом с журналом запуска
+                if params.get('trace'):
+                    params['trace'] = str(self.logger.log_file.with_suffix('.trace.json'))
             
             dialog.Destroy()
 
@@ -102,12 +94,13 @@ class CopperFillerPlugin(pcbnew.ActionPlugin):
                     )
             progress_dialog.Update(0)
 
-            start_total = time.time()
-
             self.logger._info(_(
                                 """
                                 Filler Settings:
-                                \tLayer: {layer_name}
+                                \tLayers: {layer_name}
+                                \tEngine: {engine}
+                                \tBackend: {backend}
+                                \tOutput: {output}
                                 \tShape: {shape}
                                 \tSize: {size} µm
                                 \tDensity: {density} %
@@ -116,7 +109,10 @@ class CopperFillerPlugin(pcbnew.ActionPlugin):
                                 \tOffset Y: {offset_y} µm
                                 """
                                 ).format(
-                                    layer_name=params['layer_name'], 
+                                    layer_name=', '.join(FillLayers(params)), 
+                                    engine=params.get('engine', 'loop'),
+                                    backend=params.get('backend', 'threads'),
+                                    output=params.get('output', 'outline'),
                                     shape=params['kind'], 
                                     size=params['size_mm'], 
                                     density=params['density'],
@@ -124,175 +120,17 @@ class CopperFillerPlugin(pcbnew.ActionPlugin):
                                     offset_x=params['shift_x'],
                                     offset_y=params['shift_y']))
 
-            board_margin = params['clearance']
-            clearance = NmToMkr(board.GetDesignSettings().m_MinClearance)
-
-            # Замер времени получения контуров Edge_Cuts
-            self._update_progress(progress_dialog, 15, _("Get Edge_Cuts..."))
-            start_time = time.time()
-            edges = GetEdgeContours(board, pcbnew.Edge_Cuts)
-            edge_cuts = BuildPolys(edges['lines'], edges['arcs'], edges['circles'], edges['squares'], edges['polys'])
-            outer, inner = GetType(edge_cuts)
-            edge_time = time.time() - start_time
-            self.logger._info(_("Get Edge_Cuts: {edge_time:.3f} sec").format(edge_time=edge_time))
-
-            outer = transform(RoundCoordsTransform, Polygon(outer).buffer(-board_margin))
-            inner = unary_union([transform(RoundCoordsTransform, Polygon(inner_poly).buffer(board_margin)) for inner_poly in inner])
-
-            self._update_progress(progress_dialog, 20, _("Get zones..."))
-            start_time = time.time()
-            zones = GetZones(board, params['layer_name'], board_margin)
-            zones_time = time.time() - start_time
-            self.logger._info(_("Get zones: {zones_time:.3f} sec").format(zones_time=zones_time))
-            
-            self._update_progress(progress_dialog, 25, _("Get masks..."))
-            start_time = time.time()
-            masks = GetMasks(board, params['layer_name'], board_margin)
-            masks_time = time.time() - start_time
-            self.logger._info(_("Get masks: {masks_time:.3f} sec").format(masks_time=masks_time))
-
-            self._update_progress(progress_dialog, 30, _("Get tracks..."))
-            start_time = time.time()
-            tracks = GetTracks(board, params['layer_name'], clearance)
-            tracks_time = time.time() - start_time
-            self.logger._info(_("Get tracks: {tracks_time:.3f} sec").format(tracks_time=tracks_time))
-
-            self._update_progress(progress_dialog, 35, _("Get pads..."))
-            start_time = time.time()
-            pads = GetPads(board, params['layer_name'], clearance)
-            pads_time = time.time() - start_time
-            self.logger._info(_("Get pads: {pads_time:.3f} sec").format(pads_time=pads_time))
-
-            self._update_progress(progress_dialog, 40, _("Get vias..."))
-            start_time = time.time()
-            vias = GetVias(board, params['layer_name'], clearance)
-            vias_time = time.time() - start_time
-            self.logger._info(_("Get vias: {vias_time:.3f} sec").format(vias_time=vias_time))
-
-            edges_bbox = board.GetBoardEdgesBoundingBox()
-
-            for zone in board.Zones():
-                if pcbnew.LayerName(zone.GetLayer()) == params['layer_name']:
-                    if zone.GetZoneName() == 'EmptySpace':
-                        board.Remove(zone)
-                    
-            main_zone = pcbnew.ZONE(board)
-            main_zone.SetLayer(board.GetLayerID(params['layer_name']))
-            main_zone.SetNetCode(0)
-            main_zone.SetZoneName('EmptySpace')
-                    
-            main_zone_edges = {
-                                'start_x': NmToMkr(edges_bbox.GetPosition().x),
-                                'start_y': NmToMkr(edges_bbox.GetPosition().y),
-                                'end_x': NmToMkr(edges_bbox.GetPosition().x + edges_bbox.GetWidth()),
-                                'end_y': NmToMkr(edges_bbox.GetPosition().y + edges_bbox.GetHeight())
-                            }
-
-            element_diam = params['size_mm']
-            step = self.StepFromDensity(params['density'], params['size_mm'])
-                                
-            if step < board_margin:
-                step = board_margin
-
-            # Записываем информацию о размерах платы и сетке
-            board_width = main_zone_edges['end_x'] - main_zone_edges['start_x']
-            board_height = main_zone_edges['end_y'] - main_zone_edges['start_y']
-            self.logger._info(_("Board size: {board_width:.1f} x {board_height:.1f} µm").format(board_width=board_width, board_height=board_height))
-            self.logger._info(_("Element size: {element_diam} µm, step: {step:.3f} µm").format(element_diam=element_diam, step=step))
-                    
-            # Замер времени основного цикла заполнения
-            self.logger._info(_("START MAIN LOOP"))
-            start_fill_loop = time.time()
-            total_shapes = 0
-            clipped_shapes = 0
-            clipper_total_time = []
-            shape_creation_time = 0
+            summary = RunFill(board, params, lambda value, message=None: self._update_progress(progress_dialog, value, message))
 
-            num_threads = max(1, min(10, int(psutil.cpu_count(logical=False))))
-            self.logger._info(_("Proccessing Threads Count: {num_threads}").format(num_threads=num_threads))
-
-            self._update_progress(progress_dialog, 45, _("Check pre-count shapes..."))
-            total_estimated_shapes = self._estimate_total_shapes(main_zone_edges, params, step)
-            self.logger._info(_("Pre-count shape: {total_estimated_shapes}").format(total_estimated_shapes=total_estimated_shapes))
-
-            # Разделяем на секции
-            sections = self.SplitIntoSections(main_zone_edges, num_threads, element_diam, step)
-
-            progress_per_section = int(40 / num_threads)
-            completed_sections = 0
-                    
-            # Обновляем диалог прогресса для основного цикла
-            progress_dialog.SetRange(100)
+            pcbnew.Refresh()
 
-            self._update_progress(progress_dialog, 50, _("Start copper filling..."))
+            total_time = summary['total_time']
+            fill_loop_time = summary['fill_loop_time']
+            fill_time = summary['fill_time']
+            total_shapes = summary['total_shapes']
+            clipped_shapes = summary['clipped_shapes']
+            stage_times = summary['stage_times']
 
-            with ThreadPoolExecutor(max_workers=num_threads) as executor:
-                # Создаем задачи для каждой секции
-                futures = []
-                for i in range(num_threads):
-                    future = executor.submit(
-                            self.ProcessSection,
-                            sections[i], params, step,
-                            i,  # номер секции
-                            zones, outer, inner, masks, tracks, pads, vias
-                        )
-                    futures.append(future)
-                        
-                # Собираем результаты и обновляем прогресс
-                all_shapes = []
-                        
-                for future in as_completed(futures):
-                    try:
-                        section_result = future.result(timeout=300)  # таймаут 5 минут на секцию
-                        all_shapes.extend(section_result['shapes'])
-                        total_shapes += section_result['total_shapes']
-                        clipped_shapes += section_result['clipped_shapes']
-                        shape_creation_time += section_result['shape_creation_time']
-                        clipper_total_time.append(section_result['clipper_total_time'])
-                                
-                        # Обновляем прогресс
-                        completed_sections += 1
-                        self._update_progress(progress_dialog, 50 + (completed_sections*progress_per_section),
-                                                _("Fill copper... Section {completed_sections}/{num_threads}").format(completed_sections=completed_sections, num_threads=num_threads))
-                                
-                        self.logger._info(_("Section {section_id} ends: {total_shapes} elements, {clipped_shapes} added").format(
-                            section_id=section_result['section_id'],
-                            total_shapes=section_result['total_shapes'],
-                            clipped_shapes=section_result['clipped_shapes']
-                        ))
-                    except Exception as e:
-                        self.logger._error(_("Error while processing: {e}").format(e=str(e)))
-                        raise
-                        
-                # Добавляем все фигуры в основную зону
-                self._update_progress(progress_dialog, 90, _("Add shapes to zones..."))
-                for shape_outline in all_shapes:
-                    main_zone.Outline().AddOutline(shape_outline)
-                    
-            fill_loop_time = time.time() - start_fill_loop
-            self.logger._info(_("MAIN LOOP ENDED"))
-            self.logger._info(_("Main loop time: {fill_loop_time:.3f} sec").format(fill_loop_time=fill_loop_time))
-            self.logger._info(_("Total shapes: {total_shapes}").format(total_shapes=total_shapes))
-            self.logger._info(_("Clipped shapes: {clipped_shapes}").format(clipped_shapes=clipped_shapes))
-            self.logger._info(_("Shape creation time: {shape_creation_time:.3f} sec").format(shape_creation_time=shape_creation_time))
-            clipper_total_time = sum(clipper_total_time)/len(clipper_total_time)
-            self.logger._info(_("Average clipper total time: {clipper_total_time:.3f} sec").format(clipper_total_time=clipper_total_time))
-            self.logger._info(_("Average time to element: {a:.2f} msec").format(a=clipper_total_time/max(total_shapes, 1)*1000))
-            self.logger._info(_("Added element persentage: {a:.1f}%").format(a=clipped_shapes/max(total_shapes, 1)*100))
-                        
-            # Замер времени добавления и заполнения зоны
-            self._update_progress(progress_dialog, 98, _("End zone..."))
-            start_time = time.time()
-            board.Add(main_zone) 
-            filler = pcbnew.ZONE_FILLER(board)
-            filler.Fill([main_zone])
-            fill_time = time.time() - start_time
-            self.logger._info(_("Add and fill zones: {fill_time:.3f} sec").format(fill_time=fill_time))
-                    
-            pcbnew.Refresh()
-                    
-            total_time = time.time() - start_total
-                    
             # Записываем итоговый отчет
             self.logger._info(_("TOTAL INFORMATION"))
             self.logger._info(_("Total time: {total_time:.3f} sec").format(total_time=total_time))
@@ -307,24 +145,21 @@ class CopperFillerPlugin(pcbnew.ActionPlugin):
                 fill_time=fill_time,
                 a=fill_time/total_time*100
             ))
+            for layer_name, layer in summary['layers'].items():
+                self.logger._info(_("Layer {layer_name}: {total_shapes} elements, {clipped_shapes} added, {fill_loop_time:.3f} sec").format(
+                    layer_name=layer_name, **layer))
             self.logger._info(_(
                 """
-                    Preprocessing details:
-                    \tEdge contours: {edge_time:.3f} sec
-                    \tZones: {zones_time:.3f} sec
-                    \tMasks: {masks_time:.3f} sec
-                    \tTracks: {tracks_time:.3f} sec
-                    \tPads: {pads_time:.3f} sec
-                    \tVias: {vias_time:.3f} sec
+                    Preprocessing details (all layers):
+                    \tBoard index: {index_time:.3f} sec
+                    \tEdge contours: {edges:.3f} sec
+                    \tZones: {zones:.3f} sec
+                    \tMasks: {masks:.3f} sec
+                    \tTracks: {tracks:.3f} sec
+                    \tPads: {pads:.3f} sec
+                    \tVias: {vias:.3f} sec
                 """
-            ).format(
-                edge_time=edge_time,
-                zones_time=zones_time,
-                masks_time=masks_time,
-                tracks_time=tracks_time,
-                pads_time=pads_time,
-                vias_time=vias_time
-            ))
+            ).format(index_time=summary['index_time'], **stage_times))
             self.logger._info(_("END PLUGIN"))
 
             # Закрываем диалог прогресса
@@ -359,165 +194,6 @@ class CopperFillerPlugin(pcbnew.ActionPlugin):
 
         return log_dir
     
-    def _estimate_total_shapes(self, edges: Dict, params: Dict, step: float) -> int:
-        """Оценка общего количества фигур для прогресс-бара"""
-        width = edges['end_x'] - edges['start_x']
-        height = edges['end_y'] - edges['start_y']
-
-        cols_estimate = width / (params['size_mm'] + step)
-        rows_estimate = height / (params['size_mm'] + step)
-
-        cols = int(cols_estimate) + 1
-        rows = int(rows_estimate) + 1
-        
-        return cols * rows
-    
-    def SplitIntoSections(self, coords: Dict[str, float], num_sections: int, element_diam: float,
-                           clearance: float = 0.0) -> List[Tuple[Tuple[float, float], Tuple[float, float]]]:
-        
-        x_min, y_min = coords['start_x'], coords['start_y']
-        x_max, y_max = coords['end_x'], coords['end_y']
-
-        width = x_max - x_min
-
-        elem_count = math.ceil(width / (element_diam + clearance))
-        n_for_section =  math.ceil(elem_count / num_sections)
-
-        start_x, start_y = x_min, y_min
-        sections = []
-        for i in range(num_sections):
-            temp = dict()
-            if i == num_sections-1:
-                temp = {
-                    'start_x': start_x,
-                    'start_y': start_y,
-                    'end_x': coords['end_x'],
-                    'end_y': coords['end_y']
-                }
-            else:
-                temp = {
-                    'start_x': start_x,
-                    'start_y': start_y,
-                    'end_x': start_x + (element_diam + clearance)*n_for_section,
-                    'end_y': coords['end_y']
-                }
-            sections.append(temp)
-            start_x = start_x + (element_diam + clearance)*(n_for_section - 1)
-
-        return sections
-    
-    def MakeShape(self, kind: str, diam: int, x, y):
-        shape = pcbnew.SHAPE_LINE_CHAIN()
-        if(kind == 'Круг' or kind == 'Circle'):
-            #Заполняется от element_diam = 0.6мм
-            radius = diam / 2
-            num_points = 12
-            for i in range(num_points):
-                angle = 2 * 3.1415926 * i / num_points
-                px = x + radius * math.cos(angle)
-                py = y + radius * math.sin(angle)
-                shape.Append(pcbnew.VECTOR2I(MkrToNm(px), MkrToNm(py)))
-        elif(kind == 'Квадрат' or kind == 'Square'):
-            #Заполняется от element_diam = 0.5мм
-            shape.Append(MkrToNm(x), MkrToNm(y))  # левый верхний
-            shape.Append(MkrToNm(x), MkrToNm(y + diam))  # правый верхний
-            shape.Append(MkrToNm(x + diam), MkrToNm(y + diam))  # правый нижний
-            shape.Append(MkrToNm(x + diam), MkrToNm(y))  # левый нижний
-            
-        shape.SetClosed(True)
-        return shape
-    
-    def FromPolyToShapeLineChain(self, poly):
-        chain = pcbnew.SHAPE_LINE_CHAIN()
-        coords = list(poly.exterior.coords)
-        
-        for x,y in coords:
-            chain.Append(pcbnew.VECTOR2I(int(MkrToNm(x)), int(MkrToNm(y))))
-            
-        return chain
-    
-    def StepFromDensity(self, density: int, side: float) -> float:
-        d = float(density)/100.0
-        step = side * ((1.0 - d)/ d)
-        return step
-    
-    def ProcessSection(self, edges: Dict, params: Dict, step, section_id,
-                        zones, outer, inner, masks, tracks, pads, vias):
-        """Обработка одной секции платы"""
-
-        shapes = []
-        total_shapes = 0
-        clipped_shapes = 0
-        clipper_total_time = 0
-        shape_creation_time = 0
-        row = 0
-
-        section_edges = Polygon([
-                (edges['start_x'], edges['start_y']),  # левый нижний
-                (edges['end_x'], edges['start_y']),    # правый нижний
-                (edges['end_x'], edges['end_y']),      # правый верхний
-                (edges['start_x'], edges['end_y']),    # левый верхний
-                (edges['start_x'], edges['start_y'])   # замыкаем (опционально)
-            ])
-
-        # Оценочное количество фигур в секции
-        estimated_shapes_in_section = 0
-        y = edges['start_y'] + params['shift_y']
-        while y < edges['end_y']:
-            x = edges['start_x'] + params['shift_x']
-                
-            while x < edges['end_x']:
-                estimated_shapes_in_section += 1
-                x += params['size_mm'] + step
-            y += params['size_mm'] + step
-            row += 1
-        
-        # Сбрасываем y для основного цикла
-        y = edges['start_y'] + params['shift_y']
-        row = 0
-        processed_shapes = 0
-        
-        while y < edges['end_y']:
-            x = edges['start_x'] + params['shift_x']
-
-            while x < edges['end_x']:
-                total_shapes += 1
-                processed_shapes += 1
-                
-                
-                # Замер времени создания формы
-                shape_start = time.time()
-                shape_outline = self.MakeShape(params['kind'], params['size_mm'], x, y)
-                shape_creation_time += time.time() - shape_start
-                # Замер времени клиппинга
-                clipper_start = time.time()
-                clipper = ShapeClipper(zones, section_edges, outer, inner, masks, tracks, pads, vias)
-                clipped = clipper.process_shape(shape_outline)
-                clipper_time = time.time() - clipper_start
-                clipper_total_time += clipper_time
-                if clipped is not None:
-                    clipped_shapes += 1
-                    if isinstance(clipped, MultiPolygon):
-                        for geom in clipped.geoms:
-                            shape_outline = self.FromPolyToShapeLineChain(geom)
-                            shapes.append(shape_outline)
-                    else:
-                        shape_outline = self.FromPolyToShapeLineChain(clipped)
-                        shapes.append(shape_outline)
-                
-                x += params['size_mm'] + step
-            y += params['size_mm'] + step
-            row += 1
-        
-        return {
-            'shapes': shapes,
-            'total_shapes': total_shapes,
-            'clipped_shapes': clipped_shapes,
-            'section_id': section_id,
-            'clipper_total_time': clipper_total_time,
-            'shape_creation_time': shape_creation_time
-        }
-    
     def _update_progress(self, progress_dialog, value, message=None):
         """Обновление прогресс-бара"""
         if message:
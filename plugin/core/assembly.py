@@ -0,0 +1,120 @@
+import numpy as np
+import pcbnew
+
+from .utils import SCALE, MkrToNm
+from .clipping import ExplodePolygons
+from .engines import PackPolygons, RingAreas
+
+# Поддерживает ли привязка конструктор SHAPE_LINE_CHAIN(std::vector<int>)
+_INT_VECTOR_CHAIN = None
+
+def _HasIntVectorChain() -> bool:
+    """Проверка конструктора контура из плоского списка x0, y0, x1, y1, ..."""
+    global _INT_VECTOR_CHAIN
+    if _INT_VECTOR_CHAIN is None:
+        try:
+            _INT_VECTOR_CHAIN = pcbnew.SHAPE_LINE_CHAIN([0, 0, 1, 0, 1, 1]).PointCount() == 3
+        except (TypeError, ValueError, NotImplementedError, RuntimeError):
+            _INT_VECTOR_CHAIN = False
+
+    return _INT_VECTOR_CHAIN
+
+def ChainFromNm(points: np.ndarray) -> pcbnew.SHAPE_LINE_CHAIN:
+    """Замкнутый SHAPE_LINE_CHAIN из вершин в нм (без повтора первой вершины)"""
+    if _HasIntVectorChain():
+        chain = pcbnew.SHAPE_LINE_CHAIN(points.ravel().tolist())
+    else:
+        chain = pcbnew.SHAPE_LINE_CHAIN()
+        for x, y in points.tolist():
+            chain.Append(x, y)
+    chain.SetClosed(True)
+
+    return chain
+
+def BuildPolySet(coords: np.ndarray, offsets: np.ndarray) -> pcbnew.SHAPE_POLY_SET:
+    """Набор контуров зоны из упакованных координат в мкм
+
+    Перевод в нм выполняется одним векторным действием; на каждый контур
+    приходится конструктор, SetClosed и AddOutline, а не вызов на вершину.
+    Кольца с отрицательной площадью (PackPolygons) добавляются отверстиями
+    предыдущего внешнего контура.
+
+    Args:
+        coords (np.ndarray): Координаты вершин (n, 2), мкм
+        offsets (np.ndarray): Смещения начала каждого кольца
+
+    Returns:
+        pcbnew.SHAPE_POLY_SET: Контуры и отверстия всех кусков
+    """
+    # Как int(MkrToNm(x)): отбрасывание дробной части
+    nm = np.trunc(coords * SCALE).astype(np.int64)
+    holes = (RingAreas(coords, offsets) < 0).tolist()
+    poly_set = pcbnew.SHAPE_POLY_SET()
+
+    index = -1
+    for start, end, hole in zip(offsets[:-1].tolist(), offsets[1:].tolist(), holes):
+        points = nm[start:end]
+        # Контур shapely повторяет первую вершину в конце
+        if end - start > 1 and (points[0] == points[-1]).all():
+            points = points[:-1]
+        if hole and index >= 0:
+            poly_set.AddHole(ChainFromNm(points), index)
+        else:
+            index = poly_set.AddOutline(ChainFromNm(points))
+
+    return poly_set
+
+def SetPrefilled(zone: pcbnew.ZONE, poly_set: pcbnew.SHAPE_POLY_SET):
+    """Запись готовых кусков в заливку зоны без ZONE_FILLER
+
+    Куски уже обрезаны с учетом зазоров. Заливка зоны не может содержать
+    отверстий, поэтому набор с отверстиями (элемент вокруг отверстия
+    платы) дробится на месте (Fracture), как это делает ZONE_FILLER.
+
+    Args:
+        zone (pcbnew.ZONE): Зона, добавленная на плату
+        poly_set (pcbnew.SHAPE_POLY_SET): Куски из BuildPolySet
+    """
+    if poly_set.HasHoles():
+        _Fracture(poly_set)
+    zone.SetFilledPolysList(zone.GetLayer(), poly_set)
+    zone.SetIsFilled(True)
+    zone.SetNeedRefill(False)
+
+def _Fracture(poly_set: pcbnew.SHAPE_POLY_SET):
+    """Fracture для KiCad 9 (без аргументов) и KiCad 8 (с режимом POLYGON_MODE)"""
+    try:
+        poly_set.Fracture()
+    except TypeError:
+        poly_set.Fracture(pcbnew.SHAPE_POLY_SET.PM_FAST)
+
+def FilledArea(zone: pcbnew.ZONE) -> float:
+    """Площадь заливки зоны на ее слое, мкм²"""
+    return zone.GetFilledPolysList(zone.GetLayer()).Area() / SCALE**2
+
+def BuildRegionPolySet(region) -> pcbnew.SHAPE_POLY_SET:
+    """Набор контуров зоны из полигонов shapely с отверстиями
+
+    Args:
+        region: Полигон(ы) области, мкм
+
+    Returns:
+        pcbnew.SHAPE_POLY_SET: Внешние контуры и отверстия
+    """
+    return BuildPolySet(*PackPolygons(ExplodePolygons([region])))
+
+def SetHatchFill(zone: pcbnew.ZONE, thickness: float, gap: float):
+    """Перевод зоны в режим штриховой заливки
+
+    Args:
+        zone (pcbnew.ZONE): Зона
+        thickness (float): Ширина линий штриховки, мкм
+        gap (float): Окно между линиями, мкм
+    """
+    thickness, gap = MkrToNm(thickness), MkrToNm(gap)
+
+    zone.SetFillMode(pcbnew.ZONE_FILL_MODE_HATCH_PATTERN)
+    zone.SetHatchThickness(thickness)
+    zone.SetHatchGap(gap)
+    # Минимальная ширина больше линии штриховки сделала бы заливку пустой
+    zone.SetMinThickness(min(zone.GetMinThickness(), thickness))
@@ -0,0 +1,134 @@
+import os
+import sys
+import shutil
+import tempfile
+import multiprocessing
+import numpy as np
+import shapely
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Optional
+
+from .clipping import ObstacleIndex
+from .kicad_pcb import ReadBoardIndex
+from .engines import FillTile, PackPolygons
+from .progress import FillProgress, NULL_PROGRESS
+from .tracing import Tracer, NULL_TRACER
+
+# Контур и препятствия платы в процессе-исполнителе (загружаются один раз)
+_SNAPSHOT = None
+# Канал прогресса и отмены, общий с основным процессом
+_PROGRESS = NULL_PROGRESS
+
+class GeometrySnapshot:
+    """Контур платы и препятствия в виде WKB в файле, отображаемом в память
+
+    Файл пишется один раз в основном процессе; исполнители подключают его
+    при старте, поэтому задачи плиток не несут геометрию при передаче.
+    """
+    def __init__(self, outer, obstacles: ObstacleIndex):
+        wkb = shapely.to_wkb(np.concatenate([[outer], obstacles.geoms]))
+        sizes = np.fromiter((len(w) for w in wkb), dtype=np.int64, count=len(wkb))
+        self.offsets = np.zeros(len(wkb) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=self.offsets[1:])
+
+        with tempfile.NamedTemporaryFile(prefix='copper_filler_', suffix='.wkb', delete=False) as f:
+            for w in wkb:
+                f.write(w)
+            self.path = f.name
+
+    def close(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+def _PythonExecutable() -> str:
+    """Интерпретатор для дочерних процессов
+
+    Внутри KiCad sys.executable указывает на сам KiCad, поэтому ищем python
+    рядом с ним, затем в PATH.
+    """
+    executable = sys.executable
+    if os.path.basename(executable).lower().startswith('python'):
+        return executable
+
+    for name in ('python.exe', 'python3', 'python'):
+        candidate = os.path.join(os.path.dirname(executable), name)
+        if os.path.isfile(candidate):
+            return candidate
+
+    return shutil.which('python3') or shutil.which('python') or executable
+
+def _AttachSnapshot(path: str, offsets: np.ndarray, progress: FillProgress = None):
+    """Инициализатор исполнителя: чтение снимка геометрии из отображаемого файла"""
+    global _SNAPSHOT, _PROGRESS
+    if progress is not None:
+        _PROGRESS = progress
+
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    geoms = shapely.from_wkb([data[offsets[i]:offsets[i + 1]].tobytes() for i in range(len(offsets) - 1)])
+    del data
+
+    _SNAPSHOT = (geoms[0], ObstacleIndex(geoms[1:]))
+
+def CreateProcessPool(num_workers: int, snapshot: GeometrySnapshot, progress: FillProgress = None) -> ProcessPoolExecutor:
+    """Пул процессов, каждый из которых подключает снимок геометрии при старте
+
+    Канал прогресса передается через инициализатор: разделяемые счетчик и
+    флаг отмены можно передать дочернему процессу только при его создании.
+    Они создаются здесь (FillProgress.share), после выбора интерпретатора:
+    запуск с потоками не создает примитивов multiprocessing.
+    """
+    context = multiprocessing.get_context('spawn')
+    context.set_executable(_PythonExecutable())
+    if progress is not None:
+        progress.share(context)
+
+    return ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=context,
+        initializer=_AttachSnapshot,
+        initargs=(snapshot.path, snapshot.offsets, progress)
+    )
+
+def _InitIndexWorker(lang: str):
+    """Инициализатор процесса чтения файла: локализация сообщений об ошибках"""
+    from ..locale import init_locale
+    init_locale(lang)
+
+def ReadBoardIndexAsync(board_file: str, max_error: float) -> Future:
+    """Чтение индекса из файла платы в отдельном процессе (ReadBoardIndex)
+
+    Разбор файла занимает интерпретатор целиком, как и pcbnew.LoadBoard,
+    поэтому поток не дал бы им идти одновременно. Процесс завершается
+    после единственной задачи, индекс возвращается в Future.
+    """
+    from ..locale import current_locale
+
+    context = multiprocessing.get_context('spawn')
+    context.set_executable(_PythonExecutable())
+    executor = ProcessPoolExecutor(max_workers=1, mp_context=context,
+                                   initializer=_InitIndexWorker, initargs=(current_locale(),))
+    future = executor.submit(ReadBoardIndex, board_file, max_error)
+    executor.shutdown(wait=False)
+
+    return future
+
+def FillTileTask(edges: Dict, params: Dict, step: float, section_id: int, trace_sample: Optional[int] = None) -> Dict:
+    """Задача процесса-исполнителя: заполнение плитки с упакованным результатом
+
+    Возвращает координаты контуров в плоских массивах, объекты pcbnew
+    создаются только в основном процессе. Если трассировка основного
+    процесса включена (trace_sample — ее sample_every, None — выключена),
+    интервалы плитки возвращаются в 'spans' для трассировки основного процесса.
+    """
+    outer, obstacles = _SNAPSHOT
+    tracer = Tracer(trace_sample) if trace_sample is not None else NULL_TRACER
+    with tracer.span('tile', section=section_id):
+        result = FillTile(edges, params, step, outer, obstacles, _PROGRESS, tracer)
+        result['coords'], result['offsets'] = PackPolygons(result.pop('pieces'))
+    result['section_id'] = section_id
+    result['spans'] = list(tracer.events)
+
+    return result
@@ -0,0 +1,49 @@
+import numpy as np
+import shapely
+
+from typing import Dict, Tuple
+
+from .clipping import MIN_AREA, ExplodePolygons
+from .grid import MakeCells
+from .progress import NULL_PROGRESS
+
+def ClipCellsBatch(template: np.ndarray, xs: np.ndarray, ys: np.ndarray, free, clipper=None,
+                   progress=NULL_PROGRESS) -> Tuple[np.ndarray, int, Dict]:
+    """Пакетная обрезка элементов сетки по свободной области
+
+    Элементы, целиком лежащие в свободной области, принимаются без булевых
+    операций; пересечение считается только для граничных элементов.
+
+    Args:
+        template (np.ndarray): Контур элемента (ElementTemplate)
+        xs (np.ndarray): Координаты столбцов
+        ys (np.ndarray): Координаты строк
+        free: Свободная область секции (BuildFreeRegion)
+        clipper (ShapeClipper, optional): Не используется, для единого интерфейса движков
+        progress (FillProgress, optional): Канал прогресса и отмены. Defaults to NULL_PROGRESS.
+
+    Returns:
+        Tuple[np.ndarray, int, Dict]: Полигоны-куски, количество добавленных элементов и статистика
+    """
+    progress.check()
+    cells = MakeCells(template, xs, ys)
+    if len(cells) == 0 or free is None or free.is_empty:
+        progress.advance(len(cells))
+        return np.empty(0, dtype=object), 0, {}
+
+    shapely.prepare(free)
+    inside = shapely.contains(free, cells)
+    border = ~inside & shapely.intersects(free, cells)
+
+    clipped = cells.copy()
+    clipped[border] = shapely.intersection(cells[border], free)
+    keep = (inside | border) & (shapely.area(clipped) >= MIN_AREA)
+
+    progress.advance(len(cells))
+
+    stats = {
+        'inside': int(np.count_nonzero(inside)),
+        'border': int(np.count_nonzero(border))
+    }
+
+    return ExplodePolygons(clipped[keep]), int(np.count_nonzero(keep)), stats
@@ -0,0 +1,82 @@
+import numpy as np
+
+from collections import defaultdict
+from typing import Dict, Optional
+
+# Ключ сквозных элементов (площадки и отверстия на всех медных слоях платы)
+THROUGH = 'through'
+
+class LayerItems:
+    """Примитивные данные элементов одного слоя (в мкм)
+
+    Attributes:
+        drawings (Dict[str, List]): Графика по видам, как в GetEdgeContours
+        segments (List[Tuple] | np.ndarray): Дорожки (x1, y1, x2, y2, ширина); после pack — массив (N, 5)
+        vias (List[Tuple] | np.ndarray): Переходные отверстия (x, y, радиус меди); после pack — массив (N, 3)
+        pads (List[List]): Эффективные полигоны площадок
+        zones (List[Tuple]): Зоны (имя, вершины контура)
+    """
+    def __init__(self):
+        self.drawings = {
+            'lines': [],
+            'squares': [],
+            'arcs': [],
+            'circles': [],
+            'polys': []
+        }
+        self.segments = []
+        self.vias = []
+        self.pads = []
+        self.zones = []
+
+class BoardIndex:
+    """Элементы платы, разложенные по целочисленным ID слоев за один обход
+
+    Заполняется один раз (IndexBoard); все получатели препятствий берут
+    данные отсюда, не обращаясь к плате. Сквозные площадки и отверстия
+    одинаковы на всех медных слоях и хранятся отдельно (through), их
+    геометрия строится один раз на все слои.
+    """
+    def __init__(self):
+        self.layer_ids = {}
+        self.layers = defaultdict(LayerItems)
+        self.through = LayerItems()
+
+    def layer_id(self, layer_name: str) -> Optional[int]:
+        return self.layer_ids.get(layer_name)
+
+    def items(self, layer) -> LayerItems:
+        """Элементы слоя по ID, имени или THROUGH (пустой набор для неизвестного слоя)"""
+        if layer == THROUGH:
+            return self.through
+        if isinstance(layer, str):
+            layer = self.layer_id(layer)
+        if layer is None or layer not in self.layers:
+            return LayerItems()
+
+        return self.layers[layer]
+
+    def counts(self) -> Dict[str, int]:
+        """Количество записей по видам элементов во всех слоях"""
+        result = defaultdict(int)
+        for items in list(self.layers.values()) + [self.through]:
+            result['drawings'] += sum(len(v) for v in items.drawings.values())
+            result['segments'] += len(items.segments)
+            result['vias'] += len(items.vias)
+            result['pads'] += len(items.pads)
+            result['zones'] += len(items.zones)
+
+        return dict(result)
+
+    def pack(self) -> 'BoardIndex':
+        """Дорожки и отверстия всех слоев в плотные массивы float (N, 5) и (N, 3)
+
+        Индекс, переданный из другого процесса, несет один массив на слой
+        вместо списка кортежей. Площадки и зоны остаются списками: число
+        вершин у них разное.
+        """
+        for items in list(self.layers.values()) + [self.through]:
+            items.segments = np.asarray(items.segments, dtype=float).reshape(-1, 5)
+            items.vias = np.asarray(items.vias, dtype=float).reshape(-1, 3)
+
+        return self
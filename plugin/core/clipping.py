@@ -1,13 +1,64 @@
 from shapely.geometry import Polygon
 from shapely.ops import unary_union
 
+import numpy as np
 import shapely
-from .utils import NmToMkr, MmToMkr
+from .utils import MmToMkr
+
+# Минимальная площадь элемента после обрезки, мкм²
+MIN_AREA = MmToMkr(0.25) * 1e3
+
+POLYGON_TYPE_ID = 3
+
+def ExplodePolygons(geoms) -> np.ndarray:
+    """Разбивает результаты обрезки на отдельные полигоны (без линий и точек касания)"""
+    parts = shapely.get_parts(np.asarray(geoms, dtype=object))
+    return parts[shapely.get_type_id(parts) == POLYGON_TYPE_ID]
+
+class ObstacleIndex:
+    """Препятствия как отдельные полигоны в пространственном индексе STRtree
+
+    Объединения из preprocessing разбиваются на связные части, поэтому
+    элемент обрезается только по тем частям, чей габарит он задевает.
+    """
+    def __init__(self, boundings):
+        parts = [shapely.get_parts(b) for b in boundings if b is not None and not b.is_empty]
+        self.geoms = np.concatenate(parts) if parts else np.empty(0, dtype=object)
+        self.tree = shapely.STRtree(self.geoms)
+
+    def __len__(self):
+        return len(self.geoms)
+
+    def query(self, shape) -> np.ndarray:
+        """Препятствия, габарит которых пересекает габарит фигуры"""
+        return self.geoms[self.tree.query(shape)]
+
+    def clip(self, section: Polygon) -> 'ObstacleIndex':
+        """Индекс только из препятствий секции, обрезанных по ее прямоугольнику"""
+        return ObstacleIndex(ExplodePolygons(shapely.intersection(self.query(section), section)))
+
+def BuildFreeRegion(section: Polygon, outer, obstacles: ObstacleIndex):
+    """Свободная для заполнения область секции
+
+    Args:
+        section (Polygon): Прямоугольник секции
+        outer: Внешний контур платы
+        obstacles (ObstacleIndex): Вырезы и препятствия (inner, zones, masks, tracks, pads, vias)
+
+    Returns:
+        Полигон(ы): пересечение секции с контуром платы за вычетом препятствий
+    """
+    free = shapely.intersection(section, outer)
+    blocked = obstacles.query(section)
+    if len(blocked):
+        free = shapely.difference(free, shapely.union_all(blocked))
+
+    return free
 
 class ShapeClipper:
-    def __init__(self, zone, outer, counters, inner, masks, tracks, pads, vias):
+    def __init__(self, outer, counters, obstacles: ObstacleIndex):
         self.outer = [outer, counters]
-        self.boundings = [inner, zone, masks, tracks, pads, vias]
+        self.obstacles = obstacles
 
     def clip_outside(self, shape: Polygon, outers):
         """
@@ -28,20 +79,19 @@ class ShapeClipper:
 
         return shape
 
-    def process_shape(self, shape):
-        shape_pts = Polygon(((NmToMkr(shape.CPoint(i).x), NmToMkr(shape.CPoint(i).y)) for i in range(shape.PointCount())))
-        s = shape_pts
+    def clip(self, s: Polygon):
         for out in self.outer:
             s = self.clip_outside(s, out)
             if s == None:
                 return None
-        
-        for bound in self.boundings:
+
+        # Без кандидатов в индексе элемент принимается без булевых операций
+        for bound in self.obstacles.query(s):
             s = self.clip_inside(s, bound)
             if s == None:
                 return None
         
-        if shapely.area(s)/1e3 <  MmToMkr(0.25):
+        if shapely.area(s) < MIN_AREA:
             return None
         
         return s
\ No newline at end of file
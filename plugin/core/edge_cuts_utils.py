@@ -1,5 +1,17 @@
 import math
-from typing import List, Tuple, Dict
+import logging
+from collections import defaultdict, deque
+from typing import List, Tuple, Dict, Optional
+
+from .tessellation import MAX_CHORD_ERROR, ArcPoints, CirclePoints
+
+logger = logging.getLogger('log')
+
+# Допуск совпадения концов отрезков Edge.Cuts, мкм: координаты усекаются до целых мкм (NmToMkr),
+# и концы, различающиеся в KiCad на 1 нм, расходятся до 1 мкм по каждой оси (до √2 мкм)
+CHAIN_TOLERANCE = 1.5
+# Сколько незамкнутых цепочек описывать в логе подробно
+UNCLOSED_LOG_LIMIT = 10
 
 def PolygonArea(points: List[Tuple]) -> float:
     """Расчет площади контура
@@ -17,17 +29,20 @@ def PolygonArea(points: List[Tuple]) -> float:
         area += x1*y2 - x2*y1
     return area / 2.0
 
-def InterpolateArc(start: Tuple, end: Tuple, center: Tuple, steps: int = 10) -> List[Tuple]:
+def InterpolateArc(start: Tuple, end: Tuple, center: Tuple, max_error: float = MAX_CHORD_ERROR) -> List[Tuple]:
     """Аппроксимация дуги набором точек
 
+    Число точек выбирается по допустимому отклонению хорды от дуги;
+    крайние точки совпадают с концами дуги.
+
     Args:
-        start (Tuple): _description_
-        end (Tuple): _description_
-        center (Tuple): _description_
-        steps (int, optional): _description_. Defaults to 10.
+        start (Tuple): Начало дуги
+        end (Tuple): Конец дуги
+        center (Tuple): Центр дуги
+        max_error (float, optional): Допустимое отклонение хорды, мкм. Defaults to MAX_CHORD_ERROR.
 
     Returns:
-        List[Tuple]: _description_
+        List[Tuple]: Точки дуги от start до end
     """
     (x1, y1), (x2, y2), (cx, cy) = start, end, center
     r = math.hypot(x1 - cx, y1 - cy)
@@ -37,16 +52,14 @@ def InterpolateArc(start: Tuple, end: Tuple, center: Tuple, steps: int = 10) ->
     #нормализация направления
     if a2 < a1:
         a2 += 2*math.pi
-    points = []
-    for i in range(steps+1):
-        a = a1 + (a2 - a1) * i / steps
-        x = cx + r*math.cos(a)
-        y = cy + r*math.sin(a)
-        points.append((round(x, 2), round(y, 2)))
+    points = [(round(x, 2), round(y, 2)) for x, y in ArcPoints((cx, cy), r, a1, a2 - a1, max_error).tolist()]
+    # Концы берутся из самой дуги, чтобы она стыковалась с соседними отрезками
+    points[0] = (round(x1, 2), round(y1, 2))
+    points[-1] = (round(x2, 2), round(y2, 2))
     
     return points
 
-def InterpolateCircle(center: Tuple[float, float], radius: Tuple[float, float], start_angle: float = 0.0, end_angle: float = 2*math.pi, steps: int = 32) -> List[Tuple[float, float]]:
+def InterpolateCircle(center: Tuple[float, float], radius: Tuple[float, float], start_angle: float = 0.0, end_angle: float = 2*math.pi, max_error: float = MAX_CHORD_ERROR) -> List[Tuple[float, float]]:
     """Аппроксимация по центру и радиусу для окружности (набор точек)
 
     Args:
@@ -54,32 +67,26 @@ def InterpolateCircle(center: Tuple[float, float], radius: Tuple[float, float],
         radius (Tuple[float, float]): Координаты радиуса окружности (крайняя точка окружности)
         start_angle (float, optional): Стартовый угол построения. Defaults to 0.0.
         end_angle (float, optional): Конечный угол построения. Defaults to 2*math.pi.
-        steps (int, optional): Количество точек. Defaults to 32.
+        max_error (float, optional): Допустимое отклонение хорды, мкм. Defaults to MAX_CHORD_ERROR.
 
     Returns:
         List[Tuple[float, float]]: Набор точек для окружности
     """
     cx, cy = center
     rx, ry = radius
-    rad = abs((cx - rx)**2 + (cy - ry)**2)
-    points = []
+    rad = math.hypot(cx - rx, cy - ry)
     
     if end_angle < start_angle:
         end_angle += 2*math.pi
     
     total_angle = end_angle - start_angle
     if abs(total_angle - 2*math.pi) < 1e-6:
-        steps_for_circle = steps
+        points = CirclePoints((cx, cy), rad, max_error).tolist()
+        points.append(points[0])
     else:
-        steps_for_circle = max(2, int(steps*total_angle / (2*math.pi)))
-        
-    for i in range(steps_for_circle + 1):
-        angle = start_angle + total_angle* i / steps_for_circle
-        x = cx + rad * math.cos(angle)
-        y = cy + rad * math.sin(angle)
-        points.append((round(x, 2), round(y, 2)))
+        points = ArcPoints((cx, cy), rad, start_angle, total_angle, max_error).tolist()
     
-    return points
+    return [(round(x, 2), round(y, 2)) for x, y in points]
 
 def BuildSquare(start: Tuple[float, float], end: Tuple[float, float]) -> List[Tuple]:
     (x1, y1), (x2, y2) = start, end
@@ -93,11 +100,92 @@ def BuildSquare(start: Tuple[float, float], end: Tuple[float, float]) -> List[Tu
     return points
     
 
-def BuildPolys(segments: List[Tuple], arcs: List[Tuple] = None, circles: List[Tuple] = None, squares: List[Tuple] = None, edges_poly: List[Tuple] = None) -> Dict[str, List[Tuple]]:
+class EndpointIndex:
+    """Концы отрезков в хэш-таблице по ячейкам размером в допуск
+
+    Точка ищется в своей и соседних ячейках, поэтому совпадение в пределах
+    допуска находится и на границе ячеек.
+    """
+    def __init__(self, segments: List[Tuple], tolerance: float):
+        self.segments = segments
+        self.cell = tolerance if tolerance > 0 else 1e-9
+        self.tolerance_sq = tolerance**2
+        self.used = [False]*len(segments)
+        self.buckets = defaultdict(list)
+        for i, segment in enumerate(segments):
+            for end in (0, 1):
+                self.buckets[self._key(segment[end])].append((i, end))
+
+    def _key(self, p: Tuple) -> Tuple[int, int]:
+        return (math.floor(p[0]/self.cell), math.floor(p[1]/self.cell))
+
+    def near(self, p: Tuple, q: Tuple) -> bool:
+        return (p[0] - q[0])**2 + (p[1] - q[1])**2 <= self.tolerance_sq
+
+    def take(self, p: Tuple) -> Optional[Tuple]:
+        """Другой конец неиспользованного отрезка, примыкающего к точке (отрезок помечается использованным)"""
+        kx, ky = self._key(p)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for i, end in self.buckets.get((kx + dx, ky + dy), ()):
+                    if not self.used[i] and self.near(self.segments[i][end], p):
+                        self.used[i] = True
+                        return self.segments[i][1 - end]
+        return None
+
+def ChainSegments(segments: List[Tuple], tolerance: float = CHAIN_TOLERANCE) -> Tuple[List, List]:
+    """Сборка отрезков в цепочки по совпадающим концам
+
+    Args:
+        segments (List[Tuple]): Отрезки ((x1, y1), (x2, y2))
+        tolerance (float, optional): Допуск совпадения концов. Defaults to CHAIN_TOLERANCE.
+
+    Returns:
+        Tuple[List, List]: Замкнутые контуры (первая точка повторена в конце) и незамкнутые цепочки
+    """
+    index = EndpointIndex(segments, tolerance)
+    closed = []
+    unclosed = []
+
+    def is_closed(chain) -> bool:
+        return len(chain) >= 4 and index.near(chain[0], chain[-1])
+
+    for start in range(len(segments)):
+        if index.used[start]:
+            continue
+        index.used[start] = True
+        chain = deque(segments[start])
+
+        # Наращиваем с конца, затем (если не замкнулась) с начала
+        while not is_closed(chain):
+            point = index.take(chain[-1])
+            if point is None:
+                break
+            chain.append(point)
+
+        while not is_closed(chain):
+            point = index.take(chain[0])
+            if point is None:
+                break
+            chain.appendleft(point)
+
+        if is_closed(chain):
+            chain[-1] = chain[0]
+            closed.append(list(chain))
+        else:
+            unclosed.append(list(chain))
+
+    return closed, unclosed
+
+def BuildPolys(segments: List[Tuple], arcs: List[Tuple] = None, circles: List[Tuple] = None, squares: List[Tuple] = None,
+               edges_poly: List[Tuple] = None, tolerance: float = CHAIN_TOLERANCE,
+               max_error: float = MAX_CHORD_ERROR) -> Dict[str, List[Tuple]]:
     """Собирает полигоны из сегментов, дуг, кругов
     Args:
         segments (List[Tuple]): Координаты сегментов (в основном линии)
         arcs (List[Tuple], optional): Координаты дуг. Defaults to None.
+        tolerance (float, optional): Допуск совпадения концов сегментов. Defaults to CHAIN_TOLERANCE.
+        max_error (float, optional): Допустимое отклонение хорды дуг и окружностей. Defaults to MAX_CHORD_ERROR.
 
     Returns:
         Dict[str, List[Tuple]]: Словарь с внешним полигоном и внутренними вырезами
@@ -113,43 +201,22 @@ def BuildPolys(segments: List[Tuple], arcs: List[Tuple] = None, circles: List[Tu
         
     if arcs:
         for x1, y1, x2, y2, c1, c2 in arcs:
-            arc_points = InterpolateArc(round_point((x1, y1)), round_point((x2, y2)), round_point((c1, c2)))
+            arc_points = InterpolateArc(round_point((x1, y1)), round_point((x2, y2)), round_point((c1, c2)), max_error)
             for i in range(len(arc_points) - 1):
                 all_segments.append((arc_points[i], arc_points[i + 1]))
                 
-    unused = all_segments[:]
-    polys = []
-
-    while unused:
-        seg = unused.pop(0)
-        poly = [seg[0], seg[1]]
-        extended = True
-        
-        while extended:
-            extended = False
-            for s in unused[:]:
-                if poly[-1] == s[0]:
-                    poly.append(s[1])
-                    unused.remove(s)
-                    extended = True
-                elif poly[-1] == s[1]:
-                    poly.append(s[0])
-                    unused.remove(s)
-                    extended = True
-                elif poly[0] == s[0]:
-                    poly.insert(0, s[1])
-                    unused.remove(s)
-                    extended = True
-                elif poly[0] == s[1]:
-                    poly.insert(0, s[0])
-                    unused.remove(s)
-                    extended = True
-        if poly[0] == poly[-1]:
-            polys.append(poly)
+    polys, unclosed = ChainSegments(all_segments, tolerance)
+
+    if unclosed:
+        # Незамкнутый контур не попадает в плату: сообщаем, где разрыв
+        logger.warning(_("Edge.Cuts: {count} unclosed chains (tolerance {tolerance} µm)").format(count=len(unclosed), tolerance=tolerance))
+        for chain in unclosed[:UNCLOSED_LOG_LIMIT]:
+            logger.warning(_("Edge.Cuts: unclosed chain of {count} segments from {start} to {end}").format(
+                count=len(chain) - 1, start=chain[0], end=chain[-1]))
     
     if circles:
         for circle in circles:
-            circle_points = InterpolateCircle(round_point((circle[0], circle[1])), round_point((circle[2], circle[3])))
+            circle_points = InterpolateCircle(round_point((circle[0], circle[1])), round_point((circle[2], circle[3])), max_error=max_error)
             polys.append(circle_points)
     
     if squares:
@@ -160,6 +227,9 @@ def BuildPolys(segments: List[Tuple], arcs: List[Tuple] = None, circles: List[Tu
     if edges_poly:
         for p in edges_poly:
             polys.append(p)
+
+    logger.info(_("Edge.Cuts: {count} contours, {vertices} vertices (max chord error {max_error} µm)").format(
+        count=len(polys), vertices=sum(len(p) for p in polys), max_error=max_error))
     
     return polys
 
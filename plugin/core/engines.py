@@ -0,0 +1,140 @@
+import numpy as np
+import shapely
+
+from functools import partial
+from typing import Dict, Iterable, Tuple
+
+from .clipping import ShapeClipper, ObstacleIndex, BuildFreeRegion
+from .grid import GridAxes, ElementTemplate
+from .tessellation import MAX_CHORD_ERROR
+from .loop import ClipCellsLoop
+from .batch import ClipCellsBatch
+from .quadtree import ClipCellsQuadtree
+from .raster import ClipCellsRaster, RASTER_RESOLUTION
+from .progress import NULL_PROGRESS
+from .tracing import NULL_TRACER, SampledClipper
+
+# Движки, обрабатывающие плитку целиком по сетке элементов
+GRID_ENGINES = {
+    'loop': ClipCellsLoop,
+    'batch': ClipCellsBatch,
+    'quadtree': ClipCellsQuadtree,
+    'raster': ClipCellsRaster
+}
+# Движки, читающие свободную область плитки (BuildFreeRegion); остальным она не строится
+FREE_REGION_ENGINES = {'batch', 'quadtree', 'raster'}
+
+def FillTile(edges: Dict, params: Dict, step: float, outer, obstacles: ObstacleIndex,
+             progress=NULL_PROGRESS, tracer=NULL_TRACER) -> Dict:
+    """Заполнение одной плитки движком из GRID_ENGINES (без обращений к pcbnew)
+
+    Args:
+        edges (Dict): Плитка из SplitIntoTiles
+        params (Dict): Параметры заполнения
+        step (float): Зазор между элементами
+        outer: Внешний контур платы
+        obstacles (ObstacleIndex): Вырезы и препятствия
+        progress (FillProgress, optional): Канал прогресса и отмены. Defaults to NULL_PROGRESS.
+        tracer (Tracer, optional): Трассировка этапов плитки. Defaults to NULL_TRACER.
+
+    Returns:
+        Dict: Полигоны-куски ('pieces'), счетчики, время и статистика движка
+    """
+    progress.check()
+
+    # Плитка видит только свою часть контура и препятствий (с запасом на элемент)
+    section_edges = shapely.box(*edges['clip'])
+    outer = shapely.intersection(outer, section_edges)
+    obstacles = obstacles.clip(section_edges)
+
+    # Замер времени создания сетки
+    with tracer.span('grid') as grid_span:
+        xs, ys = GridAxes(edges, params, step)
+        template = ElementTemplate(params['kind'], params['size_mm'], params.get('max_chord_error', MAX_CHORD_ERROR))
+
+    # Замер времени клиппинга
+    engine_name = params.get('engine', 'loop')
+    with tracer.span('clip', engine=engine_name) as clip_span:
+        # Объединение препятствий плитки нужно только движкам со свободной областью
+        free = BuildFreeRegion(section_edges, outer, obstacles) if engine_name in FREE_REGION_ENGINES else None
+        clipper = ShapeClipper(section_edges, outer, obstacles)
+        if tracer.sample_every:
+            # Замер отдельных элементов только по запросу: в горячем цикле нет лишних вызовов
+            clipper = SampledClipper(clipper, tracer)
+        engine = GRID_ENGINES[engine_name]
+        if engine_name == 'raster':
+            engine = partial(engine, resolution=params.get('raster_resolution', RASTER_RESOLUTION))
+        pieces, clipped_shapes, stats = engine(template, xs, ys, free, clipper, progress=progress)
+
+    return {
+        'pieces': pieces,
+        'total_shapes': len(xs) * len(ys),
+        'clipped_shapes': clipped_shapes,
+        'clipper_total_time': clip_span.duration,
+        'shape_creation_time': grid_span.duration,
+        'stats': stats
+    }
+
+def PackPolygons(pieces) -> Tuple[np.ndarray, np.ndarray]:
+    """Упаковка контуров полигонов (внешних и отверстий) в плоские массивы
+
+    Куски могут иметь отверстия (элемент вокруг отверстия платы), поэтому
+    пакуются все кольца: внешний контур против часовой стрелки, за ним
+    его отверстия по часовой (shapely.orient_polygons). Отверстие
+    отличается от контура знаком площади (RingAreas).
+
+    Args:
+        pieces: Массив полигонов
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Координаты вершин (n, 2) и смещения начала
+        каждого кольца
+    """
+    pieces = shapely.orient_polygons(np.asarray(pieces, dtype=object))
+    rings = shapely.get_rings(pieces)
+    coords = shapely.get_coordinates(rings)
+    counts = shapely.get_num_coordinates(rings)
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    return coords, offsets
+
+def RingAreas(coords: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Площади колец со знаком (формула шнурков): отрицательная у отверстий PackPolygons
+
+    Args:
+        coords (np.ndarray): Координаты вершин (n, 2), кольца замкнуты
+        offsets (np.ndarray): Смещения начала каждого кольца
+
+    Returns:
+        np.ndarray: Площадь каждого кольца
+    """
+    if len(offsets) < 2:
+        return np.empty(0, dtype=float)
+
+    x, y = coords[:, 0], coords[:, 1]
+    cross = np.zeros(len(coords), dtype=float)
+    cross[:-1] = x[:-1] * y[1:] - x[1:] * y[:-1]
+    # Пара из последней вершины кольца и первой вершины следующего не входит в сумму
+    cross[offsets[1:] - 1] = 0
+
+    return np.add.reduceat(cross, offsets[:-1]) / 2
+
+def ConcatPacked(parts: Iterable[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Объединение упакованных контуров нескольких плиток (PackPolygons)
+
+    Args:
+        parts (Iterable[Tuple[np.ndarray, np.ndarray]]): Пары (coords, offsets)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Общие координаты и смещения контуров
+    """
+    all_coords = [np.empty((0, 2), dtype=float)]
+    all_offsets = [np.zeros(1, dtype=np.int64)]
+    base = 0
+    for coords, offsets in parts:
+        all_coords.append(coords)
+        all_offsets.append(offsets[1:] + base)
+        base += len(coords)
+
+    return np.concatenate(all_coords), np.concatenate(all_offsets)
@@ -0,0 +1,159 @@
+import math
+import numpy as np
+import shapely
+
+from typing import Dict, List, Tuple
+
+from .utils import SCALE
+from .tessellation import MAX_CHORD_ERROR, CirclePoints
+
+CIRCLE_KINDS = ('Круг', 'Circle')
+SQUARE_KINDS = ('Квадрат', 'Square')
+
+# Размер плитки по умолчанию, элементов по каждой оси
+TILE_CELLS = 32
+
+def GridAxis(start: float, end: float, pitch: float) -> np.ndarray:
+    """Координаты узлов сетки вдоль одной оси
+
+    Повторяет накопление `x += pitch` из цикла заполнения: np.cumsum складывает
+    последовательно, поэтому координаты совпадают до последнего бита.
+
+    Args:
+        start (float): Первая координата
+        end (float): Граница (не включается)
+        pitch (float): Шаг сетки
+
+    Returns:
+        np.ndarray: Координаты узлов
+    """
+    if start >= end:
+        return np.empty(0, dtype=float)
+
+    count = int(math.ceil((end - start) / pitch)) + 1
+    axis = np.full(count, pitch, dtype=float)
+    axis[0] = start
+    axis = np.cumsum(axis)
+
+    return axis[axis < end]
+
+def GridAxes(edges: Dict, params: Dict, step: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Координаты столбцов и строк сетки элементов внутри секции
+
+    Args:
+        edges (Dict): Границы секции
+        params (Dict): Параметры заполнения
+        step (float): Зазор между элементами
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Координаты X столбцов и Y строк
+    """
+    pitch = params['size_mm'] + step
+    xs = GridAxis(edges['start_x'] + params['shift_x'], edges['end_x'], pitch)
+    ys = GridAxis(edges['start_y'] + params['shift_y'], edges['end_y'], pitch)
+
+    return xs, ys
+
+def CountCells(edges: Dict, params: Dict, step: float) -> int:
+    """Количество элементов сетки секции без ее построения
+
+    Args:
+        edges (Dict): Границы секции
+        params (Dict): Параметры заполнения
+        step (float): Зазор между элементами
+
+    Returns:
+        int: Число узлов сетки
+    """
+    pitch = params['size_mm'] + step
+    cols = max(0, int(math.ceil((edges['end_x'] - edges['start_x'] - params['shift_x']) / pitch)))
+    rows = max(0, int(math.ceil((edges['end_y'] - edges['start_y'] - params['shift_y']) / pitch)))
+
+    return cols * rows
+
+def ElementTemplate(kind: str, diam: float, max_error: float = MAX_CHORD_ERROR) -> np.ndarray:
+    """Контур элемента относительно точки привязки (x, y)
+
+    Args:
+        kind (str): Форма элемента
+        diam (float): Размер элемента
+        max_error (float, optional): Допустимое отклонение хорды круглого элемента. Defaults to MAX_CHORD_ERROR.
+
+    Returns:
+        np.ndarray: Массив смещений вершин формы (k, 2)
+    """
+    if kind in CIRCLE_KINDS:
+        return CirclePoints((0.0, 0.0), diam / 2, max_error)
+    elif kind in SQUARE_KINDS:
+        return np.array([(0.0, 0.0), (0.0, diam), (diam, diam), (diam, 0.0)])
+
+    raise ValueError(f"Unknown element kind: {kind}")
+
+def MakeCells(template: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """Массив полигонов всех элементов сетки (строки по Y, внутри — по X)
+
+    Координаты обрезаются до целых мкм так же, как при переводе
+    мкм -> нм -> мкм в SHAPE_LINE_CHAIN.
+
+    Args:
+        template (np.ndarray): Контур элемента из ElementTemplate
+        xs (np.ndarray): Координаты столбцов
+        ys (np.ndarray): Координаты строк
+
+    Returns:
+        np.ndarray: Массив shapely.Polygon
+    """
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    coords = np.empty((grid_x.size, len(template), 2), dtype=float)
+    coords[:, :, 0] = grid_x.reshape(-1, 1) + template[:, 0]
+    coords[:, :, 1] = grid_y.reshape(-1, 1) + template[:, 1]
+    coords = np.trunc(np.trunc(coords * SCALE) / SCALE)
+
+    return shapely.polygons(coords)
+
+def SplitIntoTiles(coords: Dict[str, float], params: Dict, step: float, tile_cells: int = TILE_CELLS) -> List[Dict]:
+    """Разбиение платы на квадратные плитки по tile_cells x tile_cells элементов
+
+    Каждый элемент сетки принадлежит ровно одной плитке: граница плитки
+    проходит посередине между узлами, поэтому элементы не дублируются.
+    Ключ 'clip' — габарит плитки, расширенный на размер элемента (и
+    ограниченный габаритом платы), по нему обрезаются препятствия плитки.
+
+    Args:
+        coords (Dict[str, float]): Габарит платы
+        params (Dict): Параметры заполнения
+        step (float): Зазор между элементами
+        tile_cells (int, optional): Размер плитки в элементах. Defaults to TILE_CELLS.
+
+    Returns:
+        List[Dict]: Плитки с ключами start_x, start_y, end_x, end_y, clip
+    """
+    pitch = params['size_mm'] + step
+    span = pitch * tile_cells
+    margin = params['size_mm']
+
+    def bands(start, end, shift):
+        count = max(1, int(math.ceil((end - start - shift) / span)))
+        result = []
+        for i in range(count):
+            band_end = end if i == count - 1 else start + shift + (span * (i + 1) - pitch / 2)
+            result.append((start + span * i, band_end))
+        return result
+
+    tiles = []
+    for start_y, end_y in bands(coords['start_y'], coords['end_y'], params['shift_y']):
+        for start_x, end_x in bands(coords['start_x'], coords['end_x'], params['shift_x']):
+            tiles.append({
+                'start_x': start_x,
+                'start_y': start_y,
+                'end_x': end_x,
+                'end_y': end_y,
+                'clip': (
+                    max(coords['start_x'], start_x - margin),
+                    max(coords['start_y'], start_y - margin),
+                    min(coords['end_x'], end_x + margin),
+                    min(coords['end_y'], end_y + margin)
+                )
+            })
+
+    return tiles
@@ -0,0 +1,28 @@
+import math
+
+from typing import Dict
+
+def HatchParameters(size: float, step: float) -> Dict[str, float]:
+    """Параметры штриховой заливки зоны для квадратной решетки элементов
+
+    Штриховка KiCad — сетка медных линий с квадратными окнами, то есть
+    обращение решетки отдельных квадратов. Шаг сетки берется равным шагу
+    решетки, а окно подбирается так, чтобы доля меди совпадала с долей
+    площади квадратов: (size / pitch)² = 1 - (gap / pitch)².
+
+    Args:
+        size (float): Сторона квадрата, мкм
+        step (float): Зазор между квадратами, мкм
+
+    Returns:
+        Dict[str, float]: Шаг сетки ('pitch'), ширина линии ('thickness')
+        и окно ('gap'), мкм
+    """
+    pitch = size + step
+    gap = math.sqrt(pitch**2 - size**2)
+
+    return {
+        'pitch': pitch,
+        'thickness': pitch - gap,
+        'gap': gap
+    }
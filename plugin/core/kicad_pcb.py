@@ -0,0 +1,459 @@
+import os
+import re
+import json
+import math
+import logging
+import numpy as np
+import shapely
+
+from typing import Iterator, List, Optional, Tuple
+
+from .board_index import BoardIndex
+from .utils import NmToMkr
+from .tessellation import MAX_CHORD_ERROR, ArcPoints, CirclePoints, BufferDistance
+
+logger = logging.getLogger('log')
+
+# Лексемы s-выражения: скобки, строки в кавычках и атомы
+_TOKEN = re.compile(r'\(|\)|"(?:[^"\\]|\\.)*"|[^\s()"]+')
+# Элементы верхнего уровня, нужные предобработке (остальные пропускаются без разбора)
+_TOP_ITEMS = {'layers', 'gr_line', 'gr_rect', 'gr_arc', 'gr_circle', 'gr_poly', 'segment', 'arc', 'via',
+              'footprint', 'module', 'zone'}
+# Вложенные элементы, которые не читаются (заливка зон, тексты и графика посадочных мест)
+_SKIP_ITEMS = {'filled_polygon', 'fill_segments', 'model', 'property', 'fp_text', 'fp_text_box', 'fp_line',
+               'fp_arc', 'fp_circle', 'fp_rect', 'fp_poly', 'fp_curve', 'zone_connect', 'net', 'uuid', 'tstamp',
+               'embedded_fonts', 'embedded_files', 'teardrops', 'tenting', 'attr', 'descr', 'tags', 'path'}
+
+def _Tokens(lines) -> Iterator[str]:
+    # Файл читается построчно: строки KiCad не содержат переводов строки
+    for line in lines:
+        yield from _TOKEN.findall(line)
+
+def _Atom(token: str) -> str:
+    if token[0] == '"':
+        return token[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+    return token
+
+def _Skip(tokens: Iterator[str]):
+    """Пропуск остатка списка (открывающая скобка уже прочитана)"""
+    depth = 1
+    for token in tokens:
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+            if depth == 0:
+                return
+
+def _Read(tokens: Iterator[str], head: str) -> List:
+    """Остаток списка [head, ...] с вложенными списками, кроме _SKIP_ITEMS"""
+    node = [head]
+    for token in tokens:
+        if token == '(':
+            child = _Atom(next(tokens))
+            if child in _SKIP_ITEMS:
+                _Skip(tokens)
+            else:
+                node.append(_Read(tokens, child))
+        elif token == ')':
+            return node
+        else:
+            node.append(_Atom(token))
+
+    return node
+
+def _Child(node: List, name: str) -> Optional[List]:
+    for item in node[1:]:
+        if isinstance(item, list) and item[0] == name:
+            return item
+    return None
+
+def _Children(node: List, name: str) -> List[List]:
+    return [item for item in node[1:] if isinstance(item, list) and item[0] == name]
+
+def _Nm(value: str) -> float:
+    """мм из файла в нм (как хранит KiCad)"""
+    return round(float(value) * 1e6)
+
+def _Point(node: List, name: str) -> Optional[Tuple[float, float]]:
+    item = _Child(node, name)
+    return (_Nm(item[1]), _Nm(item[2])) if item else None
+
+def _Mkr(point) -> Tuple[int, int]:
+    return (NmToMkr(point[0]), NmToMkr(point[1]))
+
+def _Pts(node: List) -> List[Tuple[float, float]]:
+    pts = _Child(node, 'pts')
+    return [(_Nm(xy[1]), _Nm(xy[2])) for xy in _Children(pts, 'xy')] if pts else []
+
+def _Rotate(points: np.ndarray, angle: float) -> np.ndarray:
+    """Поворот в координатах KiCad (ось Y вниз, положительный угол — против часовой стрелки на экране)"""
+    if not angle:
+        return points
+    a = math.radians(angle)
+    c, s = math.cos(a), math.sin(a)
+
+    return np.column_stack((points[:, 0] * c + points[:, 1] * s, -points[:, 0] * s + points[:, 1] * c))
+
+def _ArcCenter(start, mid, end) -> Optional[Tuple[float, float]]:
+    """Центр окружности через три точки (None для вырожденной дуги)"""
+    (ax, ay), (bx, by), (cx, cy) = start, mid, end
+    d = 2 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    if abs(d) < 1e-9:
+        return None
+    a2, b2, c2 = ax*ax + ay*ay, bx*bx + by*by, cx*cx + cy*cy
+
+    # Центр в целых нм, как его хранит KiCad
+    return (round((a2 * (by - cy) + b2 * (cy - ay) + c2 * (ay - by)) / d),
+            round((a2 * (cx - bx) + b2 * (ax - cx) + c2 * (bx - ax)) / d))
+
+def _ArcGeometry(node: List) -> Optional[Tuple]:
+    """Дуга (start, end, center) в нм с обходом от start к end по возрастанию угла, как в InterpolateArc"""
+    start, end = _Point(node, 'start'), _Point(node, 'end')
+    mid = _Point(node, 'mid')
+    if mid is None:
+        # Формат KiCad 5: start — центр, end — начало, angle — угол дуги
+        center, start = start, end
+        angle = math.radians(float(_Child(node, 'angle')[1]))
+        dx, dy = start[0] - center[0], start[1] - center[1]
+        end = (center[0] + dx * math.cos(angle) - dy * math.sin(angle), center[1] + dx * math.sin(angle) + dy * math.cos(angle))
+        mid = (center[0] + dx * math.cos(angle / 2) - dy * math.sin(angle / 2), center[1] + dx * math.sin(angle / 2) + dy * math.cos(angle / 2))
+    else:
+        center = _ArcCenter(start, mid, end)
+        if center is None:
+            return None
+
+    def angle_of(p):
+        return math.atan2(p[1] - center[1], p[0] - center[0])
+
+    a1, am, a2 = angle_of(start), angle_of(mid), angle_of(end)
+    sweep, to_mid = (a2 - a1) % (2*math.pi), (am - a1) % (2*math.pi)
+    if to_mid > sweep:
+        # Средняя точка лежит на другой стороне: дуга идет от end к start
+        start, end = end, start
+
+    return start, end, center
+
+def _ArcRecord(node: List) -> Optional[Tuple]:
+    """Дуга в формате набора контуров GetEdgeContours: start, end, center в мкм"""
+    arc = _ArcGeometry(node)
+    if arc is None:
+        return None
+    start, end, center = arc
+
+    return _Mkr(start) + _Mkr(end) + _Mkr(center)
+
+# Углы прямоугольной площадки в порядке обхода (ось Y вниз): знаки координат угла и начало дуги скругления, градусы
+_RECT_CORNERS = (('bottom_right', 1, 1, 0), ('bottom_left', -1, 1, 90), ('top_left', -1, -1, 180), ('top_right', 1, -1, 270))
+
+def _RectPadShape(w: float, h: float, r: float, chamfer: float, chamfered: List[str], error: float) -> np.ndarray:
+    """Прямоугольник со скругленными (радиус r) и срезанными (катет chamfer) углами, как строит KiCad"""
+    dx, dy = w / 2 - r, h / 2 - r
+    points = []
+    for name, sx, sy, start in _RECT_CORNERS:
+        a = math.radians(start)
+        if chamfer > 0 and name in chamfered:
+            # Фаска отсекает острый угол, скругление на нем не строится
+            px, py = sx * w / 2, sy * h / 2
+            points.append([(px - chamfer * math.cos(a + math.pi / 2), py - chamfer * math.sin(a + math.pi / 2)),
+                           (px - chamfer * math.cos(a), py - chamfer * math.sin(a))])
+        elif r > 0:
+            points.append(ArcPoints((sx * dx, sy * dy), r, a, math.pi / 2, error))
+        else:
+            points.append([(sx * w / 2, sy * h / 2)])
+
+    return np.concatenate([np.asarray(p, dtype=float) for p in points])
+
+def _PadShape(pad: List, max_error: float) -> np.ndarray:
+    """Контур площадки в ее собственных координатах, нм
+
+    Скругленные и овальные формы строятся с отклонением хорды max_error,
+    трапеция и фаски — как в KiCad. Произвольные площадки — _CustomPadShape.
+    """
+    kind = pad[3]
+    size = _Child(pad, 'size')
+    w, h = _Nm(size[1]), _Nm(size[2])
+    error = max_error * 1e3
+
+    if kind == 'circle':
+        points = CirclePoints((0, 0), w / 2, error)
+    elif kind == 'trapezoid':
+        # Углы как в PAD::BuildPadPolygon: rect_delta сужает одну сторону и расширяет противоположную
+        delta = _Child(pad, 'rect_delta')
+        ddx, ddy = (_Nm(delta[1]) / 2, _Nm(delta[2]) / 2) if delta else (0, 0)
+        points = np.array([(-w / 2 - ddy, h / 2 + ddx), (-w / 2 + ddy, -h / 2 - ddx),
+                           (w / 2 - ddy, -h / 2 + ddx), (w / 2 + ddy, h / 2 - ddx)])
+    elif kind in ('rect', 'roundrect', 'oval'):
+        if kind == 'oval':
+            r = min(w, h) / 2
+        else:
+            rratio = _Child(pad, 'roundrect_rratio')
+            r = min(w, h) * float(rratio[1]) if kind == 'roundrect' and rratio else 0
+        chamfer_ratio = _Child(pad, 'chamfer_ratio')
+        corners = _Child(pad, 'chamfer')
+        chamfer = min(w, h) * float(chamfer_ratio[1]) if chamfer_ratio and corners else 0
+        points = _RectPadShape(w, h, r, chamfer, corners[1:] if corners else [], error)
+    else:
+        points = np.array([(-w / 2, -h / 2), (w / 2, -h / 2), (w / 2, h / 2), (-w / 2, h / 2)])
+
+    if kind == 'custom':
+        points = _CustomPadShape(pad, points, error)
+
+    drill = _Child(pad, 'drill')
+    offset = _Child(drill, 'offset') if drill else None
+    if offset:
+        points = points + np.array([_Nm(offset[1]), _Nm(offset[2])])
+
+    return points
+
+def _Stroke(shape, width: float, error: float):
+    """Обводка шириной width: вершины скруглений на описанной окружности, обводка не тоньше меди"""
+    distance, quad_segs = BufferDistance(width / 2, error)
+
+    return shape.buffer(distance, quad_segs=quad_segs)
+
+def _CustomPadShape(pad: List, anchor: np.ndarray, error: float) -> np.ndarray:
+    """Произвольная площадка: якорь и примитивы, объединенные в один контур
+
+    Контур не меньше меди площадки: дуги разбиваются на хорды с
+    отклонением error и обводятся по описанной окружности (_Stroke),
+    многоугольник, прямоугольник и окружность с шириной линии — заливка
+    вместе с обводкой (без заливки тоже считаются залитыми), кривая Безье
+    заменяется выпуклой оболочкой опорных точек. Отверстия объединения
+    не учитываются, а примитивы, не сливающиеся с якорем в один контур,
+    заменяются выпуклой оболочкой объединения: в индексе площадка — один контур.
+    """
+    options = _Child(pad, 'options')
+    anchor_kind = _Child(options, 'anchor') if options else None
+    if anchor_kind and anchor_kind[1] == 'circle':
+        anchor = CirclePoints((0, 0), _Nm(_Child(pad, 'size')[1]) / 2, error)
+    shapes = [shapely.Polygon(anchor)]
+
+    primitives = _Child(pad, 'primitives')
+    for primitive in (primitives[1:] if primitives else []):
+        width_node = _Child(primitive, 'width')
+        width = _Nm(width_node[1]) if width_node else 0
+        if primitive[0] == 'gr_poly':
+            shape = shapely.Polygon(_Pts(primitive))
+        elif primitive[0] == 'gr_circle':
+            center, edge = _Point(primitive, 'center'), _Point(primitive, 'end')
+            radius = math.hypot(edge[0] - center[0], edge[1] - center[1])
+            # Окружность без ширины линии — залитый круг, описанный многоугольник
+            shape = _Stroke(shapely.Point(center), 2 * radius, error)
+        elif primitive[0] == 'gr_rect':
+            shape = shapely.box(*_Point(primitive, 'start'), *_Point(primitive, 'end'))
+        elif primitive[0] == 'gr_line':
+            shape = shapely.LineString([_Point(primitive, 'start'), _Point(primitive, 'end')])
+        elif primitive[0] == 'gr_arc':
+            arc = _ArcGeometry(primitive)
+            if arc is None:
+                continue
+            start, end, center = arc
+            a1 = math.atan2(start[1] - center[1], start[0] - center[0])
+            a2 = math.atan2(end[1] - center[1], end[0] - center[0])
+            radius = math.hypot(start[0] - center[0], start[1] - center[1])
+            shape = shapely.LineString(ArcPoints(center, radius, a1, (a2 - a1) % (2*math.pi), error))
+        elif primitive[0] == 'gr_curve':
+            shape = shapely.MultiPoint(_Pts(primitive)).convex_hull
+        else:
+            continue
+        shapes.append(_Stroke(shape, width, error) if width else shape)
+
+    union = shapely.union_all(shapes)
+    if union.geom_type != 'Polygon':
+        union = union.convex_hull
+
+    return np.asarray(union.exterior.coords)[:-1]
+
+def _Layers(names: List[str], copper: List[str]) -> List[str]:
+    """Раскрытие масок слоев (*.Cu, F&B.Cu, *.Mask)"""
+    layers = []
+    for name in names:
+        if name == '*.Cu':
+            layers += copper
+        elif name.startswith('*.'):
+            layers += ['F.' + name[2:], 'B.' + name[2:]]
+        elif name.startswith('F&B.'):
+            layers += ['F.' + name[4:], 'B.' + name[4:]]
+        else:
+            layers.append(name)
+
+    return list(dict.fromkeys(layers))
+
+def _ItemLayers(node: List, copper: List[str]) -> List[str]:
+    layers = _Child(node, 'layers')
+    if layers:
+        return _Layers(layers[1:], copper)
+    layer = _Child(node, 'layer')
+    return [layer[1]] if layer else []
+
+def _CopperOrder(name: str) -> int:
+    """Порядок медного слоя в стеке: F.Cu, In1.Cu, ..., B.Cu"""
+    if name == 'F.Cu':
+        return 0
+    if name == 'B.Cu':
+        return 1000
+    return int(name[2:-3]) if name[2:-3].isdigit() else 999
+
+class _BoardReader:
+    """Раскладка элементов верхнего уровня файла в BoardIndex (как IndexBoard)"""
+    def __init__(self, max_error: float):
+        self.index = BoardIndex()
+        self.max_error = max_error
+        self.copper = []
+
+    def layer(self, name: str):
+        if name not in self.index.layer_ids:
+            # Слой не из таблицы (старые файлы): отрицательный ID, чтобы не совпасть с таблицей
+            self.index.layer_ids[name] = -len(self.index.layer_ids) - 1
+        return self.index.layer_ids[name]
+
+    def copper_span(self, layers: List[str]) -> List[str]:
+        return [l for l in layers if l in self.copper]
+
+    def is_through(self, layers: List[str]) -> bool:
+        return bool(self.copper) and set(self.copper).issubset(layers)
+
+    def add(self, node: List):
+        kind = node[0]
+        if kind == 'layers':
+            for item in node[1:]:
+                self.index.layer_ids[item[1]] = int(item[0])
+            self.copper = sorted((name for name in self.index.layer_ids if name.endswith('.Cu')), key=_CopperOrder)
+        elif kind.startswith('gr_'):
+            self.add_drawing(node)
+        elif kind in ('segment', 'arc'):
+            # Как в IndexBoard: дуга дорожки учитывается отрезком между концами
+            layer = _Child(node, 'layer')[1]
+            self.index.layers[self.layer(layer)].segments.append(
+                _Mkr(_Point(node, 'start')) + _Mkr(_Point(node, 'end')) + (NmToMkr(_Nm(_Child(node, 'width')[1])),))
+        elif kind == 'via':
+            self.add_via(node)
+        elif kind in ('footprint', 'module'):
+            self.add_footprint(node)
+        elif kind == 'zone':
+            self.add_zone(node)
+
+    def add_drawing(self, node: List):
+        layer = _Child(node, 'layer')
+        if layer is None:
+            return
+        drawings = self.index.layers[self.layer(layer[1])].drawings
+        kind = node[0]
+        if kind == 'gr_line':
+            drawings['lines'].append(_Mkr(_Point(node, 'start')) + _Mkr(_Point(node, 'end')))
+        elif kind == 'gr_rect':
+            drawings['squares'].append(_Mkr(_Point(node, 'start')) + _Mkr(_Point(node, 'end')))
+        elif kind == 'gr_circle':
+            drawings['circles'].append(_Mkr(_Point(node, 'center')) + _Mkr(_Point(node, 'end')))
+        elif kind == 'gr_arc':
+            record = _ArcRecord(node)
+            if record is not None:
+                drawings['arcs'].append(record)
+        elif kind == 'gr_poly':
+            drawings['polys'].append([_Mkr(p) for p in _Pts(node)])
+
+    def add_via(self, node: List):
+        at = _Point(node, 'at')
+        size, drill = _Nm(_Child(node, 'size')[1]), _Nm(_Child(node, 'drill')[1])
+        # Как в IndexBoard: диаметр = отверстие + медь
+        circle = _Mkr(at) + (NmToMkr((drill + size) / 2.0),)
+        ends = self.copper_span(_ItemLayers(node, self.copper))
+        if len(ends) == 2 and self.copper:
+            # Слои отверстия — все медные слои между крайними
+            first, last = sorted(self.copper.index(l) for l in ends)
+            layers = self.copper[first:last + 1]
+        else:
+            layers = ends
+
+        if self.is_through(layers):
+            self.index.through.vias.append(circle)
+            return
+        for l in layers:
+            self.index.layers[self.layer(l)].vias.append(circle)
+
+    def add_footprint(self, node: List):
+        at = _Child(node, 'at')
+        origin = np.array([_Nm(at[1]), _Nm(at[2])])
+        angle = float(at[3]) if len(at) > 3 else 0.0
+
+        for pad in _Children(node, 'pad'):
+            layers = self.copper_span(_ItemLayers(pad, self.copper))
+            if not layers:
+                continue
+            pad_at = _Child(pad, 'at')
+            position = origin + _Rotate(np.array([[_Nm(pad_at[1]), _Nm(pad_at[2])]]), angle)[0]
+            # Угол площадки в файле уже включает поворот посадочного места
+            pad_angle = float(pad_at[3]) if len(pad_at) > 3 else 0.0
+            points = _Rotate(_PadShape(pad, self.max_error), pad_angle) + position
+            pad_poly = [(NmToMkr(x), NmToMkr(y)) for x, y in np.round(points).tolist()]
+
+            if self.is_through(layers):
+                self.index.through.pads.append(pad_poly)
+                continue
+            for l in layers:
+                self.index.layers[self.layer(l)].pads.append(pad_poly)
+
+    def add_zone(self, node: List):
+        name = _Child(node, 'name')
+        polygon = _Child(node, 'polygon')
+        if polygon is None:
+            return
+        outline = [_Mkr(p) for p in _Pts(polygon)]
+        for l in _ItemLayers(node, self.copper):
+            self.index.layers[self.layer(l)].zones.append((name[1] if name else '', outline))
+
+def ReadMaxError(board_file: str) -> Optional[float]:
+    """Max error платы (m_MaxError) из файла проекта рядом с .kicad_pcb, мкм
+
+    Returns:
+        Optional[float]: None, если проекта нет или значение не задано
+    """
+    project_file = os.path.splitext(board_file)[0] + '.kicad_pro'
+    try:
+        with open(project_file, 'r', encoding='utf-8') as f:
+            rules = json.load(f)['board']['design_settings']['rules']
+        max_error = float(rules['max_error']) * 1e3
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    return max_error if max_error > 0 else None
+
+def ReadBoardIndex(board_file: str, max_error: float = MAX_CHORD_ERROR) -> BoardIndex:
+    """Индекс элементов платы прямо из файла .kicad_pcb, без pcbnew
+
+    Файл читается потоком: разбираются только нужные предобработке
+    элементы верхнего уровня (графика, дорожки, отверстия, площадки
+    посадочных мест и контуры зон), каждый раскладывается в индекс и
+    отбрасывается. Заливка зон, тексты и модели пропускаются без
+    построения. Для сохраненной платы результат совпадает с IndexBoard
+    с точностью до отклонения хорды, кроме площадок:
+    - произвольные площадки строятся с запасом (_CustomPadShape);
+    - стек площадки KiCad 9 по слоям (padstack) не читается: на всех
+      слоях берется форма внешнего слоя из заголовка площадки.
+
+    Args:
+        board_file (str): Файл .kicad_pcb
+        max_error (float, optional): Отклонение хорды скругленных площадок, мкм. Defaults to MAX_CHORD_ERROR.
+
+    Returns:
+        BoardIndex: Примитивные данные элементов по слоям (дорожки и отверстия упакованы, BoardIndex.pack)
+    """
+    reader = _BoardReader(max_error)
+    with open(board_file, 'r', encoding='utf-8') as f:
+        tokens = _Tokens(f)
+        if next(tokens, None) != '(' or _Atom(next(tokens, '')) != 'kicad_pcb':
+            raise ValueError(_("Not a KiCad board file: {board_file}").format(board_file=board_file))
+
+        for token in tokens:
+            if token != '(':
+                continue
+            head = _Atom(next(tokens))
+            if head in _TOP_ITEMS:
+                reader.add(_Read(tokens, head))
+            else:
+                _Skip(tokens)
+
+    logger.info(_("Board file index: {counts}").format(counts=reader.index.counts()))
+
+    return reader.index.pack()
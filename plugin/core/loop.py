@@ -0,0 +1,42 @@
+import numpy as np
+
+from typing import Dict, Tuple
+
+from .clipping import ExplodePolygons
+from .grid import MakeCells
+from .progress import NULL_PROGRESS
+
+def ClipCellsLoop(template: np.ndarray, xs: np.ndarray, ys: np.ndarray, free, clipper,
+                  progress=NULL_PROGRESS) -> Tuple[np.ndarray, int, Dict]:
+    """Поэлементная обрезка через ShapeClipper (эталонный движок)
+
+    Элементы строки получаются переносом шаблона ElementTemplate, без
+    построения контуров pcbnew; каждый элемент обрезается отдельно.
+
+    Args:
+        template (np.ndarray): Контур элемента (ElementTemplate)
+        xs (np.ndarray): Координаты столбцов
+        ys (np.ndarray): Координаты строк
+        free: Не используется (None, FillTile ее не строит), для единого интерфейса движков
+        clipper (ShapeClipper): Обрезка элементов
+        progress (FillProgress, optional): Канал прогресса и отмены. Defaults to NULL_PROGRESS.
+
+    Returns:
+        Tuple[np.ndarray, int, Dict]: Полигоны-куски, количество добавленных элементов и статистика
+    """
+    pieces = []
+    clipped_shapes = 0
+    for y in ys:
+        # Отмена проверяется на каждой строке
+        progress.check()
+        for cell in MakeCells(template, xs, np.array([y])):
+            clipped = clipper.clip(cell)
+            if clipped is not None:
+                clipped_shapes += 1
+                pieces.append(ExplodePolygons([clipped]))
+        progress.advance(len(xs))
+
+    if not pieces:
+        return np.empty(0, dtype=object), 0, {}
+
+    return np.concatenate(pieces), clipped_shapes, {}
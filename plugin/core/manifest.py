@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import logging
+import multiprocessing
+import psutil
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List
+
+from .backend import _PythonExecutable
+from .settings import LoadSettings
+
+logger = logging.getLogger('log')
+
+# Поля записи платы, не относящиеся к настройкам заполнения
+JOB_FIELDS = ('board', 'save_as', 'settings')
+
+def _ReadManifest(path: str) -> Dict:
+    if os.path.splitext(path)[1].lower() != '.toml':
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    try:
+        import tomllib
+    except ImportError:
+        # До Python 3.11 TOML читается сторонним tomli
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise ImportError(_("TOML manifest requires Python 3.11+ or the tomli package, use JSON instead"))
+    with open(path, 'rb') as f:
+        return tomllib.load(f)
+
+def LoadManifest(path: str) -> List[Dict]:
+    """Задания из манифеста (JSON или TOML)
+
+    Манифест содержит общие настройки defaults и список плат boards. Запись
+    платы: файл board, необязательные save_as и settings (путь к
+    settings.json) и любые поля настроек в схеме GetValues (layers, kind,
+    size_mm, density, ...). Настройки собираются по возрастанию приоритета:
+    defaults, settings.json, поля записи. Пути считаются от папки манифеста;
+    trace = true пишет трассировку каждой платы рядом с сохраненной платой.
+
+    Args:
+        path (str): Файл манифеста (.json или .toml)
+
+    Returns:
+        List[Dict]: Задания {'board', 'save_as', 'settings'} с абсолютными путями
+    """
+    manifest = _ReadManifest(path)
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    def resolve(p):
+        return os.path.normpath(os.path.join(base_dir, p)) if p else None
+
+    defaults = manifest.get('defaults', {})
+    jobs = []
+    for i, entry in enumerate(manifest.get('boards', [])):
+        board = entry.get('board')
+        if not board:
+            raise ValueError(_("Manifest entry {i}: no board file").format(i=i))
+
+        settings = {key: value for key, value in defaults.items() if key not in JOB_FIELDS}
+        settings.update(LoadSettings(resolve(entry.get('settings', defaults.get('settings')))))
+        settings.update({key: value for key, value in entry.items() if key not in JOB_FIELDS})
+        if entry.get('layers'):
+            settings.pop('layer_name', None)
+        save_as = resolve(entry.get('save_as'))
+        if settings.get('trace') is True:
+            # Трассировка каждой платы — рядом с сохраненной платой
+            settings['trace'] = os.path.splitext(save_as or resolve(board))[0] + '.trace.json'
+        elif isinstance(settings.get('trace'), str):
+            settings['trace'] = resolve(settings['trace'])
+
+        jobs.append({
+            'board': resolve(board),
+            'save_as': save_as,
+            'settings': settings
+        })
+
+    return jobs
+
+def _InitJobWorker(lang: str, level: int):
+    """Инициализатор исполнителя: локализация и вывод лога в stderr"""
+    from ..locale import init_locale
+    init_locale(lang)
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('[%(asctime)s] %(processName)s %(levelname)s : %(message)s', datefmt='%H:%M:%S'))
+    handler.setLevel(level)
+    logger.handlers.clear()
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+
+def FillBoardJob(job: Dict) -> Dict:
+    """Задача процесса-исполнителя: своя плата pcbnew, заполнение и сохранение
+
+    Ошибка платы не прерывает пакет: она возвращается в сводке задания.
+    """
+    # pcbnew загружается только в исполнителях
+    from .pipeline import FillBoard
+
+    result = {'board': job['board'], 'save_as': job['save_as'] or job['board'], 'pid': os.getpid()}
+    start_time = time.time()
+    try:
+        summary = FillBoard(job['board'], job['settings'], job['save_as'])
+        summary.pop('board', None)
+        result.update(summary)
+        result['status'] = 'ok'
+    except Exception as e:
+        logger.error(_("{board}: {e}").format(board=job['board'], e=str(e)))
+        result['status'] = 'error'
+        result['error'] = str(e)
+    result['wall_time'] = time.time() - start_time
+
+    return result
+
+def _JobError(job: Dict, error: str) -> Dict:
+    return {'board': job['board'], 'save_as': job['save_as'] or job['board'], 'status': 'error', 'error': error}
+
+def _CreateJobPool(workers: int, lang: str, level: int) -> ProcessPoolExecutor:
+    context = multiprocessing.get_context('spawn')
+    context.set_executable(_PythonExecutable())
+
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                               initializer=_InitJobWorker, initargs=(lang, level))
+
+def _RunJobs(jobs: List[Dict], indices: List[int], results: List, workers: int, lang: str, level: int,
+             task: Callable) -> List[int]:
+    """Задания indices в общем пуле; номера заданий, не завершенных из-за падения процесса пула"""
+    broken = []
+    with _CreateJobPool(workers, lang, level) as executor:
+        futures = {executor.submit(task, jobs[i]): i for i in indices}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except BrokenProcessPool:
+                # Упавший процесс ломает весь пул: виновник среди незавершенных заданий неизвестен
+                broken.append(i)
+                continue
+            except Exception as e:
+                results[i] = _JobError(jobs[i], repr(e))
+            logger.info(_("{board}: {status}").format(**results[i]))
+
+    return sorted(broken)
+
+def _RunIsolatedJob(job: Dict, lang: str, level: int, task: Callable) -> Dict:
+    """Задание в собственном процессе: его падение не затрагивает другие задания"""
+    try:
+        with _CreateJobPool(1, lang, level) as executor:
+            return executor.submit(task, job).result()
+    except BrokenProcessPool:
+        return _JobError(job, _("worker process crashed"))
+    except Exception as e:
+        return _JobError(job, repr(e))
+
+def RunManifest(jobs: List[Dict], workers: int = None, lang: str = 'English', level: int = logging.INFO,
+                task: Callable = FillBoardJob) -> Dict:
+    """Параллельное заполнение плат манифеста в пуле процессов
+
+    Каждый исполнитель загружает свою плату pcbnew; внутри задания RunFill
+    по-прежнему строит препятствия слоев в потоках, поэтому число процессов
+    по умолчанию — число физических ядер, деленное на число слоев самого
+    многослойного задания.
+
+    Падение процесса (segfault или нехватка памяти в pcbnew/GEOS) ломает
+    общий пул, и все незавершенные задания получают BrokenProcessPool.
+    Такие задания перезапускаются каждое в своем процессе: ошибкой
+    отмечается только плата, на которой процесс падает снова.
+
+    Args:
+        jobs (List[Dict]): Задания (LoadManifest)
+        workers (int, optional): Число процессов. Defaults to None.
+        lang (str, optional): Язык сообщений исполнителей (init_locale). Defaults to 'English'.
+        level (int, optional): Уровень лога исполнителей в stderr. Defaults to logging.INFO.
+        task (Callable, optional): Задание исполнителя. Defaults to FillBoardJob.
+
+    Returns:
+        Dict: Сводки заданий в порядке манифеста и общее время
+    """
+    if workers is None:
+        max_layers = max([len(job['settings'].get('layers') or [None]) for job in jobs] or [1])
+        workers = max(1, int(psutil.cpu_count(logical=False) or 1) // max_layers)
+    workers = max(1, min(workers, len(jobs)))
+    logger.info(_("Manifest: {jobs} boards, {workers} processes").format(jobs=len(jobs), workers=workers))
+
+    start_time = time.time()
+    results = [None] * len(jobs)
+    broken = _RunJobs(jobs, list(range(len(jobs))), results, workers, lang, level, task)
+    if broken:
+        logger.warning(_("Worker process crashed, {count} boards are restarted one per process").format(count=len(broken)))
+        with ThreadPoolExecutor(max_workers=min(workers, len(broken))) as isolated:
+            futures = {isolated.submit(_RunIsolatedJob, jobs[i], lang, level, task): i for i in broken}
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                logger.info(_("{board}: {status}").format(**results[i]))
+
+    failed = sum(1 for result in results if result['status'] != 'ok')
+
+    return {
+        'jobs': results,
+        'boards': len(jobs),
+        'failed': failed,
+        'workers': workers,
+        'total_time': time.time() - start_time
+    }
@@ -0,0 +1,50 @@
+import threading
+import psutil
+
+class RssPeak:
+    """Пиковый резидентный объем памяти процесса за время блока with
+
+    Фоновый поток опрашивает RSS с периодом interval; пик включает и
+    память GEOS, которую не видит tracemalloc.
+
+    Attributes:
+        start (int): RSS при входе, байт
+        peak (int): Наибольший RSS за время блока, байт
+    """
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.start = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = self.process.memory_info().rss
+        if rss > self.peak:
+            self.peak = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> 'RssPeak':
+        self.start = self.peak = self.process.memory_info().rss
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='rss-peak', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+    @property
+    def peak_mb(self) -> float:
+        return self.peak / 2**20
+
+    @property
+    def growth_mb(self) -> float:
+        return (self.peak - self.start) / 2**20
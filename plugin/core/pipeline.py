@@ -0,0 +1,691 @@
+import time
+import logging
+import threading
+import psutil
+import shapely
+import pcbnew
+
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import nullcontext
+from typing import Callable, Dict, List
+
+from shapely.geometry import Polygon, box
+from shapely.ops import unary_union, transform
+
+from .utils import NmToMkr, RoundCoordsTransform
+from .board_index import BoardIndex, THROUGH
+from .preprocessing import (IndexBoard, GetEdgeContours, ZoneOutlines, BuildZones, MaskPolys, BuildMasks,
+                            TrackSegments, BuildTracks, PadPolys, BuildPads, ViaCircles, BuildVias)
+from .edge_cuts_utils import BuildPolys, GetType, CHAIN_TOLERANCE
+from .clipping import ObstacleIndex, BuildFreeRegion
+from .grid import SplitIntoTiles, CountCells, ElementTemplate, TILE_CELLS, SQUARE_KINDS
+from .engines import FillTile, PackPolygons, ConcatPacked
+from .backend import GeometrySnapshot, CreateProcessPool, FillTileTask, ReadBoardIndexAsync
+from .progress import FillProgress, NULL_PROGRESS
+from .assembly import BuildPolySet, BuildRegionPolySet, SetPrefilled, SetHatchFill, FilledArea
+from .hatch import HatchParameters
+from .tile_cache import TileCache, TileCachePath, TileFingerprint
+from .snapshot import SnapshotCache, ContentKey
+from .tessellation import MAX_CHORD_ERROR, BufferDistance
+from .settings import BoardClasses, SettingsToMkr
+from .kicad_pcb import ReadBoardIndex, ReadMaxError
+from .tracing import Tracer, NULL_TRACER
+from .memory import RssPeak
+from .telemetry import ResourceSampler, AnnotateSamples, SummarizeSamples, TELEMETRY_INTERVAL
+
+logger = logging.getLogger('log')
+
+def NoReport(value: int, message: str = None):
+    """Отчет о ходе работы без интерфейса"""
+    pass
+
+def StepFromDensity(density: int, side: float) -> float:
+    d = float(density)/100.0
+    step = side * ((1.0 - d)/ d)
+    return step
+
+def FillLayers(params: Dict) -> List[str]:
+    """Слои заполнения из настроек ('layers' или прежний 'layer_name')"""
+    layers = params.get('layers') or [params['layer_name']]
+
+    return list(dict.fromkeys(layers))
+
+def BuildSharedObstacles(index: BoardIndex, board_margin, clearance, snapshot_cache: SnapshotCache,
+                         chain_tolerance: float = CHAIN_TOLERANCE, max_error: float = MAX_CHORD_ERROR,
+                         tracer=NULL_TRACER, workers: int = None) -> Dict:
+    """Препятствия, общие для всех слоев: контур платы, вырезы, сквозные площадки и отверстия
+
+    workers — потоки каждого объединения (PartitionedUnion), по умолчанию физические ядра
+
+    Returns:
+        Dict: outer, inner, pads, vias и время этапов
+    """
+    edges = GetEdgeContours(index, 'Edge.Cuts')
+
+    def build_edges():
+        edge_cuts = BuildPolys(edges['lines'], edges['arcs'], edges['circles'], edges['squares'], edges['polys'], chain_tolerance, max_error)
+        outer, inner = GetType(edge_cuts)
+        distance, quad_segs = BufferDistance(board_margin, max_error)
+        outer = transform(RoundCoordsTransform, Polygon(outer).buffer(-distance, quad_segs))
+        inner = unary_union([transform(RoundCoordsTransform, Polygon(inner_poly).buffer(distance, quad_segs)) for inner_poly in inner])
+        return [outer, inner]
+
+    with tracer.span('edges', 'preprocessing') as edges_span:
+        outer, inner = snapshot_cache.get_or_build('edges', ContentKey(edges, board_margin, chain_tolerance, max_error), build_edges)
+    logger.info(_("Get Edge_Cuts: {edge_time:.3f} sec").format(edge_time=edges_span.duration))
+
+    with tracer.span('pads', 'preprocessing', layer=THROUGH) as pads_span:
+        pad_polys = PadPolys(index, THROUGH)
+        pads, = snapshot_cache.get_or_build('pads-through', ContentKey(pad_polys, clearance, max_error),
+                                            lambda: [BuildPads(pad_polys, clearance, max_error, workers)])
+    logger.info(_("Get through pads: {pads_time:.3f} sec").format(pads_time=pads_span.duration))
+
+    with tracer.span('vias', 'preprocessing', layer=THROUGH) as vias_span:
+        circles = ViaCircles(index, THROUGH)
+        vias, = snapshot_cache.get_or_build('vias-through', ContentKey(circles, clearance, max_error),
+                                            lambda: [BuildVias(circles, clearance, max_error, workers)])
+    logger.info(_("Get through vias: {vias_time:.3f} sec").format(vias_time=vias_span.duration))
+
+    return {
+        'outer': outer,
+        'inner': inner,
+        'pads': pads,
+        'vias': vias,
+        'times': {'edges': edges_span.duration, 'pads': pads_span.duration, 'vias': vias_span.duration}
+    }
+
+def BuildLayerObstacles(index: BoardIndex, layer_name: str, board_margin, clearance, snapshot_cache: SnapshotCache,
+                        max_error: float = MAX_CHORD_ERROR, tracer=NULL_TRACER, workers: int = None) -> Dict:
+    """Препятствия одного слоя: зоны, маски, дорожки, площадки и отверстия слоя
+
+    workers — потоки каждого объединения (PartitionedUnion), по умолчанию физические ядра
+
+    Returns:
+        Dict: zones, masks, tracks, pads, vias и время этапов
+    """
+    times = {}
+
+    with tracer.span('zones', 'preprocessing', layer=layer_name) as span:
+        outlines = ZoneOutlines(index, layer_name)
+        zones, = snapshot_cache.get_or_build(f'zones-{layer_name}', ContentKey(outlines, board_margin, max_error),
+                                             lambda: [BuildZones(outlines, board_margin, max_error, workers)])
+    times['zones'] = span.duration
+
+    with tracer.span('masks', 'preprocessing', layer=layer_name) as span:
+        mask_polys = MaskPolys(index, layer_name)
+        masks, = snapshot_cache.get_or_build(f'masks-{layer_name}', ContentKey(mask_polys, board_margin, max_error),
+                                             lambda: [BuildMasks(mask_polys, board_margin, max_error, workers)])
+    times['masks'] = span.duration
+
+    with tracer.span('tracks', 'preprocessing', layer=layer_name) as span:
+        segments = TrackSegments(index, layer_name)
+        tracks, = snapshot_cache.get_or_build(f'tracks-{layer_name}', ContentKey(segments, clearance, max_error),
+                                              lambda: [BuildTracks(segments, clearance, max_error, workers)])
+    times['tracks'] = span.duration
+
+    with tracer.span('pads', 'preprocessing', layer=layer_name) as span:
+        pad_polys = PadPolys(index, layer_name)
+        pads, = snapshot_cache.get_or_build(f'pads-{layer_name}', ContentKey(pad_polys, clearance, max_error),
+                                            lambda: [BuildPads(pad_polys, clearance, max_error, workers)])
+    times['pads'] = span.duration
+
+    with tracer.span('vias', 'preprocessing', layer=layer_name) as span:
+        circles = ViaCircles(index, layer_name)
+        vias, = snapshot_cache.get_or_build(f'vias-{layer_name}', ContentKey(circles, clearance, max_error),
+                                            lambda: [BuildVias(circles, clearance, max_error, workers)])
+    times['vias'] = span.duration
+
+    logger.info(_("Layer {layer_name} obstacles: zones {zones:.3f} sec, masks {masks:.3f} sec, tracks {tracks:.3f} sec, pads {pads:.3f} sec, vias {vias:.3f} sec").format(
+        layer_name=layer_name, **times))
+
+    return {
+        'zones': zones,
+        'masks': masks,
+        'tracks': tracks,
+        'pads': pads,
+        'vias': vias,
+        'times': times
+    }
+
+def ProcessSectionGrid(edges: Dict, params: Dict, step, section_id,
+                    outer, obstacles: ObstacleIndex, progress=NULL_PROGRESS, tracer=NULL_TRACER):
+    """Обработка одной плитки платы движком из GRID_ENGINES
+
+    Куски возвращаются упакованными (PackPolygons), контуры pcbnew
+    собираются один раз после завершения всех плиток.
+    """
+
+    with tracer.span('tile', section=section_id):
+        result = FillTile(edges, params, step, outer, obstacles, progress, tracer)
+        result['coords'], result['offsets'] = PackPolygons(result.pop('pieces'))
+    result['section_id'] = section_id
+
+    logger.debug(_("Tile {section_id} {engine} stats: {stats}").format(
+        section_id=section_id, engine=params.get('engine', 'loop'), stats=result['stats']))
+
+    return result
+
+def FillSections(main_zone_edges: Dict, params: Dict, step: float, outer, obstacles: ObstacleIndex,
+                 start_fill_loop: float, cache_path: str = None, report: Callable = NoReport,
+                 progress_range=(50, 90), tracer=NULL_TRACER) -> Dict:
+    """Заполнение платы по плиткам в пуле потоков или процессов
+
+    При заданном cache_path плитки с неизменным отпечатком входных
+    данных берутся из кэша прошлого запуска, пересчитываются остальные.
+
+    Args:
+        start_fill_loop (float): Начало заполнения слоя (time.perf_counter) для оценки скорости
+        report (Callable): Отчет о ходе работы report(value, message);
+            исключение InterruptedError из него отменяет заполнение
+        progress_range: Диапазон значений прогресса для этого заполнения
+        tracer (Tracer, optional): Трассировка плиток. Defaults to NULL_TRACER.
+
+    Returns:
+        Dict: Упакованные куски плиток ('packed') и суммарные счетчики
+    """
+    total_shapes = 0
+    clipped_shapes = 0
+    clipper_total_time = []
+    shape_creation_time = 0
+    progress_start, progress_end = progress_range
+
+    num_threads = max(1, min(10, int(psutil.cpu_count(logical=False))))
+    logger.info(_("Proccessing Threads Count: {num_threads}").format(num_threads=num_threads))
+
+    # Разделяем на плитки: свободные потоки забирают их из общей очереди пула
+    sections = SplitIntoTiles(main_zone_edges, params, step, params.get('tile_cells', TILE_CELLS))
+    num_sections = len(sections)
+    logger.info(_("Tiles count: {num_sections}").format(num_sections=num_sections))
+
+    total_estimated_shapes = sum(CountCells(section, params, step) for section in sections)
+    logger.info(_("Pre-count shape: {total_estimated_shapes}").format(total_estimated_shapes=total_estimated_shapes))
+
+    completed_sections = 0
+
+    report(progress_start, _("Start copper filling..."))
+
+    process_section = ProcessSectionGrid
+
+    # Исполнители сообщают об обработанных элементах и проверяют отмену на каждой строке
+    progress = FillProgress()
+    packed = []
+
+    # Плитки с неизменными препятствиями и параметрами берутся из кэша
+    cache = None
+    fingerprints = []
+    pending_sections = list(enumerate(sections))
+    if cache_path is not None:
+        with tracer.span('tile-cache') as cache_span:
+            cache = TileCache(cache_path).load()
+            fingerprints = [TileFingerprint(section, params, step, outer, obstacles) for section in sections]
+            pending_sections = []
+            for i, section in enumerate(sections):
+                cached = cache.get(fingerprints[i])
+                if cached is None:
+                    pending_sections.append((i, section))
+                    continue
+                packed.append((cached['coords'], cached['offsets']))
+                total_shapes += cached['total_shapes']
+                clipped_shapes += cached['clipped_shapes']
+                completed_sections += 1
+                progress.advance(CountCells(section, params, step))
+            cache_span.args['reused'] = completed_sections
+        logger.info(_("Reused tiles: {reused}/{num_sections}, {cache_time:.3f} sec").format(
+            reused=completed_sections, num_sections=num_sections, cache_time=cache_span.duration))
+
+    snapshot = None
+    if params.get('backend') == 'processes':
+        with tracer.span('snapshot') as snapshot_span:
+            snapshot = GeometrySnapshot(outer, obstacles)
+        logger.info(_("Geometry snapshot: {size} bytes, {snapshot_time:.3f} sec").format(
+            size=int(snapshot.offsets[-1]), snapshot_time=snapshot_span.duration))
+        num_threads = max(1, int(psutil.cpu_count(logical=False)))
+        logger.info(_("Proccessing Processes Count: {num_threads}").format(num_threads=num_threads))
+        process_section = FillTileTask
+        # Исполнители трассируют плитки, если трассировка включена (в том числе только для телеметрии)
+        trace_sample = tracer.sample_every if isinstance(tracer, Tracer) else None
+        executor = CreateProcessPool(num_threads, snapshot, progress)
+    else:
+        executor = ThreadPoolExecutor(max_workers=num_threads)
+
+    try:
+        with executor:
+            # Создаем задачи для каждой секции
+            futures = []
+            for i, section in pending_sections:
+                if snapshot is not None:
+                    # Геометрия уже в снимке, передаются только границы плитки
+                    future = executor.submit(process_section, section, params, step, i, trace_sample)
+                else:
+                    future = executor.submit(
+                            process_section,
+                            section, params, step,
+                            i,  # номер плитки
+                            outer, obstacles, progress, tracer
+                        )
+                futures.append(future)
+
+            # Собираем результаты и обновляем прогресс
+            pending = set(futures)
+
+            try:
+                while pending:
+                    finished, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        section_result = future.result()
+                        # Интервалы плиток из процессов-исполнителей
+                        tracer.extend(section_result.pop('spans', ()))
+                        packed.append((section_result['coords'], section_result['offsets']))
+                        total_shapes += section_result['total_shapes']
+                        clipped_shapes += section_result['clipped_shapes']
+                        shape_creation_time += section_result['shape_creation_time']
+                        clipper_total_time.append(section_result['clipper_total_time'])
+                        completed_sections += 1
+                        if cache is not None:
+                            cache.put(fingerprints[section_result['section_id']], section_result)
+
+                        logger.debug(_("Tile {section_id} ends: {total_shapes} elements, {clipped_shapes} added").format(
+                            section_id=section_result['section_id'],
+                            total_shapes=section_result['total_shapes'],
+                            clipped_shapes=section_result['clipped_shapes']
+                        ))
+
+                    # Прогресс по обработанным элементам, а не по завершенным плиткам
+                    done = min(progress.done(), total_estimated_shapes)
+                    elapsed = time.perf_counter() - start_fill_loop
+                    rate = done / elapsed if elapsed > 0 else 0
+                    eta = (total_estimated_shapes - done) / rate if rate > 0 else 0
+                    report(progress_start + int((progress_end - progress_start) * done / max(total_estimated_shapes, 1)),
+                           _("Fill copper... Tile {completed_sections}/{num_sections}, {done}/{total} elements, {rate:.0f} el/s, ETA {eta:.0f} sec").format(
+                               completed_sections=completed_sections, num_sections=num_sections,
+                               done=done, total=total_estimated_shapes, rate=rate, eta=eta))
+            except InterruptedError:
+                # Исполнители прерываются на ближайшей строке, ожидающие плитки не запускаются
+                progress.cancel()
+                for future in pending:
+                    future.cancel()
+                raise
+            except Exception as e:
+                progress.cancel()
+                logger.error(_("Error while processing: {e}").format(e=str(e)))
+                raise
+    finally:
+        if snapshot is not None:
+            snapshot.close()
+
+    if cache is not None:
+        try:
+            cache.save(fingerprints)
+        except OSError as e:
+            logger.warning(_("Tile cache is not saved: {e}").format(e=str(e)))
+
+    return {
+        'packed': packed,
+        'total_shapes': total_shapes,
+        'clipped_shapes': clipped_shapes,
+        'shape_creation_time': shape_creation_time,
+        'clipper_total_time': clipper_total_time
+    }
+
+def FillLayer(board, layer_name: str, params: Dict, step: float, main_zone_edges: Dict, outer,
+              obstacles: ObstacleIndex, report: Callable = NoReport, progress_range=(50, 90), tracer=NULL_TRACER) -> Dict:
+    """Зона EmptySpace слоя с контуром заполнения (зона еще не добавлена на плату)
+
+    Returns:
+        Dict: zone, outline (набор контуров для prefilled) и счетчики заполнения
+    """
+    for zone in list(board.Zones()):
+        if pcbnew.LayerName(zone.GetLayer()) == layer_name:
+            if zone.GetZoneName() == 'EmptySpace':
+                board.Remove(zone)
+
+    main_zone = pcbnew.ZONE(board)
+    main_zone.SetLayer(board.GetLayerID(layer_name))
+    main_zone.SetNetCode(0)
+    main_zone.SetZoneName('EmptySpace')
+
+    logger.info(_("START MAIN LOOP: {layer_name}").format(layer_name=layer_name))
+    with tracer.span('fill-layer', layer=layer_name) as layer_span:
+        result = {
+            'total_shapes': 0,
+            'clipped_shapes': 0,
+            'clipper_total_time': [],
+            'shape_creation_time': 0
+        }
+
+        if params.get('output') == 'hatch':
+            report(progress_range[0], _("Build hatch zone..."))
+            hatch = HatchParameters(params['size_mm'], step)
+            logger.info(_("Hatch: thickness {thickness:.1f} µm, gap {gap:.1f} µm, pitch {pitch:.1f} µm").format(**hatch))
+
+            with tracer.span('hatch', 'output', layer=layer_name) as hatch_span:
+                free = BuildFreeRegion(
+                    box(main_zone_edges['start_x'], main_zone_edges['start_y'], main_zone_edges['end_x'], main_zone_edges['end_y']),
+                    outer, obstacles)
+                outline = BuildRegionPolySet(free)
+                main_zone.Outline().Append(outline)
+                SetHatchFill(main_zone, hatch['thickness'], hatch['gap'])
+            logger.info(_("Hatch zone: {count} outlines, {hatch_time:.3f} sec").format(
+                count=outline.OutlineCount(), hatch_time=hatch_span.duration))
+        else:
+            cache_path = None
+            if params.get('incremental', False):
+                cache_path = TileCachePath(board.GetFileName(), layer_name)
+            result = FillSections(main_zone_edges, params, step, outer, obstacles, layer_span.start, cache_path, report,
+                                  progress_range, tracer)
+
+            # Добавляем все фигуры в основную зону одним набором контуров
+            with tracer.span('assembly', 'output', layer=layer_name) as assembly_span:
+                coords, offsets = ConcatPacked(result.pop('packed'))
+                outline = BuildPolySet(coords, offsets)
+                main_zone.Outline().Append(outline)
+            logger.info(_("Outline assembly: {count} outlines, {assembly_time:.3f} sec").format(
+                count=outline.OutlineCount(), assembly_time=assembly_span.duration))
+
+    result['fill_loop_time'] = layer_span.duration
+    result['zone'] = main_zone
+    result['outline'] = outline
+
+    total_shapes = result['total_shapes']
+    clipped_shapes = result['clipped_shapes']
+    clipper_time = sum(result['clipper_total_time'])/max(len(result['clipper_total_time']), 1)
+    logger.info(_("MAIN LOOP ENDED: {layer_name}").format(layer_name=layer_name))
+    logger.info(_("Main loop time: {fill_loop_time:.3f} sec").format(fill_loop_time=result['fill_loop_time']))
+    logger.info(_("Total shapes: {total_shapes}").format(total_shapes=total_shapes))
+    logger.info(_("Clipped shapes: {clipped_shapes}").format(clipped_shapes=clipped_shapes))
+    logger.info(_("Shape creation time: {shape_creation_time:.3f} sec").format(shape_creation_time=result['shape_creation_time']))
+    logger.info(_("Average clipper total time: {clipper_total_time:.3f} sec").format(clipper_total_time=clipper_time))
+    logger.info(_("Average time to element: {a:.2f} msec").format(a=clipper_time/max(total_shapes, 1)*1000))
+    logger.info(_("Added element persentage: {a:.1f}%").format(a=clipped_shapes/max(total_shapes, 1)*100))
+
+    return result
+
+def RunFill(board, params: Dict, report: Callable = NoReport, index: Future = None) -> Dict:
+    """Полный цикл заполнения выбранных слоев платы без интерфейса
+
+    Общие для всех слоев препятствия строятся один раз, препятствия слоев —
+    параллельно. Зоны EmptySpace всех слоев добавляются на плату и
+    заливаются одним вызовом ZONE_FILLER.
+
+    Args:
+        board: Плата pcbnew
+        params (Dict): Настройки в мкм (size_mm, shift_x, shift_y, clearance);
+            geometry_source='file' читает элементы из файла платы (ReadBoardIndex),
+            только если плата не менялась после загрузки; trace — файл трассировки
+            Chrome (True — только сводка), trace_sample — замер каждого N-го элемента;
+            telemetry — период опроса ресурсов процесса, сек (True — TELEMETRY_INTERVAL)
+        report (Callable): Отчет о ходе работы report(value, message)
+        index (Future, optional): Индекс, который уже читается из файла платы (ReadBoardIndexAsync)
+            с params['max_chord_error']; вместо обхода платы ожидается его результат
+
+    Returns:
+        Dict: Время этапов и счетчики по слоям и суммарно ('trace' — сводка трассировки,
+        'telemetry' — ресурсы по этапам)
+    """
+    # Телеметрия отмечает этапы по интервалам трассировки, поэтому включает и ее
+    tracer = Tracer(params.get('trace_sample', 0)) if params.get('trace') or params.get('telemetry') else NULL_TRACER
+    sampler = None
+    if params.get('telemetry'):
+        telemetry = params['telemetry']
+        sampler = ResourceSampler(TELEMETRY_INTERVAL if telemetry is True else float(telemetry))
+
+    with sampler or nullcontext():
+        summary = _RunFill(board, params, report, tracer, index)
+
+    if sampler is not None:
+        summary['telemetry'] = TelemetryReport(sampler, tracer, threading.get_native_id())
+    if params.get('trace'):
+        summary['trace'] = TraceReport(tracer, params['trace'])
+
+    return summary
+
+def _RunFill(board, params: Dict, report: Callable, tracer, index: Future = None) -> Dict:
+    """Этапы RunFill: индекс, препятствия, заполнение слоев и заливка зон"""
+    start_total = time.perf_counter()
+    layers = FillLayers(params)
+
+    board_margin = params['clearance']
+    design_settings = board.GetDesignSettings()
+    clearance = NmToMkr(design_settings.m_MinClearance)
+    # Точность дуг: из настроек или как у заливки зон KiCad (Max error платы)
+    if not params.get('max_chord_error'):
+        max_error = NmToMkr(getattr(design_settings, 'm_MaxError', 0))
+        params['max_chord_error'] = max_error if max_error > 0 else MAX_CHORD_ERROR
+    max_error = params['max_chord_error']
+
+    if params.get('output') == 'hatch' and params['kind'] not in SQUARE_KINDS:
+        # Штриховка KiCad выражает только квадратную решетку
+        logger.warning(_("Hatch output supports square elements only, using zone outline"))
+        params['output'] = 'outline'
+
+    # Построенная геометрия берется из снимка, если элементы платы не изменились (только по snapshot_cache)
+    snapshot_cache = SnapshotCache(board.GetFileName() if params.get('snapshot_cache', False) else '')
+
+    # Один обход платы: дальше элементы берутся из индекса по слоям
+    report(12, _("Index board..."))
+    with tracer.span('index', 'preprocessing', source=params.get('geometry_source', 'pcbnew')) as index_span:
+        if index is not None:
+            # Файл читался в отдельном процессе, пока pcbnew загружал плату: ждем остаток
+            index = index.result()
+            logger.info(_("Board file index: {counts}").format(counts=index.counts()))
+        elif params.get('geometry_source') == 'file' and board.GetFileName():
+            # Плата только что загружена из файла: геометрия читается из него без обращений к pcbnew
+            index = ReadBoardIndex(board.GetFileName(), max_error)
+        else:
+            index = IndexBoard(board)
+    index_time = index_span.duration
+    logger.info(_("Index board: {index_time:.3f} sec").format(index_time=index_time))
+
+    # Общие препятствия и препятствия слоев строятся параллельно
+    report(15, _("Get obstacles..."))
+    with tracer.span('obstacles', 'preprocessing') as obstacles_span, RssPeak() as rss:
+        cores = int(psutil.cpu_count(logical=False) or 1)
+        workers = max(1, min(len(layers) + 1, cores))
+        # Слои строятся одновременно, поэтому ядра делятся между их объединениями (а не cores² потоков GEOS)
+        union_workers = max(1, cores // workers)
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            shared_future = executor.submit(BuildSharedObstacles, index, board_margin, clearance, snapshot_cache,
+                                            params.get('chain_tolerance', CHAIN_TOLERANCE), max_error, tracer, union_workers)
+            layer_futures = {executor.submit(BuildLayerObstacles, index, layer_name, board_margin, clearance, snapshot_cache,
+                                             max_error, tracer, union_workers): layer_name
+                             for layer_name in layers}
+            pending = set(layer_futures) | {shared_future}
+            while pending:
+                _done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                report(15 + int(30 * (len(layers) + 1 - len(pending)) / (len(layers) + 1)),
+                       _("Get obstacles... {done}/{total}").format(done=len(layers) + 1 - len(pending), total=len(layers) + 1))
+            shared = shared_future.result()
+            layer_obstacles = {layer_futures[future]: future.result() for future in layer_futures}
+        finally:
+            # При отмене ожидающие слои не запускаются (cancel_futures в shutdown — только с Python 3.9)
+            for future in layer_futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+    preprocessing_time = obstacles_span.duration
+    # Память замеряется на весь этап: объединения слоев идут одновременно и делят процесс
+    logger.info(_("Obstacles: {workers} builds at once, {union_workers} union threads each, {obstacles_time:.3f} sec, peak RSS {peak:.1f} MB (+{growth:.1f} MB)").format(
+        workers=workers, union_workers=union_workers, obstacles_time=preprocessing_time, peak=rss.peak_mb, growth=rss.growth_mb))
+
+    edges_bbox = board.GetBoardEdgesBoundingBox()
+    main_zone_edges = {
+                        'start_x': NmToMkr(edges_bbox.GetPosition().x),
+                        'start_y': NmToMkr(edges_bbox.GetPosition().y),
+                        'end_x': NmToMkr(edges_bbox.GetPosition().x + edges_bbox.GetWidth()),
+                        'end_y': NmToMkr(edges_bbox.GetPosition().y + edges_bbox.GetHeight())
+                    }
+
+    element_diam = params['size_mm']
+    step = StepFromDensity(params['density'], params['size_mm'])
+    if params['kind'] not in SQUARE_KINDS:
+        logger.info(_("Element tessellation: {vertices} vertices (max chord error {max_error} µm)").format(
+            vertices=len(ElementTemplate(params['kind'], element_diam, max_error)), max_error=max_error))
+
+    if step < board_margin:
+        step = board_margin
+
+    # Записываем информацию о размерах платы и сетке
+    board_width = main_zone_edges['end_x'] - main_zone_edges['start_x']
+    board_height = main_zone_edges['end_y'] - main_zone_edges['start_y']
+    logger.info(_("Board size: {board_width:.1f} x {board_height:.1f} µm").format(board_width=board_width, board_height=board_height))
+    logger.info(_("Element size: {element_diam} µm, step: {step:.3f} µm").format(element_diam=element_diam, step=step))
+
+    # Замер времени основного цикла заполнения
+    start_fill_loop = time.perf_counter()
+    results = {}
+    for i, layer_name in enumerate(layers):
+        obstacles_layer = layer_obstacles[layer_name]
+        with tracer.span('obstacle-index', 'preprocessing', layer=layer_name) as obstacles_span:
+            obstacles = ObstacleIndex([shared['inner'], shared['pads'], shared['vias'],
+                                       obstacles_layer['zones'], obstacles_layer['masks'], obstacles_layer['tracks'],
+                                       obstacles_layer['pads'], obstacles_layer['vias']])
+        logger.info(_("Obstacle index {layer_name}: {count} parts, {vertices} vertices, {index_time:.3f} sec").format(
+            layer_name=layer_name, count=len(obstacles), vertices=int(shapely.get_num_coordinates(obstacles.geoms).sum()),
+            index_time=obstacles_span.duration))
+
+        progress_range = (50 + 40 * i // len(layers), 50 + 40 * (i + 1) // len(layers))
+        results[layer_name] = FillLayer(board, layer_name, params, step, main_zone_edges, shared['outer'],
+                                        obstacles, report, progress_range, tracer)
+    fill_loop_time = time.perf_counter() - start_fill_loop
+
+    # Замер времени добавления и заполнения зон: один ZONE_FILLER на все слои
+    report(98, _("End zone..."))
+    with tracer.span('zone-fill', 'output', output=params.get('output', 'outline')) as fill_span:
+        zones = [result['zone'] for result in results.values()]
+        for zone in zones:
+            board.Add(zone)
+        if params.get('output') == 'prefilled':
+            # Куски уже проверены на зазоры: записываем их в заливку напрямую
+            for result in results.values():
+                SetPrefilled(result['zone'], result['outline'])
+            if params.get('validate_fill'):
+                with tracer.span('validate', 'output'):
+                    prefilled_area = sum(FilledArea(zone) for zone in zones)
+                    filler = pcbnew.ZONE_FILLER(board)
+                    filler.Fill(zones)
+                    filler_area = sum(FilledArea(zone) for zone in zones)
+                logger.info(_("Fill validation: pre-filled {prefilled_area:.0f} µm², filler {filler_area:.0f} µm², difference {a:.2f}%").format(
+                    prefilled_area=prefilled_area,
+                    filler_area=filler_area,
+                    a=abs(prefilled_area - filler_area)/max(filler_area, 1)*100))
+        else:
+            filler = pcbnew.ZONE_FILLER(board)
+            filler.Fill(zones)
+    fill_time = fill_span.duration
+    logger.info(_("Add and fill zones: {fill_time:.3f} sec").format(fill_time=fill_time))
+
+    total_time = time.perf_counter() - start_total
+    times = dict(shared['times'])
+    for obstacles_layer in layer_obstacles.values():
+        for stage, stage_time in obstacles_layer['times'].items():
+            times[stage] = times.get(stage, 0) + stage_time
+
+    return {
+        'layers': {
+            layer_name: {
+                'total_shapes': result['total_shapes'],
+                'clipped_shapes': result['clipped_shapes'],
+                'fill_loop_time': result['fill_loop_time']
+            } for layer_name, result in results.items()
+        },
+        'total_shapes': sum(result['total_shapes'] for result in results.values()),
+        'clipped_shapes': sum(result['clipped_shapes'] for result in results.values()),
+        'index_time': index_time,
+        'preprocessing_time': preprocessing_time,
+        'stage_times': times,
+        'fill_loop_time': fill_loop_time,
+        'fill_time': fill_time,
+        'total_time': total_time
+    }
+
+def TelemetryReport(sampler: ResourceSampler, tracer: Tracer, tid: int) -> Dict:
+    """Отсчеты ресурсов с этапами конвейера: сводка в журнал, счетчики в трассировку
+
+    Returns:
+        Dict: interval, stages (SummarizeSamples) и samples (AnnotateSamples)
+    """
+    samples = AnnotateSamples(sampler.samples, tracer.events, tid, tracer.origin)
+    stages = SummarizeSamples(samples)
+    for stage, stats in stages.items():
+        logger.info(_("Resources {stage}: {samples} samples, RSS {rss_mb:.0f} MB, CPU {cpu:.0f}%, cores {cores:.0f}%, "
+                      "threads {threads}, busy executors {busy}, workers RSS {children_rss_mb:.0f} MB, workers CPU {children_cpu:.0f}%, "
+                      "read {read_mb:.1f} MB, write {write_mb:.1f} MB").format(stage=stage, **stats))
+
+    for raw, sample in zip(sampler.samples, samples):
+        tracer.counter('memory', raw['time'], {'rss_mb': sample['rss'] / 2**20, 'workers_rss_mb': sample['children_rss'] / 2**20})
+        tracer.counter('cpu', raw['time'], {'process': sample['cpu'], 'workers': sample['children_cpu'],
+                                            'cores': sum(sample['cores']) / max(len(sample['cores']), 1)})
+
+    return {'interval': sampler.interval, 'stages': stages, 'samples': samples}
+
+def TraceReport(tracer: Tracer, trace) -> Dict:
+    """Сводка трассировки в журнал и, если trace — путь, трассировка Chrome в файл
+
+    Returns:
+        Dict: Сводка Tracer.report()
+    """
+    trace_report = tracer.report()
+    for name, stats in sorted(trace_report['spans'].items(), key=lambda item: -item[1]['total']):
+        logger.info(_("Span {name}: {count} x, total {total:.3f} sec, mean {mean:.4f} sec, max {max:.4f} sec").format(
+            name=name, **stats))
+    for thread, stats in trace_report['threads'].items():
+        logger.debug(_("Thread {thread}: {spans} spans, busy {busy:.3f} sec").format(thread=thread, **stats))
+
+    if isinstance(trace, str):
+        try:
+            tracer.save(trace)
+            logger.info(_("Trace: {trace}").format(trace=trace))
+        except OSError as e:
+            logger.warning(_("Trace is not saved: {e}").format(e=str(e)))
+
+    return trace_report
+
+def CopperLayerNames(board) -> List[str]:
+    """Имена медных слоев платы в порядке стека"""
+    return [pcbnew.LayerName(l) for l in board.GetLayerSet().Seq() if pcbnew.IsCopperLayer(l)]
+
+def FillBoard(board_file: str, settings: Dict, save_as: str = None, report: Callable = NoReport) -> Dict:
+    """Загрузка платы из файла, заполнение и сохранение (без интерфейса)
+
+    Args:
+        board_file (str): Файл .kicad_pcb
+        settings (Dict): Настройки в мм (схема settings.json / GetValues)
+        save_as (str, optional): Куда сохранить плату. Defaults to None (поверх исходной).
+        report (Callable): Отчет о ходе работы report(value, message)
+
+    Returns:
+        Dict: Сводка RunFill, дополненная путем сохраненной платы
+    """
+    settings = dict(settings)
+    index = None
+    if settings.get('geometry_source') == 'file':
+        # Элементы читаются из файла одновременно с загрузкой платы; pcbnew нужен для записи заливки.
+        # Точность дуг как в _RunFill: из настроек или Max error платы (файл проекта)
+        settings['max_chord_error'] = settings.get('max_chord_error') or ReadMaxError(board_file) or MAX_CHORD_ERROR
+        index = ReadBoardIndexAsync(board_file, settings['max_chord_error'])
+
+    board = pcbnew.LoadBoard(board_file)
+    logger.info(_("Board: {board}").format(board=board.GetFileName()))
+
+    copper_layers = CopperLayerNames(board)
+    if not settings.get('layers') and not settings.get('layer_name'):
+        # Как в диалоге: по умолчанию первый медный слой
+        settings['layers'] = copper_layers[:1]
+    params = SettingsToMkr(settings, BoardClasses())
+
+    unknown = [layer for layer in FillLayers(params) if layer not in copper_layers]
+    if unknown:
+        raise ValueError(_("Unknown copper layers: {layers}").format(layers=', '.join(unknown)))
+
+    logger.info(_("Layers: {layers}, shape: {kind}, size: {size} µm, density: {density} %, clearance: {clearance} µm").format(
+        layers=', '.join(FillLayers(params)), kind=params['kind'], size=params['size_mm'],
+        density=params['density'], clearance=params['clearance']))
+
+    summary = RunFill(board, params, report, index)
+
+    save_as = save_as or board_file
+    pcbnew.SaveBoard(save_as, board)
+    logger.info(_("Saved: {board}").format(board=save_as))
+    summary['board'] = save_as
+
+    return summary
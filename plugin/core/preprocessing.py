@@ -1,186 +1,272 @@
-from shapely.geometry import Polygon, LineString
-from shapely.ops import unary_union, transform
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+from shapely.ops import transform
 
-from .utils import RoundCoordsTransform, NmToMkr
+from .utils import RoundCoordsTransform, RoundCoords, NmToMkr
+from .board_index import BoardIndex
+from .union import PartitionedUnion
+from .tessellation import MAX_CHORD_ERROR, SegmentCounts, BufferDistance
 
 import logging
 import pcbnew
 
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 logger = logging.getLogger('log')
 
-def GetEdgeContours(board, layer) -> Dict[str, List]:
-    edge_contours = {
-                    'lines': [],
-                    'squares': [],
-                    'arcs': [],
-                    'circles': [],
-                    'polys': []
-                    }
-   
+# Виды PCB_SHAPE (GetShape) и ключи в наборе контуров
+_DRAWING_KINDS = {
+    0: 'lines',
+    1: 'squares',
+    2: 'arcs',
+    3: 'circles',
+    4: 'polys'
+}
+
+def _PolyVertices(poly) -> List[Tuple]:
+    return [(NmToMkr(poly.CVertex(i).x), NmToMkr(poly.CVertex(i).y)) for i in range(poly.VertexCount())]
+
+def _PadShapeShared(pad) -> bool:
+    """Одна форма площадки на всех медных слоях
+
+    В KiCad 9 стек площадки (режимы FRONT_INNER_BACK и CUSTOM) задает
+    свою форму внешним и внутренним слоям, в KiCad 8 стеков нет.
+    """
+    try:
+        return pad.Padstack().Mode() == pcbnew.PADSTACK.MODE_NORMAL
+    except AttributeError:
+        return True
+
+def _DrawingRecord(d) -> Tuple:
+    """Примитивные данные графики в формате набора контуров GetEdgeContours"""
+    shape = d.GetShape()
+    if shape == 2: #arc
+        return (
+            NmToMkr(d.GetStart().x), NmToMkr(d.GetStart().y),
+            NmToMkr(d.GetEnd().x), NmToMkr(d.GetEnd().y),
+            NmToMkr(d.GetCenter().x), NmToMkr(d.GetCenter().y)
+            )
+    elif shape == 4: #polys
+        return _PolyVertices(d.GetPolyShape())
+
+    # line, square, circle
+    return (
+        NmToMkr(d.GetStart().x), NmToMkr(d.GetStart().y),
+        NmToMkr(d.GetEnd().x), NmToMkr(d.GetEnd().y)
+        )
+
+def IndexBoard(board) -> BoardIndex:
+    """Единственный обход платы: элементы раскладываются по ID слоев
+
+    Контур зоны и полигон площадки с одной формой на всех слоях строятся
+    один раз и попадают во все медные слои элемента; площадка со стеком
+    KiCad 9, различающимся по слоям, строится для каждого слоя. Площадки и отверстия, занимающие все медные
+    слои платы, попадают в сквозные элементы (THROUGH), а не в слои.
+
+    Args:
+        board: Плата pcbnew
+
+    Returns:
+        BoardIndex: Примитивные данные элементов по слоям
+    """
+    index = BoardIndex()
+    index.layer_ids = {pcbnew.LayerName(l): l for l in board.GetLayerSet().Seq()}
+    # Контур и маски ищутся по каноническим именам (как в файле платы)
+    for name, l in (('Edge.Cuts', pcbnew.Edge_Cuts), ('F.Mask', pcbnew.F_Mask), ('B.Mask', pcbnew.B_Mask)):
+        index.layer_ids.setdefault(name, l)
+    copper_layers = {l for l in index.layer_ids.values() if pcbnew.IsCopperLayer(l)}
+
+    def copper_of(item):
+        return [l for l in item.GetLayerSet().Seq() if pcbnew.IsCopperLayer(l)]
+
     for d in board.Drawings():
         if d.Type() != 5: # if not PCB_SHAPE_LINE
             continue
-        if d.GetLayer() != layer:
+        kind = _DRAWING_KINDS.get(d.GetShape())
+        if kind is not None:
+            index.layers[d.GetLayer()].drawings[kind].append(_DrawingRecord(d))
+
+    for track in board.GetTracks():
+        if track.Type() == pcbnew.PCB_VIA_T:
+            via = track.Cast()
+            if via is None:
+                continue
+            pos = via.GetPosition()
+            diameter_nm = via.GetDrillValue() + via.GetWidth()  # Диаметр = отверстие + медь
+            circle = (NmToMkr(pos.x), NmToMkr(pos.y), NmToMkr(diameter_nm / 2.0))
+            layers = copper_of(via)
+            if copper_layers and copper_layers.issubset(layers):
+                index.through.vias.append(circle)
+                continue
+            for l in layers:
+                index.layers[l].vias.append(circle)
+        else:
+            start = track.GetStart()
+            end = track.GetEnd()
+            index.layers[track.GetLayer()].segments.append(
+                (NmToMkr(start.x), NmToMkr(start.y), NmToMkr(end.x), NmToMkr(end.y), NmToMkr(track.GetWidth())))
+
+    for pad in board.GetPads():
+        layers = copper_of(pad)
+        if not layers:
+            continue
+        if not _PadShapeShared(pad):
+            for l in layers:
+                index.layers[l].pads.append(_PolyVertices(pad.GetEffectivePolygon(l, 0)))
             continue
-        if d.GetShape() == 0: #line
-            edge_contours['lines'].append((
-                NmToMkr(d.GetStart().x), NmToMkr(d.GetStart().y), 
-                NmToMkr(d.GetEnd().x), NmToMkr(d.GetEnd().y)
-                ))
-        elif d.GetShape() == 1: #square
-            edge_contours['squares'].append((
-                NmToMkr(d.GetStart().x), NmToMkr(d.GetStart().y), 
-                NmToMkr(d.GetEnd().x), NmToMkr(d.GetEnd().y)
-                ))
-        elif d.GetShape() == 2: #arc
-            edge_contours['arcs'].append((
-                NmToMkr(d.GetStart().x), NmToMkr(d.GetStart().y), 
-                NmToMkr(d.GetEnd().x), NmToMkr(d.GetEnd().y), 
-                NmToMkr(d.GetCenter().x), NmToMkr(d.GetCenter().y)
-                ))
-        elif d.GetShape() == 3: #circle
-            edge_contours['circles'].append((
-                NmToMkr(d.GetStart().x), NmToMkr(d.GetStart().y), 
-                NmToMkr(d.GetEnd().x), NmToMkr(d.GetEnd().y)
-                ))
-        elif d.GetShape() == 4: #polys
-            poly = d.GetPolyShape()
-            temp = []
-            for i in range(poly.VertexCount()):
-                temp.append((NmToMkr(poly.CVertex(i).x), NmToMkr(poly.CVertex(i).y)))
-                
-            edge_contours['polys'].append(temp)
-        
-    return edge_contours
-
-def GetZones(board, layer_name: str, board_margin):
+        pad_poly = _PolyVertices(pad.GetEffectivePolygon(layers[0], 0))
+        if copper_layers and copper_layers.issubset(layers):
+            index.through.pads.append(pad_poly)
+            continue
+        for l in layers:
+            index.layers[l].pads.append(pad_poly)
+
+    for zone in board.Zones():
+        outline = None
+        for l in zone.GetLayerSet().Seq():
+            if outline is None:
+                outline = _PolyVertices(zone.Outline())
+            index.layers[l].zones.append((zone.GetZoneName(), outline))
+
+    logger.info(_("Board index: {counts}").format(counts=index.counts()))
+
+    return index
+
+def GetEdgeContours(index: BoardIndex, layer) -> Dict[str, List]:
+    """Набор контуров графики слоя (lines, squares, arcs, circles, polys)"""
+    drawings = index.items(layer).drawings
+
+    return {kind: list(records) for kind, records in drawings.items()}
+
+def ZoneOutlines(index: BoardIndex, layer_name: str) -> List[List]:
+    """Контуры зон слоя в мкм (кроме зоны EmptySpace прошлого запуска)"""
     logger.info(_("Get Zones"))
-    zones = []
+    outlines = []
     zones_count = 0
-    removed_zones = 0
-    for zone in board.Zones():
-        if zone.GetLayerSet() is not None:
-            for l_z in zone.GetLayerSet().Seq():
-                if pcbnew.LayerName(l_z) == layer_name:
-                    zones_count += 1
-                    if zone.GetZoneName() == 'EmptySpace':
-                        board.Remove(zone)
-                        removed_zones += 1
-                    zone_poly = Polygon((NmToMkr(zone.Outline().CVertex(i).x), NmToMkr(zone.Outline().CVertex(i).y)) for i in range(zone.Outline().VertexCount()))
-                    zones.append(zone_poly)
-    zones = unary_union([transform(RoundCoordsTransform, Polygon(zone_poly).buffer(board_margin)) for zone_poly in zones])
-    logger.info(_("Zone count: {zones_count}, removed: {removed_zones}").format(zones_count=zones_count, removed_zones=removed_zones))
-    
-    return zones
-
-def GetMasks(board, layer_name: str, board_margin):
+    skipped_zones = 0
+    for name, outline in index.items(layer_name).zones:
+        zones_count += 1
+        if name == 'EmptySpace':
+            # Прошлая заливка плагина заменяется и не является препятствием
+            skipped_zones += 1
+            continue
+        outlines.append(outline)
+    logger.info(_("Zone count: {zones_count}, removed: {removed_zones}").format(zones_count=zones_count, removed_zones=skipped_zones))
+
+    return outlines
+
+def BuildZones(outlines: List[List], board_margin, max_error: float = MAX_CHORD_ERROR, workers: int = None):
+    distance, quad_segs = BufferDistance(board_margin, max_error)
+    return PartitionedUnion([transform(RoundCoordsTransform, Polygon(zone_poly).buffer(distance, quad_segs)) for zone_poly in outlines], workers=workers)
+
+def GetZones(index: BoardIndex, layer_name: str, board_margin, max_error: float = MAX_CHORD_ERROR):
+    return BuildZones(ZoneOutlines(index, layer_name), board_margin, max_error)
+
+def MaskPolys(index: BoardIndex, layer_name: str) -> List[List]:
+    """Полигоны маски стороны слоя (пусто для внутренних слоев)"""
     logger.info(_("Get Masks"))
     mask = None
     if layer_name == "F.Cu":
-        mask = pcbnew.F_Mask
+        mask = "F.Mask"
     elif layer_name == "B.Cu":
-        mask = pcbnew.B_Mask
-    
-    masks = []
-    if mask:
-        masks = GetEdgeContours(board, mask)
-        masks_count = len(masks['polys']) if 'polys' in masks else 0
-        masks = unary_union([transform(RoundCoordsTransform, Polygon(m).buffer(board_margin)) for m in masks['polys']])
-    else:
-        masks = None
-        masks_count = 0
-    logger.info(_("Masks count: {masks_count}").format(masks_count=masks_count))
-
-    return masks
-
-def GetTracks(board, layer_name: str, clearance):
+        mask = "B.Mask"
+
+    polys = GetEdgeContours(index, mask)['polys'] if mask is not None else []
+    logger.info(_("Masks count: {masks_count}").format(masks_count=len(polys)))
+
+    return polys
+
+def BuildMasks(polys: List[List], board_margin, max_error: float = MAX_CHORD_ERROR, workers: int = None):
+    if not polys:
+        return None
+
+    distance, quad_segs = BufferDistance(board_margin, max_error)
+    return PartitionedUnion([transform(RoundCoordsTransform, Polygon(m).buffer(distance, quad_segs)) for m in polys], workers=workers)
+
+def GetMasks(index: BoardIndex, layer_name: str, board_margin, max_error: float = MAX_CHORD_ERROR):
+    return BuildMasks(MaskPolys(index, layer_name), board_margin, max_error)
+
+def TrackSegments(index: BoardIndex, layer_name: str) -> List[Tuple]:
+    """Отрезки дорожек слоя: (x1, y1, x2, y2, ширина) в мкм"""
     logger.info(_("Get Tracks"))
-    tracks = []
-    tracks_count = 0
-    for track in board.GetTracks():
-        if track.GetLayer() == board.GetLayerID(layer_name):
-            tracks_count += 1
+    segments = index.items(layer_name).segments
+    logger.info(_("Tracks count: {tracks_count}").format(tracks_count=len(segments)))
 
-            start = track.GetStart()
-            end = track.GetEnd()
-            width_nm = track.GetWidth()
+    return segments
+
+def BuildTracks(segments: List[Tuple], clearance, max_error: float = MAX_CHORD_ERROR, workers: int = None):
+    """Объединенные дорожки с зазором
 
-            width_mkr = NmToMkr(width_nm)
-            start_mkr = (NmToMkr(start.x), NmToMkr(start.y))
-            end_mkr = (NmToMkr(end.x), NmToMkr(end.y))
+    Отрезки собираются в массивы и строятся векторно: тело дорожки с
+    квадратными концами, затем зазор и округление координат.
+    """
+    if len(segments) == 0:
+        return PartitionedUnion([])
 
-            line = LineString([start_mkr, end_mkr])
-                    
-            buffer_distance = width_mkr / 2.0
-            track_poly = line.buffer(buffer_distance, cap_style=3, join_style=2)
+    data = np.asarray(segments, dtype=float)
+    lines = shapely.linestrings(data[:, :4].reshape(-1, 2, 2))
+    # Квадратные концы и острые стыки не содержат дуг: хорды нужны только зазору
+    bodies = shapely.buffer(lines, data[:, 4] / 2.0, cap_style='square', join_style='mitre')
 
-            tracks.append(track_poly)
-            
-    tracks = unary_union([transform(RoundCoordsTransform, Polygon(track_poly).buffer(clearance)) for track_poly in tracks])
-    logger.info(_("Tracks count: {tracks_count}").format(tracks_count=tracks_count))
-            
-    return tracks
+    distance, quad_segs = BufferDistance(clearance, max_error)
+    return PartitionedUnion(RoundCoords(shapely.buffer(bodies, distance, quad_segs=quad_segs)), workers=workers)
 
-def GetPads(board, layer_name: str, clearance):
+def GetTracks(index: BoardIndex, layer_name: str, clearance, max_error: float = MAX_CHORD_ERROR):
+    return BuildTracks(TrackSegments(index, layer_name), clearance, max_error)
+
+def PadPolys(index: BoardIndex, layer_name: str) -> List[List]:
+    """Эффективные полигоны площадок слоя в мкм"""
     logger.info(_("Get Pads"))
-    pads = []
-    pads_count = 0
-    for pad in board.GetPads():
-        if pad.GetLayerSet().Seq() is not None:
-            for p in pad.GetLayerSet().Seq():
-                if pcbnew.LayerName(p) == layer_name:
-                    pads_count += 1
-                    poly = pcbnew.SHAPE_POLY_SET()
-                    poly = pad.GetEffectivePolygon(board.GetLayerID(layer_name), 0)
-                    pad_poly = Polygon((NmToMkr(poly.CVertex(i).x), NmToMkr(poly.CVertex(i).y)) for i in range(poly.VertexCount()))
-                    pads.append(pad_poly)
-                            
-    pads = unary_union([transform(RoundCoordsTransform, Polygon(pad_poly).buffer(clearance)) for pad_poly in pads])
-    logger.info(_("Pads count: {pads_count}").format(pads_count=pads_count))
-    return pads
-
-def _create_circle_polygon(center_x, center_y, radius, num_points=12):
-    import math
-        
-    points = []
-    for i in range(num_points):
-        angle = 2 * math.pi * i / num_points
-        x = center_x + radius * math.cos(angle)
-        y = center_y + radius * math.sin(angle)
-        points.append((x, y))
-        
-    return Polygon(points)
-
-def GetVias(board, layer_name: str, clearance):
+    polys = index.items(layer_name).pads
+    logger.info(_("Pads count: {pads_count}").format(pads_count=len(polys)))
+
+    return polys
+
+def BuildPads(polys: List[List], clearance, max_error: float = MAX_CHORD_ERROR, workers: int = None):
+    distance, quad_segs = BufferDistance(clearance, max_error)
+    return PartitionedUnion([transform(RoundCoordsTransform, Polygon(pad_poly).buffer(distance, quad_segs)) for pad_poly in polys], workers=workers)
+
+def GetPads(index: BoardIndex, layer_name: str, clearance, max_error: float = MAX_CHORD_ERROR):
+    return BuildPads(PadPolys(index, layer_name), clearance, max_error)
+
+def ViaCircles(index: BoardIndex, layer_name: str) -> List[Tuple]:
+    """Переходные отверстия слоя: (x, y, радиус меди) в мкм"""
     logger.info(_("Get Vias"))
-    vias = []
-    vias_count = 0
-    for via in board.GetTracks():
-        if via.GetLayerSet().Seq() is not None:
-            for v in via.GetLayerSet().Seq():
-                if pcbnew.LayerName(v) == layer_name:
-                    vias_count += 1
-                    if via.Type() != pcbnew.PCB_VIA_T:
-                        continue
-
-                    via = via.Cast()
-                    if via is None:
-                        continue
-
-                    layer_set = via.GetLayerSet()
-                    if layer_set.Contains(board.GetLayerID(layer_name)):
-                        pos = via.GetPosition()
-                        diameter_nm = via.GetDrillValue() + via.GetWidth()  # Диаметр = отверстие + медь
-                                
-                        x_mkr = NmToMkr(pos.x)
-                        y_mkr = NmToMkr(pos.y)
-                        radius_mkr = NmToMkr(diameter_nm / 2.0) + clearance
-                                
-                        via_poly = _create_circle_polygon(x_mkr, y_mkr, radius_mkr, num_points=8)
-                        vias.append(via_poly)
-            
-    vias = unary_union([transform(RoundCoordsTransform, Polygon(via_poly).buffer(clearance)) for via_poly in vias])
-    logger.info(_("Vias count: {vias_count}").format(vias_count=vias_count))
-    return vias
\ No newline at end of file
+    circles = index.items(layer_name).vias
+    logger.info(_("Vias count: {vias_count}").format(vias_count=len(circles)))
+
+    return circles
+
+def BuildVias(circles: List[Tuple], clearance, max_error: float = MAX_CHORD_ERROR, workers: int = None):
+    """Объединенные переходные отверстия с зазором
+
+    Каждое отверстие — вписанный многоугольник радиусом (медь + зазор),
+    число вершин которого задано допустимым отклонением хорды, дополнительно
+    расширенный на зазор. Отверстия с одинаковым числом вершин строятся
+    одним векторным действием.
+    """
+    if len(circles) == 0:
+        return PartitionedUnion([])
+
+    data = np.asarray(circles, dtype=float)
+    radius = data[:, 2] + clearance
+    counts = SegmentCounts(radius, max_error)
+
+    polygons = []
+    for count in np.unique(counts).tolist():
+        group = counts == count
+        angles = 2 * np.pi * np.arange(count) / count
+        r = radius[group][:, None]
+        coords = np.stack([data[group, 0:1] + r * np.cos(angles), data[group, 1:2] + r * np.sin(angles)], axis=-1)
+        polygons.append(shapely.polygons(coords))
+    polygons = np.concatenate(polygons)
+
+    logger.info(_("Vias tessellation: {count} vias, {vertices} vertices (max chord error {max_error} µm)").format(
+        count=len(polygons), vertices=int(counts.sum()), max_error=max_error))
+
+    distance, quad_segs = BufferDistance(clearance, max_error)
+    return PartitionedUnion(RoundCoords(shapely.buffer(polygons, distance, quad_segs=quad_segs)), workers=workers)
+
+def GetVias(index: BoardIndex, layer_name: str, clearance, max_error: float = MAX_CHORD_ERROR):
+    return BuildVias(ViaCircles(index, layer_name), clearance, max_error)
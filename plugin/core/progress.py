@@ -0,0 +1,80 @@
+import threading
+
+class _ThreadValue:
+    """Счетчик потоков одного процесса с интерфейсом multiprocessing.Value"""
+    def __init__(self, value: int = 0):
+        self.value = value
+        self._lock = threading.Lock()
+
+    def get_lock(self):
+        return self._lock
+
+class FillProgress:
+    """Общий канал прогресса и отмены для потоков и процессов-исполнителей
+
+    Счетчик обработанных элементов и флаг отмены — примитивы threading.
+    Для процессов-исполнителей share() переносит их в разделяемую память
+    контекста пула, после чего объект передается в процессы через
+    инициализатор пула. Исполнители вызывают check() на каждой строке
+    сетки и advance() по мере обработки элементов; основной поток читает done().
+    """
+    def __init__(self):
+        self._done = _ThreadValue()
+        self._cancelled = threading.Event()
+
+    def share(self, context):
+        """Перенос счетчика и флага в разделяемую память контекста пула процессов
+
+        Вызывается до запуска исполнителей и после set_executable: семафоры
+        multiprocessing запускают процесс resource tracker.
+        """
+        done = context.Value('q', self._done.value)
+        cancelled = context.Event()
+        if self._cancelled.is_set():
+            cancelled.set()
+        self._done, self._cancelled = done, cancelled
+
+    def advance(self, count: int):
+        """Добавление обработанных элементов"""
+        if count:
+            with self._done.get_lock():
+                self._done.value += int(count)
+
+    def done(self) -> int:
+        """Количество обработанных элементов"""
+        return self._done.value
+
+    def cancel(self):
+        """Запрос отмены для всех исполнителей"""
+        self._cancelled.set()
+
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check(self):
+        """Прерывание работы исполнителя после запроса отмены
+
+        Raises:
+            InterruptedError: Отмена запрошена пользователем
+        """
+        if self._cancelled.is_set():
+            raise InterruptedError("Operation cancelled")
+
+class NullProgress:
+    """Заглушка канала прогресса для запусков без диалога"""
+    def advance(self, count: int):
+        pass
+
+    def done(self) -> int:
+        return 0
+
+    def cancel(self):
+        pass
+
+    def cancelled(self) -> bool:
+        return False
+
+    def check(self):
+        pass
+
+NULL_PROGRESS = NullProgress()
@@ -0,0 +1,81 @@
+import numpy as np
+import shapely
+
+from typing import Dict, Tuple
+
+from .clipping import MIN_AREA, ExplodePolygons
+from .grid import MakeCells
+from .progress import NULL_PROGRESS
+
+# Максимальное число элементов в смешанном листе, который обрезается поэлементно
+LEAF_CELLS = 4
+
+def ClipCellsQuadtree(template: np.ndarray, xs: np.ndarray, ys: np.ndarray, free, clipper,
+                      leaf_cells: int = LEAF_CELLS, progress=NULL_PROGRESS) -> Tuple[np.ndarray, int, Dict]:
+    """Иерархическая классификация блоков сетки по свободной области
+
+    Блок элементов целиком в свободной области выдается без обрезки, блок вне
+    ее отбрасывается, смешанный блок делится на четыре части. Поэлементная
+    обрезка выполняется только в смешанных листах.
+
+    Args:
+        template (np.ndarray): Контур элемента (ElementTemplate)
+        xs (np.ndarray): Координаты столбцов
+        ys (np.ndarray): Координаты строк
+        free: Свободная область секции (BuildFreeRegion)
+        clipper (ShapeClipper): Точная обрезка элементов смешанных листов
+        leaf_cells (int, optional): Размер листа в элементах. Defaults to LEAF_CELLS.
+        progress (FillProgress, optional): Канал прогресса и отмены. Defaults to NULL_PROGRESS.
+
+    Returns:
+        Tuple[np.ndarray, int, Dict]: Полигоны-куски, количество добавленных элементов и статистика
+    """
+    stats = {'free_blocks': 0, 'blocked_blocks': 0, 'mixed_leaves': 0, 'clipper_calls': 0}
+    if len(xs) == 0 or len(ys) == 0 or free is None or free.is_empty:
+        progress.advance(len(xs) * len(ys))
+        return np.empty(0, dtype=object), 0, stats
+
+    shapely.prepare(free)
+    # Запас 1 мкм: координаты элементов обрезаются до целых мкм
+    min_x, min_y = template.min(axis=0) - 1
+    max_x, max_y = template.max(axis=0) + 1
+
+    pieces = []
+    clipped_shapes = 0
+    blocks = [(0, len(ys), 0, len(xs))]
+    while blocks:
+        progress.check()
+        r0, r1, c0, c1 = blocks.pop()
+        block = shapely.box(xs[c0] + min_x, ys[r0] + min_y, xs[c1 - 1] + max_x, ys[r1 - 1] + max_y)
+
+        if free.contains(block):
+            stats['free_blocks'] += 1
+            cells = MakeCells(template, xs[c0:c1], ys[r0:r1])
+            cells = cells[shapely.area(cells) >= MIN_AREA]
+            pieces.append(cells)
+            clipped_shapes += len(cells)
+            progress.advance((r1 - r0) * (c1 - c0))
+        elif not free.intersects(block):
+            stats['blocked_blocks'] += 1
+            progress.advance((r1 - r0) * (c1 - c0))
+        elif (r1 - r0) * (c1 - c0) <= leaf_cells:
+            stats['mixed_leaves'] += 1
+            for cell in MakeCells(template, xs[c0:c1], ys[r0:r1]):
+                stats['clipper_calls'] += 1
+                clipped = clipper.clip(cell)
+                if clipped is not None:
+                    clipped_shapes += 1
+                    pieces.append(ExplodePolygons([clipped]))
+            progress.advance((r1 - r0) * (c1 - c0))
+        else:
+            rm = (r0 + r1) // 2 if r1 - r0 > 1 else r1
+            cm = (c0 + c1) // 2 if c1 - c0 > 1 else c1
+            for rows in ((r0, rm), (rm, r1)):
+                for cols in ((c0, cm), (cm, c1)):
+                    if rows[0] < rows[1] and cols[0] < cols[1]:
+                        blocks.append((rows[0], rows[1], cols[0], cols[1]))
+
+    if not pieces:
+        return np.empty(0, dtype=object), 0, stats
+
+    return np.concatenate(pieces), clipped_shapes, stats
@@ -0,0 +1,173 @@
+import math
+import numpy as np
+import shapely
+
+from typing import Dict, Tuple
+
+from .clipping import MIN_AREA, ExplodePolygons
+from .grid import MakeCells
+from .progress import NULL_PROGRESS
+
+# Разрешение растра по умолчанию, мкм на пиксель
+RASTER_RESOLUTION = 50
+# Предельный размер растра секции, пикселей (при превышении разрешение огрубляется)
+RASTER_MAX_PIXELS = 4_000_000
+
+def RasterizeRegion(region, x0: float, y0: float, width: int, height: int, resolution: float) -> np.ndarray:
+    """Растеризация области по центрам пикселей (построчная заливка по правилу чет-нечет)
+
+    Для каждого ребра контура отмечаются пересечения со строками центров
+    пикселей, после чего строка заполняется накопленной четностью. Стоимость
+    пропорциональна числу пикселей и длине контуров, а не числу вершин.
+
+    Args:
+        region: Полигон(ы) области
+        x0 (float): Левая граница растра
+        y0 (float): Верхняя граница растра
+        width (int): Ширина растра, пикселей
+        height (int): Высота растра, пикселей
+        resolution (float): Размер пикселя, мкм
+
+    Returns:
+        np.ndarray: Булева маска (height, width), True — центр пикселя внутри области
+    """
+    crossings = np.zeros((height, width + 1), dtype=np.uint8)
+    if region.is_empty:
+        return crossings[:, :width].astype(bool)
+
+    rings = shapely.get_rings(shapely.get_parts(region))
+    coords, ring_index = shapely.get_coordinates(rings, return_index=True)
+    same_ring = ring_index[:-1] == ring_index[1:]
+    start, end = coords[:-1][same_ring], coords[1:][same_ring]
+
+    # Строки, центры которых лежат в полуинтервале [ymin, ymax) ребра
+    row_from = np.ceil((np.minimum(start[:, 1], end[:, 1]) - y0) / resolution - 0.5).astype(np.intp)
+    row_to = np.ceil((np.maximum(start[:, 1], end[:, 1]) - y0) / resolution - 0.5).astype(np.intp)
+    row_from, row_to = np.clip(row_from, 0, height), np.clip(row_to, 0, height)
+    counts = row_to - row_from
+
+    edge = np.repeat(np.arange(len(counts)), counts)
+    rows = np.repeat(row_from - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    py = y0 + (rows + 0.5) * resolution
+    (sx, sy), (ex, ey) = start[edge].T, end[edge].T
+    px = sx + (py - sy) * (ex - sx) / (ey - sy)
+    cols = np.clip(np.ceil((px - x0) / resolution - 0.5).astype(np.intp), 0, width)
+
+    np.add.at(crossings, (rows, cols), 1)
+    return (np.cumsum(crossings, axis=1, dtype=np.uint8)[:, :width] & 1).astype(bool)
+
+def ChessboardDistance(mask: np.ndarray, limit: int) -> np.ndarray:
+    """Поле расстояний до ближайшего пикселя вне маски (метрика L∞)
+
+    Считается последовательным наращиванием фронта на один пиксель, поэтому
+    стоимость пропорциональна limit, а не размеру элемента в мкм.
+
+    Args:
+        mask (np.ndarray): Булева маска
+        limit (int): Расстояния не меньше limit не различаются
+
+    Returns:
+        np.ndarray: Расстояние в пикселях, ограниченное значением limit
+    """
+    dist = np.full(mask.shape, limit, dtype=np.int16)
+    reached = ~mask
+    dist[reached] = 0
+
+    for d in range(1, limit):
+        if reached.all():
+            break
+        grown = reached.copy()
+        grown[1:, :] |= reached[:-1, :]
+        grown[:-1, :] |= reached[1:, :]
+        front = grown.copy()
+        front[:, 1:] |= grown[:, :-1]
+        front[:, :-1] |= grown[:, 1:]
+        dist[front & ~reached] = d
+        reached = front
+
+    return dist
+
+def ClipCellsRaster(template: np.ndarray, xs: np.ndarray, ys: np.ndarray, free, clipper,
+                    resolution: float = RASTER_RESOLUTION, progress=NULL_PROGRESS) -> Tuple[np.ndarray, int, Dict]:
+    """Предварительная классификация элементов по растру свободной области
+
+    Свободная область растеризуется дважды: с сужением и с расширением на
+    полдиагонали пикселя, так что пиксели делятся на гарантированно свободные,
+    гарантированно занятые и неопределенные. По полям расстояний элемент
+    принимается целиком, отбрасывается или (в узкой полосе у границ
+    препятствий) обрезается точно через ShapeClipper.
+
+    Args:
+        template (np.ndarray): Контур элемента (ElementTemplate)
+        xs (np.ndarray): Координаты столбцов
+        ys (np.ndarray): Координаты строк
+        free: Свободная область секции (BuildFreeRegion)
+        clipper (ShapeClipper): Точная обрезка элементов у границ
+        resolution (float, optional): Размер пикселя, мкм. Defaults to RASTER_RESOLUTION.
+        progress (FillProgress, optional): Канал прогресса и отмены. Defaults to NULL_PROGRESS.
+
+    Returns:
+        Tuple[np.ndarray, int, Dict]: Полигоны-куски, количество добавленных элементов и статистика
+    """
+    stats = {'resolution': resolution, 'clear': 0, 'blocked': 0, 'band': 0}
+    if len(xs) == 0 or len(ys) == 0 or free is None or free.is_empty:
+        progress.advance(len(xs) * len(ys))
+        return np.empty(0, dtype=object), 0, stats
+
+    progress.check()
+    # Габарит элемента относительно точки привязки (+1 мкм на обрезку координат)
+    min_x, min_y = template.min(axis=0) - 1
+    max_x, max_y = template.max(axis=0) + 1
+    center_x, center_y = (min_x + max_x) / 2, (min_y + max_y) / 2
+
+    x0, y0 = xs[0] + min_x, ys[0] + min_y
+    x1, y1 = xs[-1] + max_x, ys[-1] + max_y
+    pixels = (x1 - x0) * (y1 - y0) / resolution**2
+    if pixels > RASTER_MAX_PIXELS:
+        resolution = resolution * math.sqrt(pixels / RASTER_MAX_PIXELS)
+    stats['resolution'] = resolution
+
+    # Полуразмер элемента в пикселях и запас растра вокруг сетки
+    half = int(math.ceil(max(max_x - center_x, max_y - center_y) / resolution)) + 1
+    x0, y0 = x0 - (half + 1) * resolution, y0 - (half + 1) * resolution
+    width = int(math.ceil((x1 - x0) / resolution)) + half + 2
+    height = int(math.ceil((y1 - y0) / resolution)) + half + 2
+
+    # Полудиагональ пикселя с запасом на хорды скругления buffer
+    margin = resolution * 0.75
+    sure_free = RasterizeRegion(free.buffer(-margin), x0, y0, width, height, resolution)
+    sure_blocked = ~RasterizeRegion(free.buffer(margin), x0, y0, width, height, resolution)
+
+    free_dist = ChessboardDistance(sure_free, half + 1)
+    blocked_dist = ChessboardDistance(sure_blocked, half + 1)
+
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    cols = np.floor((grid_x.ravel() + center_x - x0) / resolution).astype(np.intp)
+    rows = np.floor((grid_y.ravel() + center_y - y0) / resolution).astype(np.intp)
+    clear = free_dist[rows, cols] > half
+    blocked = blocked_dist[rows, cols] > half
+    band = ~clear & ~blocked
+
+    stats['clear'] = int(np.count_nonzero(clear))
+    stats['blocked'] = int(np.count_nonzero(blocked))
+    stats['band'] = int(np.count_nonzero(band))
+    progress.advance(stats['clear'] + stats['blocked'])
+
+    cells = MakeCells(template, xs, ys)
+    whole = cells[clear]
+    whole = whole[shapely.area(whole) >= MIN_AREA]
+
+    pieces = [whole]
+    clipped_shapes = len(whole)
+    # Граничные элементы обрезаются построчно, отмена проверяется на каждой строке
+    band_rows = band.reshape(len(ys), len(xs))
+    for row in range(len(ys)):
+        progress.check()
+        for cell in cells[row * len(xs):(row + 1) * len(xs)][band_rows[row]]:
+            clipped = clipper.clip(cell)
+            if clipped is not None:
+                clipped_shapes += 1
+                pieces.append(ExplodePolygons([clipped]))
+        progress.advance(np.count_nonzero(band_rows[row]))
+
+    return np.concatenate(pieces), clipped_shapes, stats
@@ -0,0 +1,94 @@
+import os
+import json
+
+from typing import Dict, Optional
+
+from .utils import MmToMkr
+
+# Движки заполнения: ключ в settings.json
+ENGINES = [ 'loop', 'batch', 'quadtree', 'raster' ]
+# Исполнители плиток
+BACKENDS = [ 'threads', 'processes' ]
+# Способы записи результата в зону
+OUTPUTS = [ 'outline', 'prefilled', 'hatch' ]
+
+# Значения по умолчанию, как в диалоге настроек (размеры в мм)
+DEFAULT_SETTINGS = {
+    'kind': 'Square',
+    'size_mm': 0.6,
+    'density': 50,
+    'shift_x': 0.0,
+    'shift_y': 0.0,
+    'class': 1,
+    'engine': 'loop',
+    'backend': 'threads',
+    'output': 'outline',
+    'validate_fill': False,
+    'incremental': False,
+    'snapshot_cache': False,
+    'trace': False,
+    'telemetry': False
+}
+
+# Поля, которые в settings.json хранятся в мм, а заполнению нужны в мкм
+MM_FIELDS = ('size_mm', 'shift_x', 'shift_y', 'clearance')
+
+def BoardClasses() -> Dict:
+    """Технологические классы плат из data/json/board_class.json"""
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'json', 'board_class.json')
+    with open(path) as json_file:
+        return json.load(json_file)
+
+def LoadSettings(settings_file: str) -> Dict:
+    """Настройки из settings.json (пустой словарь, если файла нет)"""
+    if not settings_file or not os.path.exists(settings_file):
+        return {}
+    with open(settings_file, encoding='utf-8') as f:
+        return json.load(f)
+
+def LimitSettings(settings: Dict, board_classes: Dict) -> Dict:
+    """Настройки в пределах диалога: размер, плотность, отступы и зазор класса платы
+
+    Args:
+        settings (Dict): Настройки в мм (settings.json)
+        board_classes (Dict): Классы плат (BoardClasses)
+
+    Returns:
+        Dict: Новые настройки в мм, недостающие поля взяты из DEFAULT_SETTINGS
+    """
+    params = dict(DEFAULT_SETTINGS)
+    params.update(settings)
+
+    params['size_mm'] = max(0.6, min(2.0, float(params['size_mm'])))
+    params['density'] = max(25, min(90, int(params['density'])))
+    params['shift_x'] = max(0.0, min(5.0, float(params['shift_x'])))
+    params['shift_y'] = max(0.0, min(5.0, float(params['shift_y'])))
+
+    class_index = max(1, min(board_classes['ClassCount'], int(params['class'])))
+    params['class'] = class_index
+    min_clearance = board_classes[f'Class{class_index}']['Clearance']
+    params['clearance'] = min(3.0, max(min_clearance, float(params.get('clearance', min_clearance))))
+
+    # Прежние настройки хранят один слой в layer_name
+    layers = params.get('layers') or ([params['layer_name']] if params.get('layer_name') else [])
+    if layers:
+        params['layers'] = list(layers)
+        params['layer_name'] = layers[0]
+
+    return params
+
+def SettingsToMkr(settings: Dict, board_classes: Optional[Dict] = None) -> Dict:
+    """Настройки для RunFill: размеры из мм в мкм
+
+    Args:
+        settings (Dict): Настройки в мм
+        board_classes (Dict, optional): Если заданы, настройки сначала ограничиваются (LimitSettings)
+
+    Returns:
+        Dict: Новые настройки в мкм
+    """
+    params = LimitSettings(settings, board_classes) if board_classes is not None else dict(settings)
+    for field in MM_FIELDS:
+        params[field] = MmToMkr(params[field])
+
+    return params
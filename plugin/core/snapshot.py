@@ -0,0 +1,107 @@
+import os
+import hashlib
+import logging
+import threading
+import numpy as np
+import shapely
+
+from typing import Callable, List, Optional
+
+from .tile_cache import BoardCacheDir
+
+logger = logging.getLogger('log')
+
+# Подкаталог снимков геометрии в каталоге кэшей платы (BoardCacheDir)
+SNAPSHOT_DIR = 'snapshot'
+# Версия формата: при изменении построения геометрии снимки пересобираются
+SNAPSHOT_VERSION = 3
+# Длина ключа содержимого (sha1 в шестнадцатеричном виде) в начале записи
+KEY_SIZE = 40
+
+def ContentKey(*records) -> str:
+    """Хэш содержимого элементов платы и параметров построения
+
+    Args:
+        records: Примитивные данные элементов (числа, строки, кортежи, списки, массивы numpy)
+
+    Returns:
+        str: sha1 в шестнадцатеричном виде
+    """
+    digest = hashlib.sha1(str(SNAPSHOT_VERSION).encode())
+    for record in records:
+        if isinstance(record, np.ndarray):
+            # repr длинного массива сокращается до '...', поэтому хэшируются сами данные
+            digest.update(f'{record.dtype}{record.shape}'.encode())
+            digest.update(np.ascontiguousarray(record).tobytes())
+        else:
+            digest.update(repr(record).encode())
+
+    return digest.hexdigest()
+
+class SnapshotCache:
+    """Снимки построенной геометрии платы по классам препятствий и слоям
+
+    Каждая запись — один файл <name>.npy (байты): ключ содержимого, число
+    геометрий, их смещения и плотно упакованный WKB. Файл читается через
+    отображение в память и пишется во временный файл с заменой
+    (os.replace), поэтому параллельные записи слоев и процессов манифеста
+    не смешивают ключ одной записи с данными другой.
+    """
+    def __init__(self, board_file: str):
+        cache_dir = BoardCacheDir(board_file)
+        self.dir = os.path.join(cache_dir, SNAPSHOT_DIR) if cache_dir else None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, f"{name}.npy")
+
+    def load(self, name: str, key: str) -> Optional[List]:
+        """Геометрии записи, если ее ключ совпадает с key"""
+        if self.dir is None or not os.path.exists(self._path(name)):
+            return None
+
+        try:
+            data = np.load(self._path(name), mmap_mode='r')
+            if data[:KEY_SIZE].tobytes() != key.encode():
+                return None
+            count = int(data[KEY_SIZE:KEY_SIZE + 8].view(np.int64)[0])
+            start = KEY_SIZE + 8 * (count + 2)
+            offsets = data[KEY_SIZE + 8:start].view(np.int64) + start
+            return list(shapely.from_wkb([data[offsets[i]:offsets[i + 1]].tobytes() for i in range(count)]))
+        except (OSError, ValueError, IndexError, shapely.errors.GEOSException) as e:
+            logger.warning(_("Snapshot {name} is not readable: {e}").format(name=name, e=str(e)))
+            return None
+
+    def store(self, name: str, key: str, geoms: List):
+        """Запись геометрий (None сохраняется как пустая коллекция)"""
+        if self.dir is None:
+            return
+
+        geoms = [shapely.GeometryCollection() if g is None else g for g in geoms]
+        wkb = shapely.to_wkb(np.asarray(geoms, dtype=object))
+        offsets = np.zeros(len(wkb) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter((len(w) for w in wkb), dtype=np.int64, count=len(wkb)), out=offsets[1:])
+        record = b''.join([key.encode(), np.int64(len(wkb)).tobytes(), offsets.tobytes()] + list(wkb))
+
+        path = self._path(name)
+        # Временный файл своего процесса и потока: на место записи попадает только полный файл
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.frombuffer(record, dtype=np.uint8))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(_("Snapshot {name} is not saved: {e}").format(name=name, e=str(e)))
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get_or_build(self, name: str, key: str, build: Callable[[], List]) -> List:
+        """Геометрии из снимка или построенные заново (с записью снимка)"""
+        geoms = self.load(name, key)
+        if geoms is not None:
+            logger.info(_("Snapshot {name}: loaded").format(name=name))
+            return geoms
+
+        geoms = build()
+        self.store(name, key, geoms)
+        return geoms
@@ -0,0 +1,163 @@
+import time
+import threading
+import psutil
+
+from typing import Dict, List, Optional
+
+# Период опроса по умолчанию, сек
+TELEMETRY_INTERVAL = 0.1
+
+class ResourceSampler:
+    """Фоновый опрос ресурсов процесса во время заполнения
+
+    Поток с периодом interval записывает RSS, загрузку процесса и каждого
+    ядра, число потоков и счетчики ввода-вывода, а также RSS и загрузку
+    дочерних процессов (исполнителей backend 'processes'). Загрузка
+    процесса около 100% при нескольких занятых потоках указывает на GIL,
+    рост RSS — на память, простой ядер без плиток — на ZONE_FILLER.
+
+    Attributes:
+        interval (float): Период опроса, сек
+        samples (List[Dict]): Отсчеты; time — по time.perf_counter, как у Tracer
+    """
+    def __init__(self, interval: float = TELEMETRY_INTERVAL):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.samples = []
+        self._children = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _children_usage(self):
+        """RSS и загрузка дочерних процессов (объекты Process хранят прошлый замер CPU)"""
+        rss = 0
+        cpu = 0.0
+        alive = {}
+        for child in self.process.children(recursive=True):
+            child = self._children.get(child.pid, child)
+            try:
+                rss += child.memory_info().rss
+                cpu += child.cpu_percent(None)
+                alive[child.pid] = child
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        self._children = alive
+
+        return rss, cpu
+
+    def _io(self):
+        try:
+            io = self.process.io_counters()
+        except (AttributeError, psutil.AccessDenied):
+            # macOS не отдает счетчики ввода-вывода процесса
+            return None, None
+
+        return io.read_bytes, io.write_bytes
+
+    def _sample(self):
+        with self.process.oneshot():
+            rss = self.process.memory_info().rss
+            cpu = self.process.cpu_percent(None)
+            threads = self.process.num_threads()
+        read_bytes, write_bytes = self._io()
+        children_rss, children_cpu = self._children_usage()
+
+        self.samples.append({
+            'time': time.perf_counter(),
+            'rss': rss,
+            'cpu': cpu,
+            'cores': psutil.cpu_percent(None, percpu=True),
+            'threads': threads,
+            'read_bytes': read_bytes,
+            'write_bytes': write_bytes,
+            'children_rss': children_rss,
+            'children_cpu': children_cpu
+        })
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> 'ResourceSampler':
+        # Первый вызов cpu_percent только запоминает начальные счетчики
+        self.process.cpu_percent(None)
+        psutil.cpu_percent(None, percpu=True)
+        self._sample()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='resource-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+def _Stage(events: List[tuple], tid: int, t: float) -> Optional[str]:
+    """Самый вложенный интервал потока tid, активный в момент t"""
+    stage = None
+    stage_start = float('-inf')
+    for name, _cat, start, duration, _pid, span_tid, _thread, args in events:
+        if span_tid == tid and start <= t <= start + duration and start >= stage_start:
+            stage = f"{name} {args['layer']}" if 'layer' in args else name
+            stage_start = start
+
+    return stage
+
+def AnnotateSamples(samples: List[Dict], events: List[tuple], tid: int, origin: float) -> List[Dict]:
+    """Отсчеты с этапом конвейера и числом занятых исполнителей
+
+    Этап — самый вложенный интервал трассировки в потоке tid (потоке
+    RunFill), busy — число других потоков и процессов с активным
+    интервалом (плитки, препятствия слоев). Время отсчитывается от origin, сек.
+    """
+    # Замеры отдельных элементов (SampledClipper) не являются этапами
+    events = [event for event in events if event[1] != 'sample']
+    annotated = []
+    for sample in samples:
+        t = sample['time']
+        busy = {(pid, span_tid) for _name, _cat, start, duration, pid, span_tid, _thread, _args in events
+                if span_tid != tid and start <= t <= start + duration}
+        annotated.append(dict(sample, time=t - origin, stage=_Stage(events, tid, t) or 'other', busy=len(busy)))
+
+    return annotated
+
+def SummarizeSamples(samples: List[Dict]) -> Dict[str, Dict]:
+    """Сводка отсчетов по этапам (AnnotateSamples) в порядке первого появления
+
+    Returns:
+        Dict[str, Dict]: samples, rss_mb (макс.), cpu (средняя загрузка процесса, %),
+        cores (средняя загрузка ядер, %), threads (макс.), busy (макс.),
+        children_rss_mb, children_cpu, read_mb и write_mb (прирост за этап)
+    """
+    stages = {}
+    io = {}
+    previous = None
+    for sample in samples:
+        stages.setdefault(sample['stage'], []).append(sample)
+        # Ввод-вывод между соседними отсчетами относится к этапу позднего отсчета
+        stage_io = io.setdefault(sample['stage'], [0, 0])
+        if previous is not None and sample['read_bytes'] is not None:
+            stage_io[0] += sample['read_bytes'] - previous['read_bytes']
+            stage_io[1] += sample['write_bytes'] - previous['write_bytes']
+        previous = sample
+
+    summary = {}
+    for stage, stage_samples in stages.items():
+        count = len(stage_samples)
+        cores = [sum(s['cores']) / max(len(s['cores']), 1) for s in stage_samples]
+        summary[stage] = {
+            'samples': count,
+            'rss_mb': max(s['rss'] for s in stage_samples) / 2**20,
+            'cpu': sum(s['cpu'] for s in stage_samples) / count,
+            'cores': sum(cores) / count,
+            'threads': max(s['threads'] for s in stage_samples),
+            'busy': max(s['busy'] for s in stage_samples),
+            'children_rss_mb': max(s['children_rss'] for s in stage_samples) / 2**20,
+            'children_cpu': sum(s['children_cpu'] for s in stage_samples) / count,
+            'read_mb': io[stage][0] / 2**20,
+            'write_mb': io[stage][1] / 2**20
+        }
+
+    return summary
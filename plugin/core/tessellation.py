@@ -0,0 +1,81 @@
+import math
+import numpy as np
+
+from typing import Tuple
+
+# Наибольшее отклонение хорды от дуги по умолчанию, мкм (как ARC_HIGH_DEF в KiCad)
+MAX_CHORD_ERROR = 5.0
+# Наименьшее число сторон многоугольника окружности
+MIN_CIRCLE_SEGMENTS = 6
+
+def SegmentCount(radius: float, sweep: float = 2*math.pi, max_error: float = MAX_CHORD_ERROR, min_segments: int = 1) -> int:
+    """Число хорд дуги, при котором отклонение от дуги не больше max_error
+
+    Хорда с центральным углом θ отстоит от дуги на r·(1 - cos(θ/2)).
+
+    Args:
+        radius (float): Радиус дуги
+        sweep (float, optional): Центральный угол дуги. Defaults to 2*math.pi.
+        max_error (float, optional): Допустимое отклонение хорды. Defaults to MAX_CHORD_ERROR.
+        min_segments (int, optional): Наименьшее число хорд. Defaults to 1.
+
+    Returns:
+        int: Число хорд
+    """
+    sweep = abs(sweep)
+    if radius <= max_error or max_error <= 0:
+        return min_segments
+    step = 2 * math.acos(1 - max_error / radius)
+
+    return max(min_segments, int(math.ceil(sweep / step)))
+
+def SegmentCounts(radii: np.ndarray, max_error: float = MAX_CHORD_ERROR, min_segments: int = MIN_CIRCLE_SEGMENTS) -> np.ndarray:
+    """SegmentCount для массива полных окружностей"""
+    radii = np.asarray(radii, dtype=float)
+    ratio = np.clip(1 - max_error / np.maximum(radii, 1e-12), -1.0, 1.0)
+    with np.errstate(divide='ignore'):
+        counts = np.ceil(2 * math.pi / (2 * np.arccos(ratio)))
+    counts[~np.isfinite(counts)] = min_segments
+
+    return np.maximum(counts, min_segments).astype(np.int64)
+
+def ArcPoints(center: Tuple[float, float], radius: float, start_angle: float, sweep: float,
+              max_error: float = MAX_CHORD_ERROR) -> np.ndarray:
+    """Точки дуги от start_angle на угол sweep, включая оба конца
+
+    Returns:
+        np.ndarray: Координаты (n + 1, 2)
+    """
+    count = SegmentCount(radius, sweep, max_error)
+    angles = start_angle + sweep * np.arange(count + 1) / count
+
+    return np.column_stack((center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)))
+
+def CirclePoints(center: Tuple[float, float], radius: float, max_error: float = MAX_CHORD_ERROR) -> np.ndarray:
+    """Вершины вписанного многоугольника окружности (без повтора первой)
+
+    Returns:
+        np.ndarray: Координаты (n, 2)
+    """
+    count = SegmentCount(radius, 2*math.pi, max_error, MIN_CIRCLE_SEGMENTS)
+    angles = 2 * math.pi * np.arange(count) / count
+
+    return np.column_stack((center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)))
+
+def QuadSegments(radius: float, max_error: float = MAX_CHORD_ERROR) -> int:
+    """Число хорд на четверть окружности для buffer(radius, quad_segs=...)"""
+    return SegmentCount(abs(radius), math.pi / 2, max_error)
+
+def BufferDistance(distance: float, max_error: float = MAX_CHORD_ERROR) -> Tuple[float, int]:
+    """Расстояние и quad_segs для buffer с вершинами скруглений на описанной окружности
+
+    Хорды вписанного многоугольника срезают до max_error зазора. На радиусе
+    distance / cos(π / (4·quad_segs)) хорды касаются окружности радиуса
+    distance: отклонение лежит снаружи зазора, как у зазоров KiCad.
+
+    Returns:
+        Tuple[float, int]: Расстояние buffer (со знаком distance) и quad_segs
+    """
+    quad_segs = QuadSegments(distance, max_error)
+
+    return distance / math.cos(math.pi / (4 * quad_segs)), quad_segs
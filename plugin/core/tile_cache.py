@@ -0,0 +1,141 @@
+import os
+import json
+import hashlib
+import logging
+import numpy as np
+import shapely
+
+from typing import Dict, List, Optional
+
+from .clipping import MIN_AREA, ObstacleIndex
+from .engines import ConcatPacked
+from .tessellation import MAX_CHORD_ERROR
+
+logger = logging.getLogger('log')
+
+# Каталог кэша рядом с платой
+CACHE_DIR = '.copper_filler'
+# Версия формата кэша и отпечатков: при изменении все плитки пересчитываются
+CACHE_VERSION = 2
+
+def BoardCacheDir(board_file: str) -> Optional[str]:
+    """Каталог кэшей платы (None для несохраненной платы)
+
+    У каждой платы свой каталог: платы одной папки, заполняемые
+    параллельно (манифест), не пишут в общие файлы.
+    """
+    if not board_file:
+        return None
+    stem = os.path.splitext(os.path.basename(board_file))[0]
+
+    return os.path.join(os.path.dirname(board_file), CACHE_DIR, stem)
+
+def TileCachePath(board_file: str, layer_name: str) -> Optional[str]:
+    """Путь к кэшу плиток слоя (None для несохраненной платы)"""
+    cache_dir = BoardCacheDir(board_file)
+
+    return os.path.join(cache_dir, f"{layer_name}.npz") if cache_dir else None
+
+def TileFingerprint(edges: Dict, params: Dict, step: float, outer, obstacles: ObstacleIndex) -> str:
+    """Отпечаток входных данных плитки
+
+    Учитывает параметры сетки, границы плитки и геометрию контура платы и
+    препятствий, обрезанную по области плитки ('clip'). Изменение
+    препятствия вне этой области не меняет отпечаток.
+
+    Args:
+        edges (Dict): Плитка из SplitIntoTiles
+        params (Dict): Параметры заполнения
+        step (float): Зазор между элементами
+        outer: Внешний контур платы
+        obstacles (ObstacleIndex): Вырезы и препятствия
+
+    Returns:
+        str: sha1 в шестнадцатеричном виде
+    """
+    section = shapely.box(*edges['clip'])
+    digest = hashlib.sha1(json.dumps({
+        'version': CACHE_VERSION,
+        'kind': params['kind'],
+        'size': params['size_mm'],
+        'max_chord_error': params.get('max_chord_error', MAX_CHORD_ERROR),
+        'shift': (params['shift_x'], params['shift_y']),
+        'step': step,
+        'min_area': MIN_AREA,
+        'edges': (edges['start_x'], edges['start_y'], edges['end_x'], edges['end_y']),
+        'clip': edges['clip']
+    }, sort_keys=True).encode())
+
+    digest.update(shapely.to_wkb(shapely.normalize(shapely.intersection(outer, section))))
+    parts = shapely.intersection(obstacles.query(section), section)
+    parts = parts[~shapely.is_empty(parts)]
+    for wkb in sorted(shapely.to_wkb(shapely.normalize(parts))):
+        digest.update(wkb)
+
+    return digest.hexdigest()
+
+class TileCache:
+    """Результаты плиток прошлого запуска по отпечаткам входных данных
+
+    Хранится одним .npz: отпечатки, число контуров каждой плитки, счетчики
+    элементов и упакованные контуры всех плиток (PackPolygons).
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+
+    def load(self) -> 'TileCache':
+        if not os.path.exists(self.path):
+            return self
+
+        try:
+            with np.load(self.path) as data:
+                if int(data['version']) != CACHE_VERSION:
+                    return self
+                coords, offsets = data['coords'], data['offsets']
+                first = 0
+                for key, count, total, clipped in zip(data['keys'], data['counts'], data['total_shapes'], data['clipped_shapes']):
+                    tile_offsets = offsets[first:first + count + 1]
+                    self.entries[str(key)] = {
+                        'coords': coords[tile_offsets[0]:tile_offsets[-1]],
+                        'offsets': tile_offsets - tile_offsets[0],
+                        'total_shapes': int(total),
+                        'clipped_shapes': int(clipped)
+                    }
+                    first += count
+        except Exception as e:
+            logger.warning(_("Tile cache is not readable, full refill: {e}").format(e=str(e)))
+            self.entries = {}
+
+        return self
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.entries.get(key)
+
+    def put(self, key: str, result: Dict):
+        self.entries[key] = {
+            'coords': result['coords'],
+            'offsets': result['offsets'],
+            'total_shapes': result['total_shapes'],
+            'clipped_shapes': result['clipped_shapes']
+        }
+
+    def save(self, keys: List[str]):
+        """Запись плиток текущего запуска (остальные записи отбрасываются)"""
+        entries = [self.entries[key] for key in keys]
+        coords, offsets = ConcatPacked((e['coords'], e['offsets']) for e in entries)
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Свой временный файл у каждого процесса: на место кэша попадает только полная запись
+        tmp_path = f"{os.path.splitext(self.path)[0]}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            version=CACHE_VERSION,
+            keys=np.array(keys, dtype='U40'),
+            counts=np.array([len(e['offsets']) - 1 for e in entries], dtype=np.int64),
+            total_shapes=np.array([e['total_shapes'] for e in entries], dtype=np.int64),
+            clipped_shapes=np.array([e['clipped_shapes'] for e in entries], dtype=np.int64),
+            coords=coords,
+            offsets=offsets
+        )
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import threading
+
+from typing import Dict, Iterable, List
+
+class Span:
+    """Интервал этапа: время начала и длительность по time.perf_counter
+
+    Длительность измеряется всегда (ею пользуются счетчики времени этапов),
+    а запись в трассировку зависит от трассировщика.
+    """
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start', 'duration')
+
+    def __init__(self, tracer, name: str, cat: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0.0
+        self.duration = 0.0
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.duration = time.perf_counter() - self.start
+        self.tracer.record(self)
+        return False
+
+class Tracer:
+    """Трассировка этапов заполнения с привязкой к потокам и процессам
+
+    События хранятся кортежами (name, cat, start, duration, pid, tid,
+    thread, args) с абсолютным временем perf_counter: его часы общие для
+    процессов одной машины, поэтому события процессов-исполнителей
+    (events) добавляются в трассировку основного процесса через extend().
+
+    Attributes:
+        sample_every (int): Замер каждого N-го элемента (0 — без замеров элементов)
+        events (List[tuple]): Записанные интервалы
+        counters (List[tuple]): Значения счетчиков (name, time, values)
+    """
+    def __init__(self, sample_every: int = 0):
+        self.sample_every = int(sample_every or 0)
+        self.origin = time.perf_counter()
+        self.events = []
+        self.counters = []
+
+    def span(self, name: str, cat: str = 'fill', **args) -> Span:
+        return Span(self, name, cat, args)
+
+    def record(self, span: Span):
+        thread = threading.current_thread()
+        # list.append атомарен: потоки пула пишут без блокировки
+        self.events.append((span.name, span.cat, span.start, span.duration,
+                            os.getpid(), threading.get_native_id(), thread.name, span.args))
+
+    def extend(self, events: Iterable[tuple]):
+        """Добавление событий другого трассировщика (процесса-исполнителя)"""
+        self.events.extend(events)
+
+    def counter(self, name: str, t: float, values: Dict):
+        """Значения счетчика в момент t (time.perf_counter), дорожка счетчика в трассировке Chrome"""
+        self.counters.append((name, t, values))
+
+    def chrome_trace(self) -> Dict:
+        """События в формате Chrome Trace Event (chrome://tracing, Perfetto)"""
+        trace_events = []
+        threads = {}
+        for name, cat, start, duration, pid, tid, thread, args in self.events:
+            threads[(pid, tid)] = thread
+            trace_events.append({
+                'name': name,
+                'cat': cat,
+                'ph': 'X',
+                'ts': (start - self.origin) * 1e6,
+                'dur': duration * 1e6,
+                'pid': pid,
+                'tid': tid,
+                'args': args
+            })
+        for (pid, tid), thread in threads.items():
+            trace_events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread}})
+        for name, t, values in self.counters:
+            trace_events.append({'name': name, 'ph': 'C', 'ts': (t - self.origin) * 1e6, 'pid': os.getpid(), 'args': values})
+        for pid in {pid for pid, _tid in threads}:
+            name = 'main' if pid == os.getpid() else f'worker {pid}'
+            trace_events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': name}})
+
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def save(self, path: str):
+        """Запись трассировки Chrome в файл JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def report(self) -> Dict:
+        """Сводка интервалов по именам и по потокам, сек
+
+        Returns:
+            Dict: spans — count, total, min, max, mean по имени интервала;
+            threads — число интервалов и время верхнеуровневых интервалов потока
+        """
+        spans = {}
+        threads = {}
+        for name, _cat, _start, duration, pid, _tid, thread, _args in self.events:
+            stats = spans.setdefault(name, {'count': 0, 'total': 0.0, 'min': duration, 'max': duration})
+            stats['count'] += 1
+            stats['total'] += duration
+            stats['min'] = min(stats['min'], duration)
+            stats['max'] = max(stats['max'], duration)
+
+            threads.setdefault(_ThreadKey(pid, thread), {'spans': 0, 'busy': 0.0})['spans'] += 1
+        for stats in spans.values():
+            stats['mean'] = stats['total'] / stats['count']
+
+        # Занятость потока — по интервалам, не вложенным в другие интервалы того же потока
+        for key, busy in _ThreadBusy(self.events).items():
+            threads[key]['busy'] = busy
+
+        return {'spans': spans, 'threads': threads, 'sample_every': self.sample_every}
+
+def _ThreadKey(pid: int, thread: str) -> str:
+    """Имя потока в сводке; потоки процессов-исполнителей — с номером процесса"""
+    return thread if pid == os.getpid() else f'{pid}/{thread}'
+
+def _ThreadBusy(events: List[tuple]) -> Dict:
+    """Время верхнеуровневых интервалов каждого потока"""
+    by_thread = {}
+    for _name, _cat, start, duration, pid, _tid, thread, _args in events:
+        by_thread.setdefault(_ThreadKey(pid, thread), []).append((start, start + duration))
+
+    busy = {}
+    for key, intervals in by_thread.items():
+        intervals.sort()
+        total = 0.0
+        end = float('-inf')
+        for start, stop in intervals:
+            if start >= end:
+                total += stop - start
+                end = stop
+            elif stop > end:
+                total += stop - end
+                end = stop
+        busy[key] = total
+
+    return busy
+
+class NullTracer:
+    """Заглушка трассировки: интервалы измеряются, но не записываются"""
+    sample_every = 0
+    events = ()
+
+    def span(self, name: str, cat: str = 'fill', **args) -> Span:
+        return Span(self, name, cat, args)
+
+    def record(self, span: Span):
+        pass
+
+    def extend(self, events: Iterable[tuple]):
+        pass
+
+    def counter(self, name: str, t: float, values: Dict):
+        pass
+
+NULL_TRACER = NullTracer()
+
+class SampledClipper:
+    """Обертка ShapeClipper, замеряющая каждый N-й вызов clip()
+
+    Замеры элементов включаются только трассировкой с sample_every > 0,
+    без нее движки получают исходный ShapeClipper.
+    """
+    def __init__(self, clipper, tracer: Tracer):
+        self.clipper = clipper
+        self.tracer = tracer
+        self.every = tracer.sample_every
+        self.calls = 0
+
+    def clip(self, cell):
+        self.calls += 1
+        if self.calls % self.every:
+            return self.clipper.clip(cell)
+        with self.tracer.span('clip-element', 'sample'):
+            return self.clipper.clip(cell)
+
+    def __getattr__(self, name):
+        return getattr(self.clipper, name)
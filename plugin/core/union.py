@@ -0,0 +1,131 @@
+import math
+import time
+import logging
+import numpy as np
+import psutil
+import shapely
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from .clipping import ExplodePolygons
+
+logger = logging.getLogger('log')
+
+# Меньше геометрий объединяются одним вызовом: накладные расходы разбиения не окупаются
+MIN_PARTITIONED = 512
+# Ячеек разбиения на один поток (выравнивает нагрузку при неравномерной плотности)
+CELLS_PER_WORKER = 4
+
+def _PartitionBoxes(bounds, count: int) -> np.ndarray:
+    """Прямоугольники сетки примерно из count ячеек с учетом пропорций габарита"""
+    min_x, min_y, max_x, max_y = bounds
+    width = max(max_x - min_x, 1e-9)
+    height = max(max_y - min_y, 1e-9)
+    nx = max(1, int(round(math.sqrt(count * width / height))))
+    ny = max(1, int(math.ceil(count / nx)))
+
+    xs = np.linspace(min_x, max_x, nx + 1)
+    ys = np.linspace(min_y, max_y, ny + 1)
+    x0, y0 = np.meshgrid(xs[:-1], ys[:-1])
+    x1, y1 = np.meshgrid(xs[1:], ys[1:])
+
+    return shapely.box(x0.ravel(), y0.ravel(), x1.ravel(), y1.ravel())
+
+def PartitionUnions(geoms, workers: int = None) -> Tuple[np.ndarray, List]:
+    """Объединения геометрий по ячейкам пространственного разбиения
+
+    Каждая ячейка объединяет задевающие ее геометрии и обрезается по своему
+    прямоугольнику, поэтому результаты ячеек не перекрываются. Ячейки
+    обрабатываются в пуле потоков (операции GEOS отпускают GIL).
+
+    Args:
+        geoms: Геометрии (None и пустые пропускаются)
+        workers (int): Число потоков (по умолчанию физические ядра)
+
+    Returns:
+        Tuple[np.ndarray, List]: Прямоугольники ячеек и объединения в них
+    """
+    geoms = np.asarray(geoms, dtype=object)
+    geoms = geoms[~(shapely.is_missing(geoms) | shapely.is_empty(geoms))]
+    if len(geoms) == 0:
+        return np.empty(0, dtype=object), []
+
+    workers = workers or max(1, int(psutil.cpu_count(logical=False) or 1))
+    boxes = _PartitionBoxes(shapely.total_bounds(geoms), workers * CELLS_PER_WORKER)
+    tree = shapely.STRtree(geoms)
+
+    def union_cell(box):
+        members = geoms[tree.query(box, predicate='intersects')]
+        if len(members) == 0:
+            return None
+        return shapely.intersection(shapely.union_all(members), box)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        unions = list(executor.map(union_cell, boxes))
+
+    keep = [i for i, u in enumerate(unions) if u is not None and not u.is_empty]
+    return boxes[keep], [unions[i] for i in keep]
+
+# Допуск касания швов сетки, мкм
+SEAM_TOLERANCE = 1e-6
+
+def MergeCoverage(boxes: np.ndarray, parts: List):
+    """Слияние неперекрывающихся объединений ячеек (coverage-style)
+
+    Части ячеек не перекрываются, поэтому полигоны, не касающиеся
+    внутренних швов сетки, уже окончательны и переносятся без пересчета;
+    объединяются только полигоны на швах. Если результат невалиден,
+    выполняется полное объединение.
+
+    Args:
+        boxes (np.ndarray): Прямоугольники ячеек из PartitionUnions
+        parts (List): Объединения в ячейках
+
+    Returns:
+        Объединенная геометрия
+    """
+    if not parts:
+        return shapely.GeometryCollection()
+
+    polygons = ExplodePolygons(parts)
+    envelope = shapely.envelope(shapely.union_all(boxes))
+    seams = shapely.difference(shapely.union_all(shapely.boundary(boxes)), shapely.boundary(envelope))
+
+    on_seam = shapely.dwithin(polygons, seams, SEAM_TOLERANCE)
+    merged = ExplodePolygons([shapely.union_all(polygons[on_seam])])
+    result = shapely.multipolygons(np.concatenate([polygons[~on_seam], merged]))
+    if shapely.is_valid(result):
+        return result
+
+    logger.debug(_("Seam merge is not valid, full union of {count} parts").format(count=len(polygons)))
+    return shapely.union_all(polygons)
+
+def PartitionedUnion(geoms, merge: bool = True, workers: int = None):
+    """Объединение препятствий с разбиением по ячейкам в пуле потоков
+
+    Args:
+        geoms: Геометрии препятствий
+        merge (bool): True — единая геометрия (слияние ячеек по швам),
+            False — мультиполигон из частей ячеек без слияния по швам
+        workers (int): Число потоков (при одновременных объединениях — их доля ядер)
+
+    Returns:
+        Объединенная геометрия
+    """
+    geoms = np.asarray(geoms, dtype=object)
+    if len(geoms) < MIN_PARTITIONED:
+        return shapely.union_all(geoms)
+
+    start_time = time.time()
+    boxes, parts = PartitionUnions(geoms, workers)
+    if merge:
+        result = MergeCoverage(boxes, parts)
+    else:
+        result = shapely.multipolygons(ExplodePolygons(parts))
+
+    # Память процесса не относится к одному объединению (слои строятся одновременно): она в сводке этапа
+    logger.info(_("Union: {count} geoms, {cells} cells, merge: {merge}, {union_time:.3f} sec").format(
+        count=len(geoms), cells=len(boxes), merge=merge, union_time=time.time() - start_time))
+
+    return result
@@ -1,3 +1,6 @@
+import numpy as np
+import shapely
+
 SCALE = 1e3
 
 def MkrToNm(value: int) -> int:
@@ -12,4 +15,8 @@ def MmToMkr(value: float) -> int:
 def RoundCoordsTransform(x, y, z=None):
     if z is not None:
         return round(x, 2), round(y, 2), round(z, 2)
-    return round(x, 2), round(y, 2)
\ No newline at end of file
+    return round(x, 2), round(y, 2)
+
+def RoundCoords(geoms):
+    """Округление координат массива геометрий одним векторным действием (как RoundCoordsTransform)"""
+    return shapely.transform(geoms, lambda coords: np.round(coords, 2))
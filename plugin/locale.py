@@ -2,7 +2,16 @@ import gettext
 import os
 import locale
 
+# Язык последнего init_locale: дочерние процессы включают тот же
+_current = 'Default'
+
+def current_locale() -> str:
+    return _current
+
 def init_locale(lang: str = 'Default'):
+    global _current
+    _current = lang
+
     if lang == 'Русский':
         lang = "ru"
     elif lang == 'Default':
@@ -5,6 +5,7 @@ from pathlib import Path
 class Logger():
     def __init__(self, dir: Path):
         self.log_dir = dir
+        self.log_file = None
         self.logger = None
     
     def setup_logger(self):
@@ -16,10 +17,10 @@ class Logger():
             datefmt='%Y-%m-%d %H:%M:%S'
         )
 
-        log_file = self.log_dir / "logs" / f"{datetime.now().strftime('%Y%m%d %H%M%S')}.log"
-        log_file.parent.mkdir(parents=True, exist_ok=True)
+        self.log_file = self.log_dir / "logs" / f"{datetime.now().strftime('%Y%m%d %H%M%S')}.log"
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
         
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler = logging.FileHandler(self.log_file, encoding='utf-8')
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
 
@@ -7,6 +7,7 @@ import os
 from typing import List, Dict
 
 from .color import create_layer_colors_from_json
+from ..core.settings import ENGINES, BACKENDS, OUTPUTS
 
 ###########################################################################
 ## Class CopperFillerDialog
@@ -21,12 +22,14 @@ class CopperFillerDialog ( wx.Dialog ):
             id = wx.ID_ANY, 
             title = _(u"Settings CopperFiller"), 
             pos = wx.DefaultPosition, 
-            size = wx.Size( 350,500 ), 
+            size = wx.Size( 350,790 ), 
             style = wx.DEFAULT_DIALOG_STYLE|wx.RESIZE_BORDER
             )
         
         self.board_class = board_class
         self.settings_file = settings
+        # Настройки без элементов в диалоге (например, raster_resolution) сохраняются как есть
+        self.loaded_settings = {}
 
         json_color = dict()
         with open(colors, 'r') as f:
@@ -39,17 +42,20 @@ class CopperFillerDialog ( wx.Dialog ):
 
         main_sizer = wx.BoxSizer( wx.VERTICAL )
 
-        layer_sizer = wx.StaticBoxSizer( wx.HORIZONTAL, self, _(u"Layer") )
+        layer_sizer = wx.StaticBoxSizer( wx.HORIZONTAL, self, _(u"Layers") )
 
         self.layer_color = wx.StaticText( layer_sizer.GetStaticBox(), wx.ID_ANY, u"\u2588", wx.DefaultPosition, wx.DefaultSize, 0 )
         self.layer_color.Wrap( -1 )
 
         layer_sizer.Add( self.layer_color, 0, wx.ALIGN_CENTER|wx.ALL, 5 )
 
+        # Несколько слоев заполняются за один запуск
         layer_choiceChoices = active_layers
-        self.layer_choice = wx.ComboBox( layer_sizer.GetStaticBox(), wx.ID_ANY, wx.EmptyString, wx.DefaultPosition, wx.DefaultSize, layer_choiceChoices, 0 )
-        self.layer_choice.SetSelection( 0 )
-        layer_sizer.Add( self.layer_choice, 1, wx.ALIGN_CENTER|wx.ALL, 5 )
+        self.layer_choice = wx.CheckListBox( layer_sizer.GetStaticBox(), wx.ID_ANY, wx.DefaultPosition, wx.Size( -1,100 ), layer_choiceChoices, 0 )
+        if layer_choiceChoices:
+            self.layer_choice.SetSelection( 0 )
+            self.layer_choice.Check( 0 )
+        layer_sizer.Add( self.layer_choice, 1, wx.EXPAND|wx.ALL, 5 )
 
         main_sizer.Add( layer_sizer, 1, wx.ALL|wx.EXPAND, 5 )
 
@@ -127,6 +133,59 @@ class CopperFillerDialog ( wx.Dialog ):
 
         main_sizer.Add( pattern_sizer, 1, wx.EXPAND, 5 )
 
+        processing_sizer = wx.StaticBoxSizer( wx.VERTICAL, self, _(u"Processing") )
+
+        engine_sizer = wx.BoxSizer( wx.HORIZONTAL )
+
+        self.engine_label = wx.StaticText( processing_sizer.GetStaticBox(), wx.ID_ANY, _(u"Engine:"), wx.DefaultPosition, wx.DefaultSize, 0 )
+        self.engine_label.Wrap( -1 )
+
+        engine_sizer.Add( self.engine_label, 0, wx.ALIGN_CENTER|wx.ALL, 5 )
+
+        engine_choiceChoices = [ _(u"Loop"), _(u"Batch"), _(u"Quadtree"), _(u"Raster") ]
+        self.engine_choice = wx.ComboBox( processing_sizer.GetStaticBox(), wx.ID_ANY, wx.EmptyString, wx.DefaultPosition, wx.DefaultSize, engine_choiceChoices, wx.CB_READONLY )
+        self.engine_choice.SetSelection( 0 )
+        engine_sizer.Add( self.engine_choice, 1, wx.ALIGN_CENTER|wx.ALL, 5 )
+
+        processing_sizer.Add( engine_sizer, 0, wx.EXPAND, 5 )
+
+        backend_sizer = wx.BoxSizer( wx.HORIZONTAL )
+
+        self.backend_label = wx.StaticText( processing_sizer.GetStaticBox(), wx.ID_ANY, _(u"Backend:"), wx.DefaultPosition, wx.DefaultSize, 0 )
+        self.backend_label.Wrap( -1 )
+
+        backend_sizer.Add( self.backend_label, 0, wx.ALIGN_CENTER|wx.ALL, 5 )
+
+        backend_choiceChoices = [ _(u"Threads"), _(u"Processes") ]
+        self.backend_choice = wx.ComboBox( processing_sizer.GetStaticBox(), wx.ID_ANY, wx.EmptyString, wx.DefaultPosition, wx.DefaultSize, backend_choiceChoices, wx.CB_READONLY )
+        self.backend_choice.SetSelection( 0 )
+        backend_sizer.Add( self.backend_choice, 1, wx.ALIGN_CENTER|wx.ALL, 5 )
+
+        processing_sizer.Add( backend_sizer, 0, wx.EXPAND, 5 )
+
+        output_sizer = wx.BoxSizer( wx.HORIZONTAL )
+
+        self.output_label = wx.StaticText( processing_sizer.GetStaticBox(), wx.ID_ANY, _(u"Output:"), wx.DefaultPosition, wx.DefaultSize, 0 )
+        self.output_label.Wrap( -1 )
+
+        output_sizer.Add( self.output_label, 0, wx.ALIGN_CENTER|wx.ALL, 5 )
+
+        output_choiceChoices = [ _(u"Zone outline"), _(u"Pre-filled zone"), _(u"Hatched zone (squares)") ]
+        self.output_choice = wx.ComboBox( processing_sizer.GetStaticBox(), wx.ID_ANY, wx.EmptyString, wx.DefaultPosition, wx.DefaultSize, output_choiceChoices, wx.CB_READONLY )
+        self.output_choice.SetSelection( 0 )
+        output_sizer.Add( self.output_choice, 1, wx.ALIGN_CENTER|wx.ALL, 5 )
+
+        processing_sizer.Add( output_sizer, 0, wx.EXPAND, 5 )
+
+        self.validate_checkBox = wx.CheckBox( processing_sizer.GetStaticBox(), wx.ID_ANY, _(u"Validate with zone filler"), wx.DefaultPosition, wx.DefaultSize, wx.CHK_2STATE )
+        processing_sizer.Add( self.validate_checkBox, 0, wx.ALL, 5 )
+
+        self.incremental_checkBox = wx.CheckBox( processing_sizer.GetStaticBox(), wx.ID_ANY, _(u"Reuse unchanged tiles"), wx.DefaultPosition, wx.DefaultSize, wx.CHK_2STATE )
+        self.incremental_checkBox.SetValue( False )
+        processing_sizer.Add( self.incremental_checkBox, 0, wx.ALL, 5 )
+
+        main_sizer.Add( processing_sizer, 0, wx.EXPAND, 5 )
+
         class_sizer = wx.StaticBoxSizer( wx.VERTICAL, self, _(u"Class") )
         
         class_clearance_sizer = wx.BoxSizer( wx.HORIZONTAL )
@@ -179,7 +238,8 @@ class CopperFillerDialog ( wx.Dialog ):
         main_sizer.Add( sdbSizer, 1, wx.EXPAND, 5 )
 
         # Bindings
-        self.layer_choice.Bind(wx.EVT_COMBOBOX, self.OnLayerChange)
+        self.layer_choice.Bind(wx.EVT_LISTBOX, self.OnLayerChange)
+        self.layer_choice.Bind(wx.EVT_CHECKLISTBOX, self.OnLayerChange)
         self.class_choice.Bind(wx.EVT_COMBOBOX, self.OnComboBind)
         self.density_slider.Bind(wx.EVT_SLIDER, self.OnDensitySliderChange)
         self.density_spinCtrl.Bind(wx.EVT_SPINCTRL, self.OnDensitySpinChange)
@@ -202,7 +262,11 @@ class CopperFillerDialog ( wx.Dialog ):
 
     def UpdateLayerColor(self):
         """Обновляет цвет текста в зависимости от выбранного слоя"""
-        selected_layer = self.layer_choice.GetString(self.layer_choice.GetSelection())
+        selection = self.layer_choice.GetSelection()
+        if selection == wx.NOT_FOUND:
+            checked = self.layer_choice.GetCheckedItems()
+            selection = checked[0] if checked else 0
+        selected_layer = self.layer_choice.GetString(selection) if self.layer_choice.GetCount() else ''
         
         # Определяем цвет для выбранного слоя
         layer_color = self.layer_colors.get(selected_layer, self.default_layer_color)
@@ -264,11 +328,15 @@ class CopperFillerDialog ( wx.Dialog ):
     
     def ApplySettings(self, settings: Dict):
         """Применяет настройки к элементам UI"""
+        self.loaded_settings = dict(settings)
 
-        if 'layer_name' in settings:
-            layer_index = self.layer_choice.FindString(settings['layer_name'])
-            if layer_index != wx.NOT_FOUND:
-                self.layer_choice.SetSelection(layer_index)
+        # Прежние настройки хранят один слой в layer_name
+        layers = settings.get('layers') or ([settings['layer_name']] if 'layer_name' in settings else [])
+        indexes = [self.layer_choice.FindString(layer) for layer in layers]
+        indexes = [i for i in indexes if i != wx.NOT_FOUND]
+        if indexes:
+            self.layer_choice.SetCheckedItems(indexes)
+            self.layer_choice.SetSelection(indexes[0])
 
         if 'kind' in settings:
             shape_index = self.shape_choice.FindString(settings['kind'])
@@ -306,6 +374,21 @@ class CopperFillerDialog ( wx.Dialog ):
             except:
                 pass
 
+        if settings.get('engine') in ENGINES:
+            self.engine_choice.SetSelection(ENGINES.index(settings['engine']))
+
+        if settings.get('backend') in BACKENDS:
+            self.backend_choice.SetSelection(BACKENDS.index(settings['backend']))
+
+        if settings.get('output') in OUTPUTS:
+            self.output_choice.SetSelection(OUTPUTS.index(settings['output']))
+
+        if 'validate_fill' in settings:
+            self.validate_checkBox.SetValue(bool(settings['validate_fill']))
+
+        if 'incremental' in settings:
+            self.incremental_checkBox.SetValue(bool(settings['incremental']))
+
         if 'class' in settings:
             try:
                 class_index = self.class_choice.FindString(f"Класс {settings['class']}")
@@ -315,9 +398,14 @@ class CopperFillerDialog ( wx.Dialog ):
                 pass
 
     def GetValues(self):
-        vals = {}
-        layer_index = self.layer_choice.GetSelection()
-        vals["layer_name"] = self.layer_choice.GetString(layer_index)
+        vals = dict(self.loaded_settings)
+        layers = list(self.layer_choice.GetCheckedStrings())
+        if not layers:
+            # Без отмеченных слоев заполняется выделенный
+            layer_index = max(0, self.layer_choice.GetSelection())
+            layers = [self.layer_choice.GetString(layer_index)]
+        vals["layers"] = layers
+        vals["layer_name"] = layers[0]
         vals["kind"] = self.shape_choice.GetString(self.shape_choice.GetSelection())
         vals["size_mm"] = max(0.6, min(2.0, float(self.size_spinCtrlDouble.GetValue())))
         vals["density"] = max(25, min(90, int(self.density_slider.GetValue())))
@@ -327,6 +415,11 @@ class CopperFillerDialog ( wx.Dialog ):
         except Exception:
             vals["shift_x"] = 0
             vals["shift_y"] = 0
+        vals["engine"] = ENGINES[max(0, self.engine_choice.GetSelection())]
+        vals["backend"] = BACKENDS[max(0, self.backend_choice.GetSelection())]
+        vals["output"] = OUTPUTS[max(0, self.output_choice.GetSelection())]
+        vals["validate_fill"] = bool(self.validate_checkBox.GetValue())
+        vals["incremental"] = bool(self.incremental_checkBox.GetValue())
         class_index = self.class_choice.GetSelection() + 1
         vals["class"] = class_index
         try:
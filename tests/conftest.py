@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Ядро плагина импортирует pcbnew: тесты работают на заменителе из бенчмарков
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fake_pcbnew
+fake_pcbnew.Install()
+
+from plugin.locale import init_locale
+init_locale('English')
@@ -0,0 +1,60 @@
+import pytest
+import shapely
+
+import pcbnew
+
+from plugin.core.utils import SCALE
+from plugin.core.clipping import ObstacleIndex
+from plugin.core.engines import GRID_ENGINES, PackPolygons, RingAreas
+from plugin.core.grid import SplitIntoTiles
+from plugin.core.assembly import BuildPolySet, SetPrefilled, FilledArea
+from plugin.core.pipeline import ProcessSectionGrid, StepFromDensity
+
+# Квадратные элементы 2 мм, один из них (0..2000 мкм) накрывает отверстие r = 650 мкм
+PARAMS = {'kind': 'Square', 'size_mm': 2000, 'density': 80, 'shift_x': 0, 'shift_y': 0}
+BOARD = {'start_x': 0, 'start_y': 0, 'end_x': 6000, 'end_y': 6000}
+VIA = shapely.Point(1000, 1000).buffer(650)
+
+def _FillBoard(engine):
+    step = StepFromDensity(PARAMS['density'], PARAMS['size_mm'])
+    params = dict(PARAMS, engine=engine)
+    tile, = SplitIntoTiles(BOARD, params, step)
+    outer = shapely.box(0, 0, 6000, 6000)
+
+    return ProcessSectionGrid(tile, params, step, 0, outer, ObstacleIndex([VIA]))
+
+def test_pack_keeps_holes():
+    cell = shapely.box(0, 0, 2000, 2000).difference(VIA)
+    coords, offsets = PackPolygons([cell, shapely.box(3000, 0, 4000, 1000)])
+
+    areas = RingAreas(coords, offsets)
+    assert len(areas) == 3
+    assert areas[0] == pytest.approx(4e6)
+    assert areas[1] == pytest.approx(-VIA.area)
+    assert areas[2] == pytest.approx(1e6)
+
+def _Copper(poly_set):
+    """Полигоны shapely из набора заменителя pcbnew (контуры и их отверстия), мкм"""
+    def ring(chain):
+        return [(p.x / SCALE, p.y / SCALE) for p in chain.points]
+
+    return shapely.union_all([
+        shapely.Polygon(ring(chain), [ring(hole) for hole, index in poly_set.holes if index == i])
+        for i, chain in enumerate(poly_set.outlines)
+    ])
+
+@pytest.mark.parametrize('engine', list(GRID_ENGINES))
+def test_prefilled_element_around_via(engine):
+    result = _FillBoard(engine)
+    poly_set = BuildPolySet(result['coords'], result['offsets'])
+    assert poly_set.HasHoles()
+
+    zone = pcbnew.ZONE()
+    SetPrefilled(zone, poly_set)
+    assert poly_set.fractured
+
+    # Медь не заходит в отверстие, а элемент вокруг него сохраняется
+    copper = _Copper(poly_set)
+    assert copper.intersection(VIA).area < 1
+    assert copper.covers(shapely.box(0, 0, 300, 300))
+    assert FilledArea(zone) == pytest.approx(copper.area, rel=1e-6)
@@ -0,0 +1,28 @@
+import pytest
+import shapely
+
+from plugin.core.edge_cuts_utils import BuildPolys, ChainSegments
+
+# Контур платы 10×10 мм, концы отрезков в мкм (NmToMkr)
+SQUARE = [(0, 0, 10000, 0), (10000, 0, 10000, 10000), (10000, 10000, 0, 10000), (0, 10000, 0, 0)]
+
+@pytest.mark.parametrize('gap', [(1, 0), (0, 1), (1, 1)])
+def test_chain_closes_truncation_gap(gap):
+    # Угол 10000 нм/9999 нм в KiCad после усечения до мкм расходится на 1 мкм
+    segments = list(SQUARE)
+    x1, y1, x2, y2 = segments[1]
+    segments[1] = (x1 + gap[0], y1 + gap[1], x2, y2)
+
+    polys = BuildPolys(segments)
+
+    assert len(polys) == 1
+    assert shapely.Polygon(polys[0]).area == pytest.approx(1e8, rel=1e-3)
+
+def test_chain_keeps_real_gap():
+    segments = [((x1, y1), (x2, y2)) for x1, y1, x2, y2 in SQUARE]
+    segments[1] = ((10000, 10), (10000, 10000))
+
+    closed, unclosed = ChainSegments(segments)
+
+    assert closed == []
+    assert len(unclosed) == 1
@@ -0,0 +1,80 @@
+import json
+import math
+
+import numpy as np
+import pytest
+import shapely
+
+from plugin.core.kicad_pcb import ReadBoardIndex, ReadMaxError
+from plugin.core.backend import ReadBoardIndexAsync
+from plugin.core.preprocessing import BuildTracks, BuildVias
+
+HEADER = '(kicad_pcb (version 20240108) (generator "test") (layers (0 "F.Cu" signal) (31 "B.Cu" signal))\n'
+
+def _ReadPad(tmp_path, pad: str) -> shapely.Polygon:
+    """Контур единственной площадки посадочного места в (10 мм, 10 мм), мкм"""
+    board_file = tmp_path / 'pad.kicad_pcb'
+    board_file.write_text(HEADER + f'(footprint "Test:Pad" (layer "F.Cu") (at 10 10) {pad}))\n', encoding='utf-8')
+
+    pads = ReadBoardIndex(str(board_file), max_error=1).items('F.Cu').pads
+    assert len(pads) == 1
+
+    return shapely.Polygon(pads[0])
+
+def test_custom_pad_arc_primitive(tmp_path):
+    # Якорь 0.2 мм и полуокружность r = 1 мм шириной 0.2 мм от якоря через (1, 1) до (2, 0)
+    pad = _ReadPad(tmp_path, '(pad "1" smd custom (at 0 0) (size 0.2 0.2) (layers "F.Cu") (options (anchor rect))'
+                             ' (primitives (gr_arc (start 0 0) (mid 1 1) (end 2 0) (width 0.2))))')
+
+    arc = shapely.LineString([(11000 - 1000 * math.cos(a), 10000 + 1000 * math.sin(a))
+                              for a in [math.pi * i / 256 for i in range(257)]])
+    copper = shapely.union_all([arc.buffer(100, quad_segs=64), shapely.box(9900, 9900, 10100, 10100)])
+    # Площадка не меньше меди дуги (с точностью до усечения вершин до мкм) и не заменена хордой
+    assert pad.buffer(1).covers(copper)
+    assert pad.area == pytest.approx(copper.area, rel=0.02)
+
+def test_custom_pad_stroked_poly(tmp_path):
+    # Квадрат 1 мм с обводкой 0.2 мм — медь 1.2 мм со скругленными углами
+    pad = _ReadPad(tmp_path, '(pad "1" smd custom (at 0 0) (size 0.1 0.1) (layers "F.Cu") (options (anchor rect))'
+                             ' (primitives (gr_poly (pts (xy -0.5 -0.5) (xy 0.5 -0.5) (xy 0.5 0.5) (xy -0.5 0.5))'
+                             ' (width 0.2) (fill yes))))')
+
+    copper = shapely.box(9500, 9500, 10500, 10500).buffer(100, quad_segs=64)
+    assert pad.buffer(1).covers(copper)
+
+def test_trapezoid_pad(tmp_path):
+    # Трапеция 2×1 мм, rect_delta по X: левая сторона 1.4 мм, правая 0.6 мм
+    pad = _ReadPad(tmp_path, '(pad "1" smd trapezoid (at 0 0) (size 2 1) (rect_delta 0.4 0) (layers "F.Cu"))')
+
+    expected = shapely.Polygon([(9000, 9300), (11000, 9700), (11000, 10300), (9000, 10700)])
+    assert pad.symmetric_difference(expected).area < 1
+
+def test_chamfered_pad(tmp_path):
+    # Прямоугольник 2×1 мм, фаски 0.25 мм на верхнем левом и нижнем правом углах
+    pad = _ReadPad(tmp_path, '(pad "1" smd roundrect (at 0 0) (size 2 1) (roundrect_rratio 0) (chamfer_ratio 0.25)'
+                             ' (chamfer top_left bottom_right) (layers "F.Cu"))')
+
+    expected = shapely.Polygon([(9250, 9500), (11000, 9500), (11000, 10250), (10750, 10500), (9000, 10500), (9000, 9750)])
+    assert pad.symmetric_difference(expected).area < 1
+    assert pad.area == pytest.approx(2e6 - 2 * 0.25e3 ** 2 / 2)
+
+def test_index_read_in_process(tmp_path):
+    board_file = tmp_path / 'tracks.kicad_pcb'
+    board_file.write_text(HEADER + '(segment (start 1 1) (end 5 1) (width 0.25) (layer "F.Cu"))\n'
+                                   '(segment (start 1 2) (end 5 2) (width 0.3) (layer "B.Cu"))\n'
+                                   '(via (at 3 3) (size 0.6) (drill 0.3) (layers "F.Cu" "B.Cu"))\n)\n', encoding='utf-8')
+    (tmp_path / 'tracks.kicad_pro').write_text(json.dumps({'board': {'design_settings': {'rules': {'max_error': 0.002}}}}))
+    assert ReadMaxError(str(board_file)) == pytest.approx(2.0)
+
+    index = ReadBoardIndexAsync(str(board_file), 2.0).result(timeout=60)
+    # Дорожки и отверстия приходят плотными массивами, как из ReadBoardIndex в этом процессе
+    expected = ReadBoardIndex(str(board_file), 2.0)
+    segments = index.items('F.Cu').segments
+    assert isinstance(segments, np.ndarray) and segments.shape == (1, 5)
+    assert np.array_equal(segments, expected.items('F.Cu').segments)
+    assert index.through.vias.shape == (1, 3)
+    assert index.counts() == expected.counts()
+
+    # Пустой и непустой массив строятся так же, как списки
+    assert BuildTracks(np.empty((0, 5)), 100).is_empty
+    assert BuildVias(index.through.vias, 100).area > 0
@@ -0,0 +1,58 @@
+import os
+
+from plugin.core.manifest import RunManifest
+
+def _CrashingJob(job):
+    """Задание исполнителя, процесс которого падает на плате crash"""
+    if job['board'] == 'crash.kicad_pcb':
+        os._exit(1)
+
+    return {'board': job['board'], 'save_as': job['save_as'] or job['board'], 'status': 'ok', 'pid': os.getpid()}
+
+def test_worker_crash_fails_only_its_board():
+    boards = ['a.kicad_pcb', 'crash.kicad_pcb', 'b.kicad_pcb', 'c.kicad_pcb']
+    jobs = [{'board': board, 'save_as': None, 'settings': {}} for board in boards]
+
+    summary = RunManifest(jobs, workers=2, task=_CrashingJob)
+
+    statuses = {job['board']: job['status'] for job in summary['jobs']}
+    assert statuses == {'a.kicad_pcb': 'ok', 'crash.kicad_pcb': 'error', 'b.kicad_pcb': 'ok', 'c.kicad_pcb': 'ok'}
+    assert summary['failed'] == 1
+    assert summary['jobs'][1]['error'] == 'worker process crashed'
+
+# Маленькие синтетические платы: общий каталог, разное содержимое
+BOARD_SIZE = dict(width=20, height=15, tracks=100, pads=20, bga_fields=0, vias=20, cutouts=1, zones=1, masks=1)
+
+def _SyntheticJob(job):
+    """Задание исполнителя: заполнение синтетической платы с кэшами плиток и снимков"""
+    from benchmarks import fake_pcbnew
+    fake_pcbnew.Install()
+    from benchmarks.run import FILL_PARAMS
+    from benchmarks.synthetic import MakeBoard
+    from plugin.core.pipeline import RunFill
+
+    board = MakeBoard(seed=job['settings']['seed'], **BOARD_SIZE)
+    board.file_name = job['board']
+    summary = RunFill(board, dict(FILL_PARAMS, layers=['F.Cu', 'B.Cu'], incremental=True, snapshot_cache=True))
+
+    return {'board': job['board'], 'save_as': job['board'], 'status': 'ok', 'layers': summary['layers']}
+
+def test_boards_in_one_folder_keep_own_caches(tmp_path):
+    jobs = [{'board': str(tmp_path / f'{name}.kicad_pcb'), 'save_as': None, 'settings': {'seed': seed}}
+            for name, seed in (('a', 1), ('b', 2))]
+
+    def counts(summary):
+        return [{layer: (stats['total_shapes'], stats['clipped_shapes']) for layer, stats in job['layers'].items()}
+                for job in summary['jobs']]
+
+    first = counts(RunManifest(jobs, workers=2, task=_SyntheticJob))
+    # Второй запуск берет плитки и препятствия из кэшей: результат каждой платы не меняется
+    second = counts(RunManifest(jobs, workers=2, task=_SyntheticJob))
+
+    assert first[0] != first[1]
+    assert second == first
+    for name in ('a', 'b'):
+        cache_dir = tmp_path / '.copper_filler' / name
+        assert (cache_dir / 'F.Cu.npz').exists()
+        assert (cache_dir / 'snapshot' / 'edges.npy').exists()
+    assert not [path for path in tmp_path.rglob('*.tmp*')]
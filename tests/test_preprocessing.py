@@ -0,0 +1,36 @@
+import pytest
+import shapely
+
+import pcbnew
+
+from plugin.core.preprocessing import IndexBoard, BuildPads, BuildVias
+
+def _Square(x, y, half):
+    return [(x - half, y - half), (x + half, y - half), (x + half, y + half), (x - half, y + half)]
+
+def test_padstack_shape_per_layer():
+    board = pcbnew.BOARD()
+    front = _Square(1000000, 1000000, 500000)
+    back = _Square(1000000, 1000000, 300000)
+    board.pads.append(pcbnew.PAD(front, [pcbnew.F_Cu, pcbnew.B_Cu], layer_points={pcbnew.B_Cu: back}))
+    board.pads.append(pcbnew.PAD(_Square(3000000, 1000000, 500000), [pcbnew.F_Cu, pcbnew.B_Cu]))
+
+    index = IndexBoard(board)
+
+    # Площадка со стеком по слоям не сквозная: у каждого слоя своя форма
+    assert index.items(pcbnew.F_Cu).pads == [[(500, 500), (1500, 500), (1500, 1500), (500, 1500)]]
+    assert index.items(pcbnew.B_Cu).pads == [[(700, 700), (1300, 700), (1300, 1300), (700, 1300)]]
+    assert index.through.pads == [[(2500, 500), (3500, 500), (3500, 1500), (2500, 1500)]]
+
+@pytest.mark.parametrize('clearance', [100, 200, 300])
+def test_clearance_not_shrunk_by_tessellation(clearance):
+    # Квадратная площадка и отверстие: скругления зазора не заходят внутрь зазора
+    pad = [(0, 0), (1000, 0), (1000, 1000), (0, 1000)]
+    via = (3000, 500, 300)
+
+    pads = BuildPads([pad], clearance, max_error=5)
+    vias = BuildVias([via], clearance, max_error=5)
+
+    # Допуск 1 мкм — округление координат препятствий до целых мкм
+    assert pads.exterior.distance(shapely.Polygon(pad)) >= clearance - 1
+    assert vias.exterior.distance(shapely.Point(via[:2]).buffer(via[2], quad_segs=256)) >= clearance - 1